@@ -1,8 +1,11 @@
 """Calculate and update PotentialSatisfaction for all active jobs."""
 from __future__ import annotations
 from pathlib import Path
-import json
 import math
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from jobs import load_jobs, SOLICITATIES_DIR
 
 # Salary curve parameters
 S0 = 2200.0
@@ -82,35 +85,30 @@ def parse_folder_name(name: str) -> tuple[str, str]:
     return name.replace("_", " ").strip(), ""
 
 def main() -> None:
-    script_dir = Path(__file__).resolve().parent
-    repo_root = script_dir.parent.parent
-    sollicitaties = repo_root / "Solicitaties"
-    
-    if not sollicitaties.exists():
-        raise SystemExit(f"Solicitaties folder not found at: {sollicitaties}")
+    if not SOLICITATIES_DIR.exists():
+        raise SystemExit(f"Solicitaties folder not found at: {SOLICITATIES_DIR}")
 
     updated, skipped, errors = 0, 0, 0
     print("Updating PotentialSatisfaction for active jobs...\n")
 
-    for entry in sorted(sollicitaties.iterdir()):
-        if not entry.is_dir() or entry.name == "Archief":
+    for job in load_jobs(include_archived=False):
+        if job.errors:
+            print(f"  ✗ {job.name}: Error - {'; '.join(job.errors.values())}")
+            errors += 1
             continue
 
-        rel_path = entry / "relevant_info.json"
-        stats_path = entry / "stats.json"
-        
-        if not rel_path.exists():
-            print(f"  ⚠ {entry.name}: No relevant_info.json, skipping")
+        if job.info is None:
+            print(f"  ⚠ {job.name}: No relevant_info.json, skipping")
             skipped += 1
             continue
 
-        if not stats_path.exists():
-            print(f"  ⚠ {entry.name}: No stats.json, skipping")
+        if job.stats is None:
+            print(f"  ⚠ {job.name}: No stats.json, skipping")
             skipped += 1
             continue
 
         try:
-            rel_data = json.loads(rel_path.read_text(encoding="utf-8"))
+            rel_data = job.info
             salary_raw = rel_data.get("Salary")
             fit_raw = rel_data.get("Fit", 0)
             pref_raw = rel_data.get("Preference", 0)
@@ -131,22 +129,21 @@ def main() -> None:
             score = compute_potential_satisfaction(fit_raw, pref_raw, sal_w)
 
             # Update stats.json
-            stats_data = json.loads(stats_path.read_text(encoding="utf-8"))
+            stats_data = job.stats
             old_score = stats_data.get("PotentialSatisfaction")
             stats_data["PotentialSatisfaction"] = score
 
-            with open(stats_path, 'w', encoding='utf-8') as f:
-                json.dump(stats_data, f, indent=2, ensure_ascii=False)
+            job.save_stats(stats_data)
 
             if old_score != score:
-                print(f"  ✓ {entry.name}: {old_score} → {score}")
+                print(f"  ✓ {job.name}: {old_score} → {score}")
             else:
-                print(f"  ✓ {entry.name}: {score} (unchanged)")
+                print(f"  ✓ {job.name}: {score} (unchanged)")
             
             updated += 1
 
         except Exception as e:
-            print(f"  ✗ {entry.name}: Error - {e}")
+            print(f"  ✗ {job.name}: Error - {e}")
             errors += 1
 
     print(f"\n{'='*60}")
@@ -1,32 +1,32 @@
 """Plot PotentialSatisfaction for active jobs."""
 import matplotlib.pyplot as plt
 from pathlib import Path
-import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from jobs import load_jobs, SOLICITATIES_DIR
 
 def main():
     script_dir = Path(__file__).resolve().parent
-    repo_root = script_dir.parent.parent
-    sollicitaties = repo_root / "Solicitaties"
     
-    if not sollicitaties.exists():
-        raise SystemExit(f"Solicitaties folder not found at: {sollicitaties}")
+    if not SOLICITATIES_DIR.exists():
+        raise SystemExit(f"Solicitaties folder not found at: {SOLICITATIES_DIR}")
 
     jobs = []
 
-    for job_folder in sorted(sollicitaties.iterdir()):
-        if not job_folder.is_dir() or job_folder.name == "Archief":
+    for job in load_jobs(include_archived=False):
+        if "stats.json" in job.errors:
+            print(f"Warning: Could not read {job.name}: {job.errors['stats.json']}")
             continue
 
-        stats_file = job_folder / "stats.json"
-        if not stats_file.exists():
+        if job.stats is None:
             continue
 
         try:
-            data = json.loads(stats_file.read_text(encoding="utf-8"))
-            potential = data.get("PotentialSatisfaction")
+            potential = job.stats.get("PotentialSatisfaction")
             
             if potential is not None:
-                folder_name = job_folder.name
+                folder_name = job.name
                 if "—" in folder_name:
                     role, company = folder_name.split("—", 1)
                     label = f"{role.replace('_', ' ').strip()} — {company.replace('_', ' ').strip()}"
@@ -35,7 +35,7 @@ def main():
                 
                 jobs.append({"label": label, "potential": float(potential)})
         except Exception as e:
-            print(f"Warning: Could not read {job_folder.name}: {e}")
+            print(f"Warning: Could not read {job.name}: {e}")
 
     if not jobs:
         raise SystemExit("No jobs with PotentialSatisfaction found!")
@@ -1,7 +1,8 @@
 """Move jobs with Rejected or Expired status to Archive."""
-import json
-import shutil
+import argparse
 from pathlib import Path
+from jobs import load_jobs
+from journal import Journal, apply_ops, describe, replay
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent if (SCRIPT_DIR.parent / "Solicitaties").exists() else SCRIPT_DIR
@@ -10,40 +11,26 @@ SOLICITATIES_DIR = PROJECT_ROOT / "Solicitaties"
 ARCHIVE_DIR = SOLICITATIES_DIR / "1.Archief"
 ARCHIVE_STATES = {"Rejected", "Expired"}
 
-def archive_jobs():
-    """Move jobs with Rejected or Expired status to Archive folder."""
-    if not SOLICITATIES_DIR.exists():
-        print("No Solicitaties directory found.")
-        return
-    
-    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
-    
-    job_folders = [
-        f for f in SOLICITATIES_DIR.iterdir() 
-        if f.is_dir() and f.name != "Archief"
-    ]
-    
-    print(f"Checking {len(job_folders)} jobs for archiving...\n")
-    
-    archived, skipped, errors = 0, 0, 0
+def plan_archive(jobs):
+    """Return the folder moves for every job that should be archived."""
+    ops = []
+    skipped, errors = 0, 0
     
-    for job_folder in job_folders:
-        stats_file = job_folder / "stats.json"
+    for job in jobs:
+        job_folder = job.path
+        job_name = job.name
         
-        if not stats_file.exists():
-            skipped += 1
+        if "stats.json" in job.errors:
+            print(f"  ✗ {job_name}: Error reading stats - {job.errors['stats.json']}")
+            errors += 1
             continue
         
-        job_name = job_folder.name
-        
-        try:
-            with open(stats_file, 'r', encoding='utf-8') as f:
-                stats = json.load(f)
-        except Exception as e:
-            print(f"  ✗ {job_name}: Error reading stats - {e}")
-            errors += 1
+        if job.stats is None:
+            skipped += 1
             continue
         
+        stats = job.stats
+        
         response = stats.get('Response', '')
         
         if response in ARCHIVE_STATES:
@@ -54,16 +41,57 @@ def archive_jobs():
                 skipped += 1
                 continue
             
-            try:
-                shutil.move(str(job_folder), str(archive_dest))
-                print(f"  ✓ Archived: {job_name}")
-                print(f"    Status: {response}")
-                print(f"    Next Action: {stats.get('NextAction', 'N/A')[:60]}")
-                print()
-                archived += 1
-            except Exception as e:
-                print(f"  ✗ {job_name}: Error moving to archive - {e}")
-                errors += 1
+            ops.append({"op": "move", "src": str(job_folder), "dst": str(archive_dest)})
+            print(f"  ✓ Archive: {job_name}")
+            print(f"    Status: {response}")
+            print(f"    Next Action: {stats.get('NextAction', 'N/A')[:60]}")
+            print()
+    
+    return ops, skipped, errors
+
+def archive_jobs(dry_run=False, jobs=None):
+    """Move jobs with Rejected or Expired status to Archive folder.
+    
+    The moves are journaled first and then applied as one batch of renames;
+    a run that crashed halfway is finished before planning a new one.
+    Returns the number of jobs archived.
+    """
+    if not SOLICITATIES_DIR.exists():
+        print("No Solicitaties directory found.")
+        return 0
+    
+    journal = Journal("archive_jobs")
+    if dry_run:
+        if journal.pending():
+            print(f"⚠ An unfinished run is journaled in {journal.path}; it is replayed on the next real run\n")
+    else:
+        replay(journal)
+        ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    
+    if jobs is None:
+        jobs = load_jobs(include_archived=False, solicitaties_dir=SOLICITATIES_DIR)
+    else:
+        jobs = [job for job in jobs if not job.archived]
+    
+    print(f"Checking {len(jobs)} jobs for archiving...\n")
+    
+    ops, skipped, errors = plan_archive(jobs)
+    
+    if dry_run:
+        print(f"Plan ({len(ops)} moves):")
+        for op in ops:
+            print(f"  {describe(op)}")
+        print(f"\n✓ Dry run, nothing changed")
+        return 0
+    
+    archived = 0
+    if ops:
+        journal.write(ops)
+        archived, already_done, failed = apply_ops(ops)
+        errors += failed
+        if failed:
+            raise RuntimeError(f"{failed} move(s) failed; they are retried from {journal.path} on the next run")
+        journal.clear()
     
     print(f"\n{'='*60}")
     print(f"✓ Archiving Complete!")
@@ -71,10 +99,16 @@ def archive_jobs():
     print(f"  Skipped: {skipped}")
     print(f"  Errors: {errors}")
     print(f"\nArchive location: {ARCHIVE_DIR.absolute()}")
+    return archived
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Move Rejected or Expired jobs to the archive")
+    parser.add_argument("--dry-run", action="store_true", help="Print the planned moves without changing anything")
+    return parser.parse_args()
 
 if __name__ == "__main__":
     try:
-        archive_jobs()
+        archive_jobs(dry_run=parse_args().dry_run)
     except Exception as e:
         print(f"ERROR: {e}")
         exit(1)
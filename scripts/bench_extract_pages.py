@@ -0,0 +1,181 @@
+"""Benchmark: HTML-to-text extractors on the repo's own vacancy pages.
+
+The corpus is the newest archived raw page of every job (page_archive.py).
+--build-corpus first downloads the Link of every job that has no archived
+page yet, so the benchmark runs on the real career sites. Without any
+archived pages it falls back to a synthetic corpus: the text of every
+webpage.txt wrapped in a typical career-site template (navigation, cookie
+banner, footer, inline scripts and styles). For that corpus the report
+also shows how much of the vacancy text each extractor kept and how much
+boilerplate it let through. Every run ends with a few sample pages that
+once lost their vacancy text (an ASP.NET <form> around the whole page,
+content in modal-body or *-share-* containers, a teaser-only <main>) and
+fails if an extractor drops the vacancy from any of them.
+
+Usage: python scripts/bench_extract_pages.py [--rounds 5] [--build-corpus] [--synthetic]
+"""
+import time
+import asyncio
+import argparse
+from html import escape
+from jobs import load_jobs
+from page_archive import latest_page, read_page, put_page
+from extract_pages import MIN_TEXT_SIZE, available_extractors, extract_text, fast_text
+
+BOILERPLATE_MARKERS = ["We gebruiken cookies", "Alle vacatures", "Volg ons op", "Privacyverklaring"]
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="nl"><head><meta charset="utf-8"><title>{title} | Werken bij</title>
+<style>{style}</style><script>{script}</script></head>
+<body class="page-vacancy">
+<div id="cookie-consent" class="cookie-banner"><p>We gebruiken cookies om de website te verbeteren.</p>
+<button>Alles accepteren</button><button>Instellingen</button></div>
+<header class="site-header"><nav class="main-menu"><ul>{menu}</ul></nav>
+<form class="search"><input name="q"><button>Zoeken</button></form></header>
+<div class="breadcrumb"><a href="/">Home</a> / <a href="/vacatures">Alle vacatures</a> / {title}</div>
+<main><article class="vacancy"><h1>{title}</h1>
+{body}
+</article>
+<aside class="related"><h2>Vergelijkbare vacatures</h2><ul>{related}</ul></aside></main>
+<footer class="site-footer"><div class="social-share">Volg ons op LinkedIn, Instagram en X</div>
+<p><a href="/privacy">Privacyverklaring</a> · <a href="/cookies">Cookiebeleid</a> · © 2026</p></footer>
+<script>{script}</script>
+</body></html>"""
+
+def synthetic_page(title, text, rng_seed):
+    """Wrap a webpage.txt text in career-site chrome, roughly 100 KiB like real ATS pages."""
+    paragraphs = "\n".join(f"<p>{escape(line)}</p>" for line in text.splitlines() if line.strip())
+    menu = "".join(f'<li><a href="/m/{i}">Menu-item {i}</a></li>' for i in range(60))
+    related = "".join(f'<li><a href="/v/{rng_seed}-{i}">Andere vacature {i}</a></li>' for i in range(25))
+    style = ".c{color:#123;margin:0 auto;padding:4px}" * 600
+    script = "window.dataLayer=window.dataLayer||[];dataLayer.push({'event':'view','id':%d});" % rng_seed * 300
+    return TEMPLATE.format(title=escape(title), body=paragraphs, menu=menu, related=related,
+                           style=style, script=script).encode('utf-8')
+
+SAMPLE_VACANCY = ("Wij zoeken een ervaren Data Engineer die onze datapijplijnen in Python en SQL bouwt. "
+                  "Je werkt in een klein team en rapporteert aan de teamleider Data. Salaris tot EUR 4.500.")
+# Outside the vacancy container, so losing the container does not leave a page short enough to fall back
+SAMPLE_ABOUT = ('<div class="about"><p>Gemeente Voorbeeld is een moderne organisatie met ruim 800 medewerkers '
+                'die zich dagelijks inzetten voor de inwoners en ondernemers van de regio.</p></div>')
+
+SAMPLE_PAGES = {
+    "ASP.NET form": """<html><body><form id="aspnetForm" method="post" action="./vacature.aspx">
+<div class="navbar"><a href="/">Home</a></div><div class="content"><h1>Data Engineer</h1><p>{vacancy}</p></div>
+</form>{about}</body></html>""",
+    "modal-body": """<html><body><div class="modal fade"><div class="modal-body">Nieuwsbrief?</div></div>
+<div class="vacancy modal-body"><h1>Data Engineer</h1><p>{vacancy}</p></div>{about}</body></html>""",
+    "share container": """<html><body><div class="vacancy-share-content"><h1>Data Engineer</h1><p>{vacancy}</p>
+</div><div class="social-share">Deel via LinkedIn</div>{about}</body></html>""",
+    "teaser main": """<html><body><main><h1>Data Engineer</h1><p>Solliciteer direct, of lees eerst meer over
+deze functie en ons team verderop op deze pagina.</p></main><div class="details"><p>{vacancy}</p>
+<p>{vacancy}</p></div></body></html>""",
+}
+
+def check_samples():
+    """Every extractor keeps the vacancy text of the SAMPLE_PAGES."""
+    lost = [(name, extractor) for name, page in SAMPLE_PAGES.items() for extractor in available_extractors()
+            if SAMPLE_VACANCY not in extract_text(page.format(vacancy=SAMPLE_VACANCY, about=SAMPLE_ABOUT).encode('utf-8'), extractor)]
+    for name, extractor in lost:
+        print(f"  ✗ {extractor} lost the vacancy text of the {name} sample")
+    if lost:
+        raise SystemExit(1)
+    print(f"✓ All extractors kept the vacancy text of {len(SAMPLE_PAGES)} sample pages")
+
+def archived_corpus(jobs):
+    corpus = []
+    for job in jobs:
+        entry = latest_page(job.path)
+        if entry:
+            corpus.append((job.name, read_page(job.path, entry["sha256"]), None))
+    return corpus
+
+def synthetic_corpus(jobs):
+    """[(name, html, original text)] for every job whose webpage.txt has real content."""
+    corpus = []
+    for i, job in enumerate(jobs):
+        webpage_txt = job.path / "webpage.txt"
+        if not webpage_txt.exists():
+            continue
+        text = webpage_txt.read_text(encoding='utf-8')
+        if text.startswith("Source: "):
+            text = text.partition("\n\n")[2]
+        if len(text) > MIN_TEXT_SIZE * 5:
+            corpus.append((job.name, synthetic_page(job.role or job.name, text, i), text))
+    return corpus
+
+def build_corpus(jobs):
+    """Download and archive the Link of every job without an archived page."""
+    from fetch_job_pages import fetch_pages  # Only this needs requests
+
+    targets = [(job, job.info["Link"]) for job in jobs
+               if job.info and job.info.get("Link") and latest_page(job.path) is None]
+    print(f"Downloading {len(targets)} vacancy pages for the corpus...")
+    stored = 0
+    for result in asyncio.run(fetch_pages(targets)):
+        if result.ok and result.content:
+            put_page(result.job.path, result.url, result.content, result.content_type)
+            stored += 1
+    print(f"  ✓ Archived {stored} pages, {len(targets) - stored} failed\n")
+
+def kept_fraction(original, output):
+    """Share of the original lines that show up in the output."""
+    lines = [line.strip() for line in original.splitlines() if len(line.strip()) > 20]
+    return sum(line in output for line in lines) / max(len(lines), 1)
+
+def run(name, corpus, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        outputs = [extract_text(html, name) for _, html, _ in corpus]
+    seconds = (time.perf_counter() - start) / rounds
+    fallbacks = 0
+    if name != "bs4":
+        fallbacks = sum(fast_text(html, name) is None for _, html, _ in corpus)
+    return seconds, outputs, fallbacks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--build-corpus", action="store_true", help="Download the pages of jobs without an archived page")
+    parser.add_argument("--synthetic", action="store_true", help="Use the synthetic corpus even if pages are archived")
+    args = parser.parse_args()
+
+    jobs = load_jobs()
+    if args.build_corpus:
+        build_corpus(jobs)
+    corpus = [] if args.synthetic else archived_corpus(jobs)
+    kind = "archived pages"
+    if not corpus:
+        corpus, kind = synthetic_corpus(jobs), "synthetic pages from webpage.txt"
+    if not corpus:
+        raise SystemExit("✗ No corpus: no archived pages and no webpage.txt with content")
+
+    size = sum(len(html) for _, html, _ in corpus)
+    print(f"Benchmark: {len(corpus)} {kind}, {size / 1024:.0f} KiB of HTML, {args.rounds} rounds")
+    print(f"Extractors installed: {', '.join(available_extractors())}\n")
+
+    results = {name: run(name, corpus, args.rounds) for name in available_extractors()}
+    baseline_time, baseline_outputs, _ = results["bs4"]
+    baseline_size = sum(map(len, baseline_outputs))
+    synthetic = all(original is not None for _, _, original in corpus)
+
+    header = f"  {'extractor':<12}{'time':>9}{'pages/s':>10}{'MiB/s':>8}{'speedup':>9}{'output':>10}{'vs bs4':>8}{'fallback':>10}"
+    if synthetic:
+        header += f"{'kept':>7}{'boilerplate':>13}"
+    print(header)
+    for name, (seconds, outputs, fallbacks) in results.items():
+        out_size = sum(map(len, outputs))
+        line = (f"  {name:<12}{seconds * 1000:>7.1f}ms{len(corpus) / seconds:>10.0f}{size / seconds / 2**20:>8.1f}"
+                f"{baseline_time / seconds:>8.1f}x{out_size / 1024:>8.1f}KiB{out_size / max(baseline_size, 1):>8.0%}"
+                f"{fallbacks:>10}")
+        if synthetic:
+            kept = sum(kept_fraction(original, out) for (_, _, original), out in zip(corpus, outputs)) / len(corpus)
+            boilerplate = sum(marker in out for out in outputs for marker in BOILERPLATE_MARKERS)
+            line += f"{kept:>7.0%}{boilerplate:>13}"
+        print(line)
+
+    fastest = min(results, key=lambda name: results[name][0])
+    print(f"\n✓ Fastest: {fastest} ({baseline_time / results[fastest][0]:.1f}x bs4)")
+    check_samples()
+
+if __name__ == "__main__":
+    main()
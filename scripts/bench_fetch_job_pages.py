@@ -0,0 +1,109 @@
+"""Benchmark: concurrent job-page fetching vs. the old serial loop.
+
+Runs against local stand-in servers, one per simulated host (each on its
+own port), that answer every request after a fixed latency. The per-host
+politeness delay and the concurrency cap are checked by
+tests/test_fetch_job_pages.py; this only measures the speedup.
+
+Usage: python scripts/bench_fetch_job_pages.py [--hosts 50] [--pages-per-host 1] [--latency 0.2] [--delay 1.0]
+"""
+import time
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from fetch_job_pages import HEADERS, fetch_pages
+from extract_pages import html_to_text
+
+PAGE = b"""<html><head><style>p {color: red}</style><script>var x = 1;</script></head>
+<body><h1>Data Engineer</h1><p>Wij zoeken een Data Engineer  voor ons team.</p><p>Deadline: 2026-01-31</p></body></html>"""
+
+def start_server(latency, arrivals):
+    """Start one stand-in host on a free port; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            arrivals.append(time.monotonic())
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+def legacy_fetch(targets, delay):
+    """The original loop: one requests.get after another, sleeping after each."""
+    texts = []
+    for _, url in targets:
+        response = requests.get(url, headers=HEADERS, timeout=15)
+        response.raise_for_status()
+        texts.append(html_to_text(response.content))
+        time.sleep(delay)
+    return texts
+
+def min_gap(arrivals):
+    arrivals = sorted(arrivals)
+    return min((b - a for a, b in zip(arrivals, arrivals[1:])), default=None)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--pages-per-host", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.2, help="Server response time in seconds")
+    parser.add_argument("--delay", type=float, default=1.0, help="Politeness delay per host in seconds")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-legacy", action="store_true", help="Only estimate the serial loop")
+    args = parser.parse_args()
+
+    arrivals = [[] for _ in range(args.hosts)]
+    servers = [start_server(args.latency, arrivals[i]) for i in range(args.hosts)]
+    targets = [(f"job{i}-{n}", f"http://127.0.0.1:{server.server_port}/vacature/{n}")
+               for n in range(args.pages_per_host) for i, server in enumerate(servers)]
+    print(f"Benchmark: {len(targets)} pages on {args.hosts} hosts, "
+          f"{args.latency:.2f}s latency, {args.delay:.1f}s politeness delay\n")
+
+    if args.skip_legacy:
+        legacy_time = len(targets) * (args.latency + args.delay)
+        legacy_label = "serial loop (estimated)"
+    else:
+        start = time.perf_counter()
+        legacy_texts = legacy_fetch(targets, args.delay)
+        legacy_time = time.perf_counter() - start
+        legacy_label = "serial loop"
+        for host in arrivals:
+            host.clear()
+
+    start = time.perf_counter()
+    results = asyncio.run(fetch_pages(targets, args.concurrency, args.delay, timeout=(5, 15)))
+    async_time = time.perf_counter() - start
+
+    for server in servers:
+        server.shutdown()
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        raise SystemExit(f"✗ {len(failed)} fetches failed, e.g. {failed[0].url}: {failed[0].error}")
+    if not args.skip_legacy and sorted(r.text for r in results) != sorted(legacy_texts):
+        raise SystemExit("✗ Page texts differ between the serial loop and the concurrent fetcher!")
+
+    gaps = [gap for gap in map(min_gap, arrivals) if gap is not None]
+
+    latencies = sorted(r.latency for r in results)
+    print(f"  {legacy_label:<28}{legacy_time:>8.2f}s")
+    print(f"  {f'concurrent ({args.concurrency} workers)':<28}{async_time:>8.2f}s")
+    print(f"\n  Speedup: {legacy_time / max(async_time, 1e-9):.1f}x")
+    print(f"  Latency: median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+    if gaps:
+        print(f"  Closest two requests to one host: {min(gaps):.2f}s apart")
+    print(f"✓ All {len(results)} pages fetched{'' if args.skip_legacy else ', identical text'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Benchmark: JobIndex vs. the old per-folder email-to-job matching.
+
+The legacy matcher scores every email against every job, so it only runs on
+a sample of the emails; its time is extrapolated to the full workload. On
+that sample the legacy scoring loop and the index must pick the same job
+from the same candidate jobs (company resolution itself changed on purpose).
+
+Usage: python scripts/bench_job_matching.py [--jobs 5000] [--emails 50000] [--sample 200]
+"""
+import re
+import time
+import random
+import argparse
+import job_index
+import company_resolver
+from job_index import JobIndex, parse_job_folder_name, extract_sender_domain
+
+def legacy_calculate_match_score(folder_name, sender_email, subject, body):
+    """The original organize_emails.calculate_match_score, kept for comparison."""
+    job_title, company = parse_job_folder_name(folder_name)
+    if not job_title or not company:
+        return 0
+
+    score = 0
+    sender_domain = extract_sender_domain(sender_email)
+    subject_lower = (subject or '').lower()
+    body_lower = (body or '').lower()[:500]
+
+    if sender_domain:
+        for part in company.split():
+            if len(part) > 3 and part in sender_domain:
+                score += 50
+
+    for keyword in company.split():
+        if len(keyword) > 2:
+            if keyword in subject_lower:
+                score += 20
+            if keyword in body_lower:
+                score += 10
+
+    for keyword in job_title.split():
+        if len(keyword) > 2:
+            if keyword in subject_lower:
+                score += 15
+            if keyword in body_lower:
+                score += 5
+
+    for vacancy in re.findall(r'\d{5,}', folder_name):
+        if vacancy in subject_lower or vacancy in body_lower:
+            score += 100
+
+    return score
+
+def legacy_best_match(candidate_jobs, subject, email_from, body):
+    """The original scoring loop over the candidate folders."""
+    best_match = None
+    best_score = 0
+    for folder in candidate_jobs:
+        score = legacy_calculate_match_score(folder, email_from, subject, body)
+        if score > best_score:
+            best_score = score
+            best_match = folder
+    return best_match, best_score
+
+def legacy_get_job_folder(all_jobs, company, subject, email_from, body=""):
+    """The original organize_emails.get_job_folder, minus the directory listing."""
+    if not all_jobs:
+        return None
+
+    if company and company != "DISCARD":
+        company_lower = company.lower()
+        matching_jobs = []
+        for folder in all_jobs:
+            _, folder_company = parse_job_folder_name(folder)
+            if folder_company and company_lower in folder_company:
+                matching_jobs.append(folder)
+        candidate_jobs = matching_jobs if matching_jobs else all_jobs
+    else:
+        candidate_jobs = all_jobs
+
+    best_match, best_score = legacy_best_match(candidate_jobs, subject, email_from, body)
+
+    if best_score > 10:
+        return best_match
+    if company and company != "DISCARD" and candidate_jobs:
+        return candidate_jobs[0]
+    return None
+
+NO_ALIASES = "/nonexistent/company_aliases.json"  # Keep the real alias table out of it
+
+TITLES = ["Data Engineer", "Data Analist", "Proces Engineer", "QA Engineer", "ML Engineer",
+          "Test Engineer", "Software Developer", "Chemisch Analist", "Functioneel Ontwerper",
+          "Kwaliteit en Servicemanagement", "Junior Onderzoeker", "IT Solution Architect"]
+WORDS = ["beste", "bedankt", "voor", "je", "sollicitatie", "wij", "hebben", "helaas", "uitnodiging",
+         "gesprek", "vacature", "functie", "team", "groeten", "planning", "week", "volgende"]
+
+def make_workload(n_jobs, n_emails, seed=42):
+    rng = random.Random(seed)
+    syllables = ["ka", "ro", "ve", "lin", "tor", "ma", "sen", "dex", "qua", "bri", "po", "nel", "zu", "gra"]
+    companies = []
+    for _ in range(n_jobs // 3 + 1):
+        name = "".join(rng.choices(syllables, k=rng.randint(2, 4))).capitalize()
+        companies.append(f"{name} {rng.choice(['Groep', 'Nederland', 'BV', 'Solutions', ''])}".strip())
+    jobs = []
+    for i in range(n_jobs):
+        title = rng.choice(TITLES)
+        if i % 7 == 0:
+            title += f" {rng.randint(10000, 99999)}"  # Some folders carry a vacancy number
+        jobs.append(f"{title.replace(' ', '_')}_—_{rng.choice(companies).replace(' ', '_')}")
+
+    emails = []
+    for _ in range(n_emails):
+        job = rng.choice(jobs)
+        title, company = parse_job_folder_name(job)
+        domain = company.split()[0] + ".nl"
+        words = rng.choices(WORDS, k=60) + [company.split()[0]] + title.split()[:1]
+        rng.shuffle(words)
+        emails.append({
+            "company": rng.choice([company.split()[0], None, "Unknown Ltd"]),
+            "subject": f"Re: {title} bij {company}" if rng.random() < 0.6 else "Uw sollicitatie",
+            "from": f"HR <hr@{domain}>" if rng.random() < 0.7 else "noreply@workday.com",
+            "body": " ".join(words),
+        })
+    return jobs, emails
+
+def match_all(index, emails):
+    matched = []
+    for e in emails:
+        try:
+            matched.append(index.match(e["company"], e["subject"], e["from"], e["body"]))
+        except LookupError:
+            matched.append(None)  # Unknown company or ambiguous job
+    return matched
+
+def check_sample(index, jobs, sample):
+    """Legacy scoring and the index must agree on the same candidates."""
+    for e in sample:
+        try:
+            candidates = index.candidates(e["company"])
+        except LookupError:
+            continue
+        names = jobs if candidates is None else [jobs[i] for i in candidates]
+        expected = legacy_best_match(names, e["subject"], e["from"], e["body"])
+        if index.best_match(e["company"], e["subject"], e["from"], e["body"]) != expected:
+            raise SystemExit(f"✗ Results differ between legacy and index for {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5_000)
+    parser.add_argument("--emails", type=int, default=50_000)
+    parser.add_argument("--sample", type=int, default=200, help="Emails to run the legacy matcher on")
+    args = parser.parse_args()
+
+    jobs, emails = make_workload(args.jobs, args.emails)
+    sample = emails[:args.sample]
+    print(f"Benchmark: {len(jobs)} jobs, {len(emails)} emails (legacy on {len(sample)})\n")
+
+    start = time.perf_counter()
+    for e in sample:
+        legacy_get_job_folder(jobs, e["company"], e["subject"], e["from"], e["body"])
+    legacy_time = (time.perf_counter() - start) / len(sample) * len(emails)
+
+    start = time.perf_counter()
+    index = JobIndex(jobs, aliases_file=NO_ALIASES)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.prepare(e["company"] for e in emails)
+    resolve_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = match_all(index, emails)
+    index_time = time.perf_counter() - start
+    check_sample(index, jobs, sample)
+
+    resolver = 'rapidfuzz' if company_resolver.process is not None else 'difflib'
+    results = [("legacy (extrapolated)", legacy_time), ("index build", build_time),
+               (f"resolve companies ({resolver})", resolve_time),
+               (f"index match ({'numpy' if job_index.np is not None else 'dict'})", index_time)]
+
+    if job_index.np is not None:
+        # Same run with the pure-Python scoring path
+        numpy, job_index.np = job_index.np, None
+        try:
+            dict_index = JobIndex(jobs, aliases_file=NO_ALIASES)
+            dict_index._candidates = index._candidates  # Same resolutions, scoring only
+            start = time.perf_counter()
+            dict_matched = match_all(dict_index, emails)
+            results.append(("index match (dict)", time.perf_counter() - start))
+        finally:
+            job_index.np = numpy
+        if dict_matched != matched:
+            raise SystemExit("✗ Results differ between numpy and dict scoring!")
+
+    for label, seconds in results:
+        print(f"  {label:<30}{seconds:>10.2f}s")
+    print(f"\n  Speedup: {legacy_time / max(resolve_time + index_time, 1e-9):.0f}x")
+    print(f"✓ Identical results on the sample ({sum(m is not None for m in matched)} of {len(matched)} emails matched)")
+
+if __name__ == "__main__":
+    main()
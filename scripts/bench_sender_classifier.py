@@ -0,0 +1,72 @@
+"""Microbenchmark: SenderClassifier vs. the old list-based spam check.
+
+Usage: python scripts/bench_sender_classifier.py [--senders 10000] [--lookups 20000]
+"""
+import re
+import time
+import random
+import argparse
+from sender_classifier import JOB_KEYWORDS, SenderClassifier
+
+def legacy_is_spam_sender(email_from, subject, spam_list):
+    """The original fetch_emails.is_spam_sender, kept for comparison."""
+    match = re.search(r'<([^>]+)>', email_from)
+    sender_email = match.group(1).strip().lower() if match else email_from.strip().lower()
+    if sender_email in spam_list:
+        subject_lower = (subject or '').lower()
+        for keyword in JOB_KEYWORDS:
+            if keyword in subject_lower:
+                return False
+        return True
+    return False
+
+def legacy_build(senders):
+    """The original organize_emails appends, each with an O(n) membership check."""
+    spam_list = []
+    for sender in senders:
+        if sender not in spam_list:
+            spam_list.append(sender)
+    return spam_list
+
+def make_workload(n_senders, n_lookups, seed=42):
+    rng = random.Random(seed)
+    senders = [f"news{i}@sender{i % 997}.example.com" for i in range(n_senders)]
+    subjects = ["Weekly digest", "Your order has shipped", "Vacature: Data Engineer", "Uitnodiging interview"]
+    lookups = []
+    for i in range(n_lookups):
+        # Half known senders, half unknown ones
+        sender = rng.choice(senders) if i % 2 else f"person{i}@company{i % 50}.nl"
+        lookups.append((f"Sender <{sender}>", rng.choice(subjects)))
+    return senders, lookups
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--senders", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    senders, lookups = make_workload(args.senders, args.lookups)
+    print(f"Benchmark: {len(senders)} blocked senders, {len(lookups)} lookups\n")
+
+    legacy_build_time, spam_list = timed(lambda: legacy_build(senders))
+    new_build_time, classifier = timed(lambda: SenderClassifier(senders))
+
+    legacy_time, legacy_hits = timed(lambda: [legacy_is_spam_sender(f, s, spam_list) for f, s in lookups])
+    new_time, new_hits = timed(lambda: [classifier.is_spam(f, s) for f, s in lookups])
+
+    if legacy_hits != new_hits:
+        raise SystemExit("✗ Results differ between legacy and classifier!")
+
+    print(f"{'':<22}{'legacy':>12}{'classifier':>14}{'speedup':>10}")
+    print(f"{'build list':<22}{legacy_build_time * 1000:>10.1f}ms{new_build_time * 1000:>12.1f}ms{legacy_build_time / max(new_build_time, 1e-9):>9.0f}x")
+    print(f"{'classify':<22}{legacy_time * 1000:>10.1f}ms{new_time * 1000:>12.1f}ms{legacy_time / max(new_time, 1e-9):>9.0f}x")
+    print(f"{'per lookup':<22}{legacy_time / len(lookups) * 1e6:>10.2f}us{new_time / len(lookups) * 1e6:>12.2f}us")
+    print(f"\n✓ Identical results ({sum(new_hits)} flagged as spam)")
+
+if __name__ == "__main__":
+    main()
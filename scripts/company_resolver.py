@@ -0,0 +1,152 @@
+"""Resolve the hand-typed "company" field of an email to job folder companies.
+
+Names are normalized before comparing: diacritics, legal forms (B.V., N.V.),
+underscores and punctuation are dropped, so "Teijin_Aramid B.V." and
+"teijin aramid" are the same company. A resolution then tries, in order:
+
+1. a learned alias      config/company_aliases.json, normalized -> company
+2. an exact match       on the normalized name
+3. a fuzzy match        rapidfuzz WRatio over all folder companies in one
+                        cdist call (difflib when rapidfuzz is not installed)
+
+Anything scoring below MIN_COMPANY_SCORE raises UnknownCompanyError with
+the closest companies, instead of guessing a folder.
+"""
+import re
+import json
+import difflib
+import unicodedata
+from pathlib import Path
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ALIASES_FILE = SCRIPT_DIR.parent / "config" / "company_aliases.json"
+
+MIN_COMPANY_SCORE = 85   # Out of 100
+AMBIGUITY_MARGIN = 5     # Companies this close to the best one are kept as candidates
+SHORTLIST_SIZE = 5
+
+LEGAL_FORM_RE = re.compile(r'\b(?:b\s*\.?\s*v|n\s*\.?\s*v)\b\.?')
+NON_WORD_RE = re.compile(r'[^\w]+|_')
+
+class UnknownCompanyError(LookupError):
+    """No job folder company is close enough to the given name."""
+
+    def __init__(self, company, shortlist):
+        self.company = company
+        self.shortlist = shortlist
+        closest = ", ".join(f"{name} ({score:.0f})" for name, score in shortlist) or "no job folders"
+        super().__init__(f"No job folder matches company '{company}' (closest: {closest})")
+
+def normalize_company(name):
+    """Lowercase, strip diacritics, legal forms, underscores and punctuation."""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = LEGAL_FORM_RE.sub(' ', text.replace('_', ' '))
+    return ' '.join(NON_WORD_RE.sub(' ', text).split())
+
+def fallback_scores(query, choices):
+    """difflib stand-in for WRatio: exact 100, containment 90, else the ratio.
+
+    The ratio is only computed where difflib's cheap upper bounds leave it
+    a chance of mattering; everything else scores 0.
+    """
+    matcher = difflib.SequenceMatcher(None)
+    matcher.set_seq2(query)  # difflib caches its analysis of the second sequence
+    scores = []
+    for choice in choices:
+        if query == choice:
+            scores.append(100.0)
+        elif query in choice or choice in query:
+            scores.append(90.0)
+        else:
+            matcher.set_seq1(choice)
+            if matcher.real_quick_ratio() < 0.5 or matcher.quick_ratio() < 0.5:
+                scores.append(0.0)
+            else:
+                scores.append(matcher.ratio() * 100)
+    return scores
+
+class CompanyResolver:
+    """Normalized folder companies plus a learned alias table."""
+
+    def __init__(self, companies, aliases_file=ALIASES_FILE):
+        self.aliases_file = Path(aliases_file)
+        self.companies = sorted({normalize_company(c) for c in companies if c} - {''})
+        self.company_set = set(self.companies)
+        self.aliases = {}
+        self.learned = 0
+
+        if self.aliases_file.exists():
+            with open(self.aliases_file, 'r', encoding='utf-8') as f:
+                self.aliases = {normalize_company(k): normalize_company(v) for k, v in json.load(f).items()}
+
+    def score_all(self, queries):
+        """Return one row of scores against self.companies per normalized query."""
+        if not self.companies:
+            return [[] for _ in queries]
+        if process is not None:
+            return process.cdist(queries, self.companies, scorer=fuzz.WRatio, workers=-1).tolist()
+        return [fallback_scores(q, self.companies) for q in queries]
+
+    def resolve_many(self, names):
+        """Resolve several names at once; returns {name: [(company, score)] ranked}.
+
+        Names that do not resolve map to an UnknownCompanyError instead.
+        """
+        results = {}
+        fuzzy = []
+        for name in dict.fromkeys(names):
+            key = normalize_company(name)
+            target = self.aliases.get(key, key)
+            if target in self.company_set:
+                results[name] = [(target, 100.0)] + self._containing(target)
+            else:
+                fuzzy.append((name, key))
+
+        rows = self.score_all([key for _, key in fuzzy])
+        for (name, key), row in zip(fuzzy, rows):
+            ranked = sorted(zip(self.companies, row), key=lambda item: -item[1])[:SHORTLIST_SIZE]
+            if not key or not ranked or ranked[0][1] < MIN_COMPANY_SCORE:
+                results[name] = UnknownCompanyError(name, ranked)
+                continue
+            best = ranked[0][1]
+            shortlist = [(c, s) for c, s in ranked if s >= max(MIN_COMPANY_SCORE, best - AMBIGUITY_MARGIN)]
+            known = {c for c, _ in shortlist}
+            results[name] = shortlist + [(c, s) for c, s in self._containing(key) if c not in known]
+        return results
+
+    def _containing(self, name):
+        """Other companies containing name as whole words ("politie" -> "politie assen")."""
+        padded = f" {name} "
+        return [(c, 90.0) for c in self.companies if c != name and padded in f" {c} "]
+
+    def resolve(self, name):
+        """Return the ranked [(company, score)] shortlist for a name, or raise UnknownCompanyError."""
+        result = self.resolve_many([name])[name]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def learn(self, name, company):
+        """Remember that name means company, if it did not resolve exactly already."""
+        key, target = normalize_company(name), normalize_company(company)
+        if not key or key in self.company_set or self.aliases.get(key) == target:
+            return False
+        self.aliases[key] = target
+        self.learned += 1
+        return True
+
+    def save(self):
+        if not self.learned:
+            return
+        self.aliases_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.aliases_file, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(self.aliases.items())), f, indent=2, ensure_ascii=False)
+        self.learned = 0
@@ -0,0 +1,140 @@
+"""Content-addressed blob store for email attachments.
+
+fetch_emails.py never downloads attachments; it records references
+(attachmentId, filename, size) in the email JSON. The bytes are fetched
+on demand and stored once under Email/Blobs/<sha256[:2]>/<sha256>, so the
+same recruiter PDF sent twice costs one file.
+
+Usage: python scripts/email_blobs.py <email_id or path to email .json> [filename ...]
+"""
+import os
+import sys
+import json
+import base64
+import hashlib
+import tempfile
+from pathlib import Path
+from email_store import open_store, read_email_file
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+EMAIL_DIR = SCRIPT_DIR.parent / "Email"
+BLOB_DIR = EMAIL_DIR / "Blobs"
+
+def blob_path(sha256):
+    """Return the path a blob with this hash is stored at."""
+    return BLOB_DIR / sha256[:2] / sha256
+
+def has_blob(sha256):
+    return bool(sha256) and blob_path(sha256).exists()
+
+def put_blob(data):
+    """Store bytes in the blob store and return their SHA-256.
+
+    Safe to call from several threads with the same bytes (a signature logo
+    inlined in every message of a thread): each writer uses its own temp
+    file, and a blob another writer stored first counts as stored.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = blob_path(sha256)
+    if path.exists():
+        return sha256
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=path.parent, prefix=sha256 + '.',
+                                     suffix='.tmp', delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        # Windows refuses to replace a file another writer just put in place
+        os.unlink(f.name)
+        if not path.exists():
+            raise
+    return sha256
+
+def read_blob(sha256):
+    return blob_path(sha256).read_bytes()
+
+def decode_data(data):
+    """Decode Gmail's URL-safe base64 (padding is sometimes missing)."""
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def fetch_attachment(service, email_id, attachment):
+    """Make sure an attachment reference is backed by a blob; returns its path.
+
+    Downloads the bytes through the Gmail API only if they are not stored
+    yet, and fills in the reference's sha256.
+    """
+    if has_blob(attachment.get('sha256')):
+        return blob_path(attachment['sha256'])
+
+    result = service.users().messages().attachments().get(
+        userId='me',
+        messageId=email_id,
+        id=attachment['attachment_id']
+    ).execute()
+
+    attachment['sha256'] = put_blob(decode_data(result['data']))
+    return blob_path(attachment['sha256'])
+
+def load_email(email_ref, store):
+    """Resolve an email id or path; returns (email, its JSON file or None).
+
+    Emails in Email/Processing, or given by path, are plain JSON files.
+    Filed emails are read through the email store, whichever backend it
+    uses, so a migrated mailbox works the same.
+    """
+    path = Path(email_ref)
+    if not path.exists():
+        path = EMAIL_DIR / "Processing" / f"{email_ref}.json"
+    if path.exists():
+        email_data = read_email_file(path)
+        email_data.setdefault('email_id', path.stem)
+        return email_data, path
+    return store.get(email_ref), None
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        return
+
+    store = open_store()
+    email_data, email_file = load_email(sys.argv[1], store)
+    if email_data is None:
+        raise SystemExit(f"Email not found: {sys.argv[1]}")
+
+    wanted = set(sys.argv[2:])
+    attachments = [
+        a for a in email_data.get('attachments', [])
+        if not wanted or a.get('filename') in wanted
+    ]
+    if not attachments:
+        print("No matching attachments.")
+        return
+
+    service = None
+    known = [a.get('sha256') for a in attachments]
+    for attachment in attachments:
+        if not has_blob(attachment.get('sha256')):
+            if service is None:
+                # Only pay for the Google client when something must be downloaded
+                from fetch_emails import load_credentials, make_service_factory
+                service = make_service_factory(load_credentials())()
+        path = fetch_attachment(service, email_data['email_id'], attachment)
+        print(f"  ✓ {attachment.get('filename') or '(unnamed)'} ({attachment.get('size', 0)} bytes)")
+        print(f"    {path}")
+
+    if [a.get('sha256') for a in attachments] == known:
+        return  # Every hash was recorded already
+    if email_file:
+        with open(email_file, 'w', encoding='utf-8') as f:
+            json.dump(email_data, f, indent=2, ensure_ascii=False)
+    else:
+        store.update(email_data)
+        store.save()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
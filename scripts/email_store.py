@@ -0,0 +1,534 @@
+"""Storage backends for filed emails (Email/Ongoing and Email/Archive).
+
+Two interchangeable backends share one reader/writer API:
+
+- FolderStore:  the original layout, one pretty-printed JSON file per email
+                in Email/<location>/<job>/<id>.json.
+- SegmentStore: emails appended to compressed JSONL segments in
+                Email/Segments, each record its own gzip member (or zstd
+                frame when zstandard is installed) so it can be read on its
+                own. A sidecar index.json maps message id -> (segment,
+                offset, length) and keeps per-job postings lists.
+
+Email/Processing always stays plain JSON files, because emails there are
+edited by hand. open_store() picks the segment backend once a segment
+index exists.
+
+Both backends keep a small summary per job in Email/Summaries/<job>.json
+with the id, date and response of every filed email, so update_stats.py
+can find a job's responses without reading any message bodies.
+
+Usage:
+    python scripts/email_store.py migrate     # Move Ongoing/Archive folders into segments
+    python scripts/email_store.py stats       # Show what the active backend holds
+    python scripts/email_store.py summaries   # Rebuild Email/Summaries from the emails
+"""
+import os
+import sys
+import json
+import gzip
+from pathlib import Path
+from journal import replace_or_move
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+EMAIL_DIR = SCRIPT_DIR.parent / "Email"
+SEGMENT_DIR = EMAIL_DIR / "Segments"
+SUMMARY_DIR = EMAIL_DIR / "Summaries"
+INDEX_FILE = SEGMENT_DIR / "index.json"
+
+LOCATIONS = ("Ongoing", "Archive")
+
+# Start a new segment file once the current one reaches this size
+SEGMENT_SIZE_LIMIT = 64 * 1024 * 1024
+
+def read_email_file(email_file):
+    """Load one email JSON file (tolerating a BOM from hand edits)."""
+    with open(email_file, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+class ResponseSummaries:
+    """Per-job {message id: {"date", "response"}} files in Email/Summaries."""
+
+    def __init__(self, summary_dir=SUMMARY_DIR):
+        self.summary_dir = Path(summary_dir)
+        self.loaded = {}
+        self.dirty = set()
+
+    def _path(self, job):
+        return self.summary_dir / f"{job}.json"
+
+    def get(self, job):
+        """Return a job's summary, or None if it has none (or an unreadable one)."""
+        if job not in self.loaded:
+            try:
+                with open(self._path(job), 'r', encoding='utf-8') as f:
+                    self.loaded[job] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.loaded[job] = None
+        return self.loaded[job]
+
+    def written_ns(self, job):
+        """When a job's summary was saved, or None if it is missing or has unsaved changes."""
+        if job in self.dirty:
+            return None
+        try:
+            return os.stat(self._path(job)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def add(self, job, email_id, email_data):
+        summary = self.get(job) or {}
+        summary[email_id] = {"date": email_data.get('date'), "response": email_data.get('response')}
+        self.replace(job, summary)
+
+    def replace(self, job, summary):
+        self.loaded[job] = summary
+        self.dirty.add(job)
+
+    def remove_except(self, jobs):
+        """Delete the summaries of jobs not in jobs; returns how many went."""
+        if not self.summary_dir.exists():
+            return 0
+        stale = [f for f in self.summary_dir.glob("*.json") if f.stem not in jobs]
+        for summary_file in stale:
+            summary_file.unlink()
+            self.loaded.pop(summary_file.stem, None)
+        return len(stale)
+
+    def save(self):
+        if self.dirty:
+            self.summary_dir.mkdir(parents=True, exist_ok=True)
+        for job in self.dirty:
+            path = self._path(job)
+            tmp_file = path.with_name(path.name + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.loaded[job], f, ensure_ascii=False, separators=(',', ':'))
+            tmp_file.replace(path)
+        self.dirty = set()
+
+class FolderStore:
+    """One JSON file per email under Email/<location>/<job>/."""
+
+    def __init__(self, email_dir=EMAIL_DIR):
+        self.email_dir = Path(email_dir)
+        self.summaries = ResponseSummaries(self.email_dir / "Summaries")
+
+    def job_dir(self, location, job):
+        return self.email_dir / location / job
+
+    def has_job(self, location, job):
+        return self.job_dir(location, job).exists()
+
+    def jobs(self, location):
+        base = self.email_dir / location
+        if not base.exists():
+            return []
+        return sorted(f.name for f in base.iterdir() if f.is_dir())
+
+    def email_ids(self, location, job):
+        folder = self.job_dir(location, job)
+        if not folder.exists():
+            return []
+        return [f.stem for f in folder.glob("*.json")]
+
+    def count(self, location, job):
+        return len(self.email_ids(location, job))
+
+    def stamp(self, location, job):
+        """Cheap change marker for a job's emails, or None.
+
+        [folder mtime, file count, newest file mtime]: the last one catches
+        a response edited by hand in a filed email, which changes neither
+        the folder nor the count.
+        """
+        try:
+            folder = str(self.job_dir(location, job))
+            with os.scandir(folder) as entries:
+                mtimes = [entry.stat().st_mtime_ns for entry in entries]
+            return [os.stat(folder).st_mtime_ns, len(mtimes), max(mtimes, default=None)]
+        except FileNotFoundError:
+            return None
+
+    def summary_outdated(self, job):
+        """Whether one of the job's emails was edited after its summary was saved."""
+        written = self.summaries.written_ns(job)
+        if written is None:
+            return False
+        stamps = [self.stamp(location, job) for location in LOCATIONS]
+        return any(stamp and stamp[2] is not None and stamp[2] > written for stamp in stamps)
+
+    def email_file(self, email_id):
+        """The JSON file of a filed email, or None."""
+        for location in LOCATIONS:
+            matches = list((self.email_dir / location).glob(f"*/{email_id}.json"))
+            if matches:
+                return matches[0]
+        return None
+
+    def get(self, email_id):
+        """Read a single email by message id, or None if it is not stored."""
+        email_file = self.email_file(email_id)
+        return read_email_file(email_file) if email_file else None
+
+    def iter_items(self, location, job):
+        """Yield (email id, email) for a job; unreadable files are reported and skipped."""
+        folder = self.job_dir(location, job)
+        if not folder.exists():
+            return
+        for email_file in folder.glob("*.json"):
+            try:
+                yield email_file.stem, read_email_file(email_file)
+            except Exception as e:
+                print(f"  Warning: Failed to read {email_file}: {e}")
+
+    def iter_emails(self, location, job):
+        for _, email_data in self.iter_items(location, job):
+            yield email_data
+
+    def file_email(self, src_file, location, job):
+        """File an email from Email/Processing under a job."""
+        self.summaries.add(job, Path(src_file).stem, read_email_file(src_file))
+        dest_folder = self.job_dir(location, job)
+        dest_folder.mkdir(parents=True, exist_ok=True)
+        replace_or_move(src_file, dest_folder / Path(src_file).name)
+
+    def update(self, email_data):
+        """Rewrite a filed email, e.g. after adding attachment hashes."""
+        email_file = self.email_file(email_data['email_id'])
+        if email_file is None:
+            raise KeyError(f"Email {email_data['email_id']} is not stored")
+        tmp_file = email_file.with_name(email_file.name + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(email_data, f, indent=2, ensure_ascii=False)
+        tmp_file.replace(email_file)
+
+    def move_job(self, job, src_location, dest_location):
+        """Move all emails of a job to another location; returns the number moved."""
+        src_folder = self.job_dir(src_location, job)
+        dest_folder = self.job_dir(dest_location, job)
+
+        if not src_folder.exists():
+            return 0
+
+        dest_folder.mkdir(parents=True, exist_ok=True)
+        moved_count = 0
+
+        for email_file in list(src_folder.glob("*.json")):
+            try:
+                replace_or_move(email_file, dest_folder / email_file.name)
+                moved_count += 1
+            except Exception as e:
+                print(f"    Warning: Failed to move {email_file.name}: {e}")
+
+        try:
+            if src_folder.exists() and not list(src_folder.glob("*")):
+                src_folder.rmdir()
+        except OSError:
+            pass
+
+        return moved_count
+
+    def save(self):
+        self.summaries.save()  # Every email move is already on disk
+
+class SegmentStore:
+    """Compressed, append-only JSONL segments with a sidecar index."""
+
+    def __init__(self, segment_dir=SEGMENT_DIR):
+        self.segment_dir = Path(segment_dir)
+        self.index_file = self.segment_dir / "index.json"
+        self.index = {"version": 1, "segments": [], "emails": {}, "postings": {loc: {} for loc in LOCATIONS}}
+        self.dirty = False
+        self.pending_unlinks = []
+        self.summaries = ResponseSummaries(self.segment_dir.parent / "Summaries")
+
+        if self.index_file.exists():
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+        # Reverse lookup id -> (location, job), derived from the postings
+        self.locations = {}
+        for location, jobs in self.index['postings'].items():
+            for job, ids in jobs.items():
+                for email_id in ids:
+                    self.locations[email_id] = (location, job)
+
+    # Reading
+
+    def has_job(self, location, job):
+        return job in self.index['postings'].get(location, {})
+
+    def jobs(self, location):
+        return sorted(self.index['postings'].get(location, {}))
+
+    def email_ids(self, location, job):
+        return list(self.index['postings'].get(location, {}).get(job, []))
+
+    def count(self, location, job):
+        return len(self.index['postings'].get(location, {}).get(job, []))
+
+    def stamp(self, location, job):
+        """Cheap change marker for a job's emails: [count, last id], or None."""
+        ids = self.index['postings'].get(location, {}).get(job)
+        if ids is None:
+            return None
+        return [len(ids), ids[-1] if ids else None]
+
+    def summary_outdated(self, job):
+        return False  # Records only change through update(), which keeps the summary current
+
+    def get(self, email_id):
+        """Read a single email by message id, or None if it is not stored."""
+        entry = self.index['emails'].get(email_id)
+        if not entry:
+            return None
+        segment, offset, length = entry
+        with open(self.segment_dir / self.index['segments'][segment], 'rb') as f:
+            f.seek(offset)
+            return self._decode(self.index['segments'][segment], f.read(length))
+
+    def iter_items(self, location, job):
+        """Yield (email id, email) for a job, reading each segment file once in offset order."""
+        entries = sorted(
+            (*self.index['emails'][email_id], email_id)
+            for email_id in self.index['postings'].get(location, {}).get(job, [])
+        )
+        handle, handle_segment = None, None
+        try:
+            for segment, offset, length, email_id in entries:
+                if segment != handle_segment:
+                    if handle:
+                        handle.close()
+                    handle = open(self.segment_dir / self.index['segments'][segment], 'rb')
+                    handle_segment = segment
+                handle.seek(offset)
+                try:
+                    yield email_id, self._decode(self.index['segments'][segment], handle.read(length))
+                except Exception as e:
+                    print(f"  Warning: Failed to read record at {offset} in segment {segment}: {e}")
+        finally:
+            if handle:
+                handle.close()
+
+    def iter_emails(self, location, job):
+        for _, email_data in self.iter_items(location, job):
+            yield email_data
+
+    @staticmethod
+    def _decode(segment_name, record):
+        if segment_name.endswith('.zst'):
+            record = zstandard.ZstdDecompressor().decompress(record)
+        else:
+            record = gzip.decompress(record)
+        return json.loads(record)
+
+    # Writing
+
+    def _current_segment(self):
+        """Return (number, path) of the segment to append to."""
+        segments = self.index['segments']
+        suffix = '.jsonl.zst' if zstandard else '.jsonl.gz'
+        if segments:
+            path = self.segment_dir / segments[-1]
+            if segments[-1].endswith(suffix) and (not path.exists() or path.stat().st_size < SEGMENT_SIZE_LIMIT):
+                return len(segments) - 1, path
+        name = f"seg-{len(segments) + 1:06d}{suffix}"
+        segments.append(name)
+        return len(segments) - 1, self.segment_dir / name
+
+    def _set_location(self, email_id, location, job):
+        postings = self.index['postings']
+        old = self.locations.get(email_id)
+        if old == (location, job):
+            return
+        if old:
+            old_ids = postings[old[0]][old[1]]
+            old_ids.remove(email_id)
+        postings.setdefault(location, {}).setdefault(job, []).append(email_id)
+        self.locations[email_id] = (location, job)
+        self.dirty = True
+
+    def _append(self, email_data):
+        """Write an email as a new record and point the index at it."""
+        line = json.dumps(email_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+        segment, path = self._current_segment()
+        record = zstandard.ZstdCompressor(level=10).compress(line) if path.suffix == '.zst' else gzip.compress(line)
+
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(record)
+        self.index['emails'][email_data['email_id']] = [segment, offset, len(record)]
+        self.dirty = True
+
+    def add(self, email_data, location, job):
+        """Append an email to the current segment and post it under a job.
+
+        An email that is already stored is only re-posted, never rewritten.
+        """
+        if email_data['email_id'] not in self.index['emails']:
+            self._append(email_data)
+        self._set_location(email_data['email_id'], location, job)
+
+    def update(self, email_data):
+        """Replace a stored email, e.g. after adding attachment hashes.
+
+        Segments are append-only: the new version is appended and the index
+        points at it; the old record stays behind unreferenced.
+        """
+        if email_data['email_id'] not in self.index['emails']:
+            raise KeyError(f"Email {email_data['email_id']} is not stored")
+        self._append(email_data)
+        location = self.locations.get(email_data['email_id'])
+        if location and self.summaries.get(location[1]) is not None:
+            self.summaries.add(location[1], email_data['email_id'], email_data)
+
+    def file_email(self, src_file, location, job):
+        """File an email from Email/Processing under a job."""
+        email_data = read_email_file(src_file)
+        email_data.setdefault('email_id', Path(src_file).stem)
+        self.add(email_data, location, job)
+        self.summaries.add(job, email_data['email_id'], email_data)
+        # The source is only removed once the index knows about the record
+        self.pending_unlinks.append(Path(src_file))
+
+    def move_job(self, job, src_location, dest_location):
+        """Move all emails of a job to another location; returns the number moved."""
+        if not self.has_job(src_location, job):
+            return 0
+        ids = self.email_ids(src_location, job)
+        self.index['postings'].setdefault(dest_location, {}).setdefault(job, [])
+        for email_id in ids:
+            self._set_location(email_id, dest_location, job)
+        del self.index['postings'][src_location][job]
+        self.dirty = True
+        return len(ids)
+
+    def save(self):
+        """Atomically write the index and summaries, then drop the filed source files."""
+        self.summaries.save()
+        if self.dirty:
+            self.segment_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, separators=(',', ':'))
+            tmp_file.replace(self.index_file)
+            self.dirty = False
+
+        for src_file in self.pending_unlinks:
+            if src_file.exists():
+                src_file.unlink()
+        self.pending_unlinks = []
+
+def open_store(email_dir=EMAIL_DIR):
+    """Return the segment store once migrated, the folder store otherwise."""
+    segment_dir = Path(email_dir) / "Segments"
+    if (segment_dir / "index.json").exists():
+        return SegmentStore(segment_dir)
+    return FolderStore(email_dir)
+
+def summarize(store, job):
+    """Build a job's summary from its emails; unreadable emails get a blank entry."""
+    summary = {}
+    for location in LOCATIONS:
+        for email_id in store.email_ids(location, job):
+            summary[email_id] = {"date": None, "response": None}
+        for email_id, email_data in store.iter_items(location, job):
+            summary[email_id] = {"date": email_data.get('date'), "response": email_data.get('response')}
+    return summary
+
+def job_responses(store, job):
+    """The responses of all emails filed for a job, Ongoing and Archive.
+
+    Read from the job's summary; a summary that is missing, does not list
+    exactly the job's emails or is older than an email edited by hand is
+    rebuilt from the emails first.
+    """
+    ids = {email_id for location in LOCATIONS for email_id in store.email_ids(location, job)}
+    if not ids:
+        return []
+    summary = store.summaries.get(job)
+    if summary is None or summary.keys() != ids or store.summary_outdated(job):
+        summary = summarize(store, job)
+        store.summaries.replace(job, summary)
+    return [entry['response'] for entry in summary.values()]
+
+def rebuild_summaries(store):
+    """Regenerate every job summary from the stored emails."""
+    jobs = {job for location in LOCATIONS for job in store.jobs(location)}
+    for job in sorted(jobs):
+        store.summaries.replace(job, summarize(store, job))
+    removed = store.summaries.remove_except(jobs)
+    store.save()
+    print(f"✓ Rebuilt {len(jobs)} job summaries in {store.summaries.summary_dir}")
+    if removed:
+        print(f"  Removed {removed} summaries of jobs without emails")
+
+def migrate(email_dir=EMAIL_DIR):
+    """Move every filed email from the folder layout into segments."""
+    folders = FolderStore(email_dir)
+    segments = SegmentStore(Path(email_dir) / "Segments")
+    migrated = 0
+
+    for location in LOCATIONS:
+        for job in folders.jobs(location):
+            segments.index['postings'].setdefault(location, {}).setdefault(job, [])
+            segments.dirty = True
+            for email_file in sorted(folders.job_dir(location, job).glob("*.json")):
+                try:
+                    email_data = read_email_file(email_file)
+                except Exception as e:
+                    print(f"  ✗ {email_file}: {e}")
+                    continue
+                email_data.setdefault('email_id', email_file.stem)
+                segments.add(email_data, location, job)
+                migrated += 1
+            print(f"  ✓ {location}/{job}: {segments.count(location, job)} email(s)")
+
+    # Only remove the folders once the index is safely on disk
+    segments.save()
+    for location in LOCATIONS:
+        for job in folders.jobs(location):
+            folder = folders.job_dir(location, job)
+            for email_file in folder.glob("*.json"):
+                if email_file.stem in segments.index['emails']:
+                    email_file.unlink()
+            if not any(folder.iterdir()):
+                folder.rmdir()
+
+    print(f"\n✓ Migrated {migrated} emails into {len(segments.index['segments'])} segment(s)")
+    print(f"  Index: {segments.index_file}")
+
+def print_stats(store):
+    print(f"Backend: {type(store).__name__}")
+    for location in LOCATIONS:
+        jobs = store.jobs(location)
+        total = sum(store.count(location, job) for job in jobs)
+        print(f"  {location}: {len(jobs)} job(s), {total} email(s)")
+    if isinstance(store, SegmentStore):
+        size = sum((store.segment_dir / name).stat().st_size for name in store.index['segments']
+                   if (store.segment_dir / name).exists())
+        print(f"  Segments: {len(store.index['segments'])} file(s), {size / 1024:.0f} KiB")
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "migrate":
+        migrate()
+    elif command == "stats":
+        print_stats(open_store())
+    elif command == "summaries":
+        rebuild_summaries(open_store())
+    else:
+        raise SystemExit(f"Unknown command: {command}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
@@ -0,0 +1,289 @@
+"""Turn archived vacancy pages into webpage.txt.
+
+fetch_job_pages.py archives the raw HTML of every page it downloads
+(page_archive.py) and calls extract_text on it; render_pages.py does the
+same for pages rendered in headless Chromium. The reextract command runs
+the extraction again for every job from its newest archived page, in
+parallel across processes, without fetching anything. Run it after
+changing the extraction logic.
+
+Extractors, fastest first:
+    selectolax  needs `pip install selectolax` (its lexbor parser)
+    lxml        needs `pip install lxml`
+    bs4         BeautifulSoup with html.parser, the original logic
+
+The fast extractors drop navigation, headers, footers, cookie banners and
+similar boilerplate, and keep only the main content (<main>, <article>)
+when the page marks it. When they find less than MIN_TEXT_SIZE characters,
+or less than half the text bs4 would keep (counted with the fast parser),
+the page goes through the bs4 extractor instead. The first installed
+extractor is the default; the text differs between extractors, so run
+reextract after installing one, or the next fetch_job_pages.py --refresh
+reports every page as changed. bench_extract_pages.py compares them.
+
+Usage:
+    python scripts/extract_pages.py reextract [--workers N] [--active-only] [--extractor NAME] [JOB ...]
+"""
+import os
+import time
+import argparse
+import tempfile
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from bs4 import BeautifulSoup
+from jobs import load_jobs
+from page_archive import latest_page, read_page
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+MIN_TEXT_SIZE = 100  # Less than this from a fast extractor falls back to bs4
+MIN_TEXT_KEPT = 0.5  # Less than this share of the page's plain text also falls back
+
+# Dropped with everything inside them. Not <form>: ASP.NET pages wrap the whole body in one
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe",
+                    "nav", "aside", "button"]
+# Page chrome, but inside <main> or <article> often the title or the apply details
+CHROME_TAGS = ["header", "footer"]
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "dialog", "search"}
+# Matched against each class and the id as a whole token, so modal-body or
+# vacancy-share-content stay; BOILERPLATE_PREFIXES also match the start of one
+BOILERPLATE_NAMES = {"menu", "footer", "share", "popup", "modal"}
+BOILERPLATE_PREFIXES = ("cookie", "consent", "gdpr", "navbar", "breadcrumb", "newsletter",
+                        "social", "skip-link")
+MAIN_SELECTORS = ["main", "[role=main]", "article"]
+# Get a line break after them, so a heading does not run into the next paragraph
+BLOCK_TAGS = ["p", "div", "li", "h1", "h2", "h3", "h4", "h5", "h6", "br", "tr", "dt", "dd",
+              "section", "ul", "ol", "table", "blockquote", "pre"]
+
+def html_to_text(content):
+    """Visible text of an HTML page, one phrase per line."""
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    text = soup.get_text()
+
+    # Break into lines and remove leading/trailing space on each
+    lines = (line.strip() for line in text.splitlines())
+    # Break multi-headlines into a line each
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    # Drop blank lines
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def normalize_text(text):
+    """Strip every line, split multi-headlines and drop blank lines, as html_to_text does."""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def is_boilerplate(attributes):
+    if (attributes.get("role") or "").lower() in BOILERPLATE_ROLES:
+        return True
+    names = f"{attributes.get('class') or ''} {attributes.get('id') or ''}".lower().split()
+    return any(name in BOILERPLATE_NAMES or name.startswith(BOILERPLATE_PREFIXES) for name in names)
+
+def pick_main(candidates, text_of, body):
+    """The longest main-content candidate with enough text, else the body."""
+    best, best_size = body, 0
+    for node in candidates:
+        size = len(text_of(node).strip())
+        if size >= MIN_TEXT_SIZE and size > best_size:
+            best, best_size = node, size
+    return best
+
+def inside_main(node):
+    parent = node.parent
+    while parent is not None:
+        if parent.tag in ("main", "article") or (parent.attributes.get("role") or "").lower() == "main":
+            return True
+        parent = parent.parent
+    return False
+
+def selectolax_to_text(content):
+    tree = LexborHTMLParser(content)
+    tree.strip_tags(BOILERPLATE_TAGS)
+    # Reversed document order removes descendants before their ancestors,
+    # so no node is touched after its subtree was freed
+    for node in reversed(tree.css(", ".join(CHROME_TAGS))):
+        if not inside_main(node):
+            node.decompose()
+    for node in reversed(tree.css("[class], [id], [role]")):
+        if node.tag not in ("html", "body") and is_boilerplate(node.attributes):
+            node.decompose()
+    for node in tree.css(", ".join(BLOCK_TAGS)):
+        node.insert_after("\n")
+    body = tree.body or tree.root
+    if body is None:
+        return ""
+    text_of = lambda node: node.text(deep=True, separator='', strip=False)
+    return normalize_text(text_of(pick_main(tree.css(", ".join(MAIN_SELECTORS)), text_of, body)))
+
+def lxml_to_text(content):
+    root = lxml.html.fromstring(content)
+    for node in root.xpath("|".join(f"//{tag}" for tag in BOILERPLATE_TAGS)):
+        node.drop_tree()
+    outside_main = "[not(ancestor::main or ancestor::article or ancestor::*[@role='main'])]"
+    for node in root.xpath("|".join(f"//{tag}{outside_main}" for tag in CHROME_TAGS)):
+        node.drop_tree()
+    for node in root.xpath("//*[@class or @id or @role]"):
+        if node.getparent() is not None and node.tag != "body" and is_boilerplate(node.attrib):
+            node.drop_tree()
+    for node in root.xpath("|".join(f"//{tag}" for tag in BLOCK_TAGS)):
+        node.tail = "\n" + (node.tail or "")
+    body = root.find("body")
+    candidates = root.xpath("//main | //*[@role='main'] | //article")
+    text_of = lambda node: node.text_content()
+    return normalize_text(text_of(pick_main(candidates, text_of, root if body is None else body)))
+
+def selectolax_plain_size(content):
+    tree = LexborHTMLParser(content)
+    tree.strip_tags(["script", "style"])
+    return len(normalize_text(tree.root.text(deep=True, separator='', strip=False))) if tree.root else 0
+
+def lxml_plain_size(content):
+    root = lxml.html.fromstring(content)
+    for node in root.xpath("//script | //style"):
+        node.drop_tree()
+    return len(normalize_text(root.text_content()))
+
+# Length of what html_to_text would return, at the fast parser's speed
+PLAIN_SIZES = {
+    "selectolax": selectolax_plain_size,
+    "lxml": lxml_plain_size,
+}
+
+EXTRACTORS = {
+    "selectolax": selectolax_to_text,
+    "lxml": lxml_to_text,
+    "bs4": html_to_text,
+}
+
+def available_extractors():
+    installed = {"selectolax": LexborHTMLParser is not None, "lxml": lxml is not None, "bs4": True}
+    return [name for name in EXTRACTORS if installed[name]]
+
+DEFAULT_EXTRACTOR = available_extractors()[0]
+
+def fast_text(content, extractor):
+    """Text from a fast extractor, or None if the page should go through bs4.
+
+    That is when it fails, finds almost nothing, or drops more than half of
+    the plain text, e.g. when the vacancy sits next to a short <main>.
+    """
+    try:
+        text = EXTRACTORS[extractor](content)
+        if len(text) < MIN_TEXT_SIZE or len(text) < MIN_TEXT_KEPT * PLAIN_SIZES[extractor](content):
+            return None
+        return text
+    except Exception:
+        return None  # Malformed beyond what the fast parser handles
+
+def extract_text(content, extractor=None):
+    """The text saved in webpage.txt for a raw page.
+
+    A fast extractor that fails, finds almost nothing or loses most of the
+    page hands it to the bs4 extractor.
+    """
+    extractor = extractor or DEFAULT_EXTRACTOR
+    if extractor not in available_extractors():
+        raise ValueError(f"Extractor {extractor} is not installed; available: {', '.join(available_extractors())}")
+    if extractor != "bs4":
+        text = fast_text(content, extractor)
+        if text is not None:
+            return text
+    return html_to_text(content)
+
+def write_webpage_txt(job_path, url, text):
+    """Write webpage.txt with its Source header; returns False if it was already identical."""
+    webpage_txt = job_path / "webpage.txt"
+    content = f"Source: {url}\n\n{text}"
+    if webpage_txt.exists() and webpage_txt.read_text(encoding='utf-8') == content:
+        return False
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=job_path, prefix='webpage.txt.',
+                                     suffix='.tmp', delete=False) as f:
+        f.write(content)
+    os.replace(f.name, webpage_txt)
+    return True
+
+def extract_job(job_path, extractor=None):
+    """Regenerate one job's webpage.txt from its archive; runs in a worker process.
+
+    Returns (job_path, outcome, error) with outcome updated, unchanged, no
+    archive or error.
+    """
+    job_path = Path(job_path)
+    entry = latest_page(job_path)
+    if entry is None:
+        return str(job_path), "no archive", None
+    try:
+        text = extract_text(read_page(job_path, entry["sha256"]), extractor)
+        rendered = latest_page(job_path, rendered=True)
+        if len(text) < MIN_TEXT_SIZE and rendered and rendered["sha256"] != entry["sha256"]:
+            # The plain response was an empty JavaScript shell; use the rendered page
+            entry = rendered
+            text = extract_text(read_page(job_path, entry["sha256"]), extractor)
+        changed = write_webpage_txt(job_path, entry["url"], text)
+    except Exception as e:
+        return str(job_path), "error", str(e)
+    return str(job_path), "updated" if changed else "unchanged", None
+
+def reextract(workers=None, include_archived=True, names=None, extractor=None):
+    """Re-run extract_job for every job folder; returns {outcome: count}."""
+    jobs = load_jobs(include_archived=include_archived)
+    if names:
+        jobs = [job for job in jobs if job.name in names]
+    paths = [str(job.path) for job in jobs]
+    workers = workers or os.cpu_count() or 4
+    extractor = extractor or DEFAULT_EXTRACTOR
+    print(f"Re-extracting {len(paths)} job folders with {extractor} ({workers} worker processes)...\n")
+
+    counts = {"updated": 0, "unchanged": 0, "no archive": 0, "error": 0}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(paths) // (workers * 4))
+        for job_path, outcome, error in pool.map(partial(extract_job, extractor=extractor), paths, chunksize=chunksize):
+            counts[outcome] += 1
+            if outcome == "updated":
+                print(f"  ✓ {Path(job_path).name}")
+            elif outcome == "error":
+                print(f"  ✗ {Path(job_path).name}: {error}")
+
+    print(f"\nFinished in {time.perf_counter() - start:.1f}s. Updated: {counts['updated']}, "
+          f"Unchanged: {counts['unchanged']}, No archived page: {counts['no archive']}, Errors: {counts['error']}")
+    return counts
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Regenerate webpage.txt files from the archived raw pages")
+    parser.add_argument("command", choices=["reextract"])
+    parser.add_argument("jobs", nargs="*", help="Job folder names (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--active-only", action="store_true", help="Leave the jobs in 1.Archief alone")
+    parser.add_argument("--extractor", choices=available_extractors(), default=DEFAULT_EXTRACTOR,
+                        help=f"HTML-to-text extractor (default: {DEFAULT_EXTRACTOR})")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.command == "reextract":
+        counts = reextract(args.workers, include_archived=not args.active_only, names=set(args.jobs),
+                           extractor=args.extractor)
+        if counts["error"]:
+            exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
@@ -17,8 +17,35 @@ def load_existing_letters(output_path):
                 return {}
     return {}
 
-def extract_previous_letters():
-    """Extract cover letters from all job folders in active and archived paths."""
+def read_letter(job_folder, letters):
+    """Add or update the Motivatie.txt letter of one job folder."""
+    motivatie_file = job_folder / "Motivatie.txt"
+    
+    if not motivatie_file.exists():
+        return
+
+    # Read the letter content
+    try:
+        with open(motivatie_file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        
+        if not content:
+            return
+            
+        # Add or update letter
+        if job_folder.name not in letters:
+            print(f"  ✓ Added: {job_folder.name}")
+        
+        letters[job_folder.name] = content
+    except Exception as e:
+        print(f"  ⚠ Error reading {job_folder.name}: {e}")
+
+def extract_previous_letters(jobs=None):
+    """Extract cover letters from all job folders in active and archived paths.
+    
+    Pass the job catalog (jobs.load_jobs()) to use its folders instead of
+    scanning Solicitaties again.
+    """
     project_root = Path(__file__).parent.parent
     active_path = project_root / "Solicitaties"
     archive_path = active_path / "1.Archief"
@@ -30,6 +57,12 @@ def extract_previous_letters():
     
     print(f"Loaded {initial_count} existing letters from {output_path.name}")
     
+    if jobs is not None:
+        print(f"Scanning {len(jobs)} job folders from the job catalog")
+        for job in jobs:
+            read_letter(job.path, letters)
+        return letters, output_path
+    
     # Paths to scan (active and archive)
     scan_paths = [active_path, archive_path]
     
@@ -44,28 +77,7 @@ def extract_previous_letters():
             # Skip non-directories and the 1.Archief folder itself when scanning Solicitaties
             if not job_folder.is_dir() or job_folder.name == "1.Archief":
                 continue
-                
-            # Check for Motivatie.txt
-            motivatie_file = job_folder / "Motivatie.txt"
-            
-            if not motivatie_file.exists():
-                continue
-
-            # Read the letter content
-            try:
-                with open(motivatie_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                
-                if not content:
-                    continue
-                    
-                # Add or update letter
-                if job_folder.name not in letters:
-                    print(f"  ✓ Added: {job_folder.name}")
-                
-                letters[job_folder.name] = content
-            except Exception as e:
-                print(f"  ⚠ Error reading {job_folder.name}: {e}")
+            read_letter(job_folder, letters)
 
     return letters, output_path
 
@@ -1,11 +1,25 @@
 """Fetch emails from Gmail API and save to /Email/Processing."""
 import os
+import re
 import json
-import base64
+import queue
+import random
+import time
+import argparse
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime
+from html import unescape
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
+from message_ledger import MessageLedger, STATUS_PROCESSING, STATUS_SPAM
+from routing_cache import RoutingCache
+from sender_classifier import JOB_KEYWORDS, load_classifier, is_wildcard, is_domain
+from email_blobs import put_blob, decode_data
 
 SCRIPT_DIR = Path(__file__).parent
 BASE_DIR = SCRIPT_DIR.parent
@@ -15,15 +29,55 @@ EMAIL_DIR = BASE_DIR / "Email"
 PROCESSING_DIR = EMAIL_DIR / "Processing"
 LOG_FILE = DATA_DIR / "fetch_log.txt"
 CONFIG_FILE = CONFIG_DIR / "fetch_emails_config.json"
+STATE_FILE = DATA_DIR / "fetch_state.json"
 CREDENTIALS_PATH = BASE_DIR / "credentials.json"
 TOKEN_PATH = Path.home() / ".gmail-mcp" / "token.json"
 UNRELATED_SENDERS_FILE = PROCESSING_DIR / "unrelated_email_senders.json"
 
-# Job-related keywords for safety check
-JOB_KEYWORDS = [
-    'sollicitatie', 'vacature', 'application', 'vacancy',
-    'interview', 'recruitment', 'career', 'job',
-    'werving', 'selectie', 'hiring', 'baan',
+# Gmail rejects batch requests with more than 100 calls
+GMAIL_BATCH_LIMIT = 100
+
+# Gmail per-user quota is 250 units/second; cost per call in quota units
+GMAIL_QUOTA_PER_SECOND = 250
+QUOTA_UNITS = {'list': 5, 'get': 5, 'history': 2, 'profile': 1}
+
+# Rate-limit and server errors worth retrying, with exponential backoff
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 6
+
+# Request parameters per fetch phase; metadata only carries the headers
+# needed by the spam filter, restricted further with a fields mask
+GET_PARAMS = {
+    'full': {'format': 'full'},
+    'metadata': {
+        'format': 'metadata',
+        'metadataHeaders': ['From', 'Subject', 'Date'],
+        'fields': 'id,threadId,sizeEstimate,payload/headers',
+    },
+}
+
+# HTML-to-text patterns for HTML-only emails
+HTML_DROP_RE = re.compile(r'<(script|style|head)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+HTML_BREAK_RE = re.compile(r'<(br|/p|/div|/tr|/li|/h[1-6])\b[^>]*>', re.IGNORECASE)
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Messages in these labels never show up in a normal Gmail search either
+HISTORY_SKIP_LABELS = {'SPAM', 'TRASH'}
+
+# Gmail has no documented query limit, but long queries get rejected;
+# stay well below what the web UI accepts
+MAX_QUERY_LENGTH = 1500
+
+# Subject words that let a listed sender's mail through the server-side
+# exclusion. Gmail matches whole words, while the client-side safety check
+# matches JOB_KEYWORDS anywhere in the subject, so the compound and plural
+# forms that show up in job mail are listed too
+SERVER_JOB_TERMS = JOB_KEYWORDS + [
+    'sollicitaties', 'sollicitatiegesprek', 'sollicitatiegesprekken', 'sollicitatiebrief',
+    'sollicitatieprocedure', 'sollicitatiebevestiging', 'vacatures', 'vacaturealert',
+    'vacaturemelding', 'vacaturetip', 'vacaturetips', 'applications', 'interviews',
+    'careers', 'jobs', 'jobalert', 'jobalerts', 'jobmail', 'jobtip', 'jobtips',
+    'wervingsprocedure', 'selectieprocedure', 'selectiegesprek', 'bijbaan', 'droombaan',
 ]
 
 def load_config():
@@ -46,16 +100,75 @@ def save_config(config):
     with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
         json.dump(config, f, indent=2)
 
-def get_query():
+def load_state():
+    """Load the checkpoint of an unfinished run, if any."""
+    if not STATE_FILE.exists():
+        return None
+    with open(STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(state):
+    """Atomically write the checkpoint file."""
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = STATE_FILE.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    tmp_file.replace(STATE_FILE)
+
+def clear_state():
+    if STATE_FILE.exists():
+        STATE_FILE.unlink()
+
+def get_query(query=None):
     """Get query from command line or use date from config."""
-    import sys
-    if len(sys.argv) > 1:
-        return sys.argv[1]
+    if query:
+        return query
     
     config = load_config()
     cutoff_date = config.get('cutoff_date', '2025/11/19')
     return f"after:{cutoff_date}"
 
+def spam_exclusion_terms(spam_list):
+    """Turn spam list entries into Gmail -from: terms.
+    
+    Full addresses and bare domains are supported; entries Gmail search cannot
+    express (wildcards, spaces, quotes) are left to the client-side filter.
+    """
+    terms = []
+    for entry in sorted({entry.strip().lower() for entry in spam_list}):
+        if not entry or is_wildcard(entry) or any(ch in entry for ch in '" ()'):
+            continue
+        if is_domain(entry) and not entry.startswith('@'):
+            entry = f"@{entry}"
+        terms.append(f"-from:{entry}")
+    return terms
+
+def build_list_query(query, spam_list):
+    """Add known spam senders to a Gmail list query as -from: exclusions.
+    
+    Subject job words are OR'ed in so job mail from a listed sender still
+    comes through. Only as many senders as fit in MAX_QUERY_LENGTH are
+    excluded; the client-side filter checks every listed sender anyway, so
+    the rest is filtered there and listing never waits for extra queries.
+    Returns the query and the number of senders it excludes.
+    """
+    terms = spam_exclusion_terms(spam_list)
+    if not terms:
+        return query, 0
+    
+    keywords = " OR ".join(SERVER_JOB_TERMS)
+    template = f"{query} (({{}}) OR subject:({keywords}))"
+    budget = MAX_QUERY_LENGTH - len(template.format(""))
+    
+    chunk, chunk_length = [], 0
+    for term in terms:
+        if chunk and chunk_length + len(term) + 1 > budget:
+            break
+        chunk.append(term)
+        chunk_length += len(term) + 1
+    
+    return template.format(" ".join(chunk)), len(chunk)
+
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.auth.exceptions import RefreshError
@@ -114,25 +227,76 @@ def load_credentials():
         
     return creds
 
+def walk_parts(part):
+    """Yield a MIME part and all of its nested parts, depth first."""
+    yield part
+    for subpart in part.get('parts', []):
+        yield from walk_parts(subpart)
+
+def is_attachment(part):
+    """Attachments have a filename or are stored separately by Gmail."""
+    return bool(part.get('filename')) or 'attachmentId' in part.get('body', {})
+
+def html_to_text(html):
+    """Cheap HTML to plain text conversion for HTML-only emails."""
+    text = HTML_DROP_RE.sub(' ', html)
+    text = HTML_BREAK_RE.sub('\n', text)
+    text = unescape(HTML_TAG_RE.sub('', text))
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
 def decode_body(payload):
-    """Extract and decode email body from payload."""
-    body = ""
-    
-    if 'parts' in payload:
-        for part in payload['parts']:
-            if part['mimeType'] == 'text/plain':
-                if 'data' in part['body']:
-                    body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
-                    break
-            elif part['mimeType'] == 'multipart/alternative' and 'parts' in part:
-                for subpart in part['parts']:
-                    if subpart['mimeType'] == 'text/plain' and 'data' in subpart['body']:
-                        body = base64.urlsafe_b64decode(subpart['body']['data']).decode('utf-8', errors='ignore')
-                        break
-    elif 'body' in payload and 'data' in payload['body']:
-        body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8', errors='ignore')
-    
-    return body
+    """Extract and decode email body from payload.
+    
+    Walks arbitrarily nested multiparts and prefers the first text/plain
+    part, falling back to the first text/html part converted to text. Only
+    the chosen part is base64-decoded; attachments are never decoded.
+    """
+    plain_part, html_part = None, None
+    
+    for part in walk_parts(payload):
+        if is_attachment(part) or 'data' not in part.get('body', {}):
+            continue
+        mime_type = part.get('mimeType', '')
+        if mime_type == 'text/plain' and plain_part is None:
+            plain_part = part
+        elif mime_type == 'text/html' and html_part is None:
+            html_part = part
+        elif part is payload and not mime_type.startswith('multipart/'):
+            plain_part = part  # Single-part message of some other text type
+    
+    if plain_part is not None:
+        return decode_data(plain_part['body']['data']).decode('utf-8', errors='ignore')
+    if html_part is not None:
+        return html_to_text(decode_data(html_part['body']['data']).decode('utf-8', errors='ignore'))
+    return ""
+
+def extract_attachments(payload):
+    """Record attachments as lazily fetched references.
+    
+    Large attachments only get a reference (attachmentId, size); the bytes
+    are downloaded on demand by email_blobs.py. Gmail inlines the data of
+    very small attachments, which goes straight into the blob store instead
+    of the email JSON.
+    """
+    attachments = []
+    
+    for part in walk_parts(payload):
+        if not is_attachment(part):
+            continue
+        body = part.get('body', {})
+        attachment = {
+            "filename": part.get('filename', ''),
+            "mime_type": part.get('mimeType', ''),
+            "size": body.get('size', 0),
+            "attachment_id": body.get('attachmentId'),
+            "sha256": None
+        }
+        if 'data' in body:
+            attachment['sha256'] = put_blob(decode_data(body['data']))
+        attachments.append(attachment)
+    
+    return attachments
 
 def get_header(headers, name):
     """Extract header value by name."""
@@ -141,164 +305,580 @@ def get_header(headers, name):
             return header['value']
     return None
 
-def load_spam_list():
-    """Load list of unrelated email senders."""
-    if not UNRELATED_SENDERS_FILE.exists():
-        return []
-    with open(UNRELATED_SENDERS_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def extract_email(from_field):
-    """Extract email address from 'From' field."""
-    if not from_field:
-        return None
+class RateLimiter:
+    """Token bucket measured in Gmail quota units, with AIMD rate control.
     
-    import re
-    # Look for email in angle brackets
-    match = re.search(r'<([^>]+)>', from_field)
-    if match:
-        return match.group(1).strip().lower()
-    
-    # Otherwise assume entire field is email
-    return from_field.strip().lower()
-
-def is_spam_sender(email_from, subject, spam_list):
-    """Check if email is from known spam sender."""
-    sender_email = extract_email(email_from)
-    if not sender_email:
-        return False
-    
-    # Check against spam list
-    if sender_email in spam_list:
-        # Safety check: never filter job-related emails
-        subject_lower = (subject or '').lower()
-        for keyword in JOB_KEYWORDS:
-            if keyword in subject_lower:
-                return False  # Don't filter job-related keywords
-        return True
-    
-    return False
-
-def fetch_emails():
-    """Fetch emails from Gmail and save to Processing folder."""
-    runtime_date = datetime.now()
-    runtime_date_str = runtime_date.strftime("%Y/%m/%d")
+    The refill rate starts at the per-user quota, is halved on every
+    throttled response and creeps back up by a fixed step per success.
+    """
     
-    print("Loading credentials...")
-    creds_or_service = load_credentials()
+    def __init__(self, rate=GMAIL_QUOTA_PER_SECOND, min_rate=10, increase=5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.throttled = 0
+        self.lock = threading.Lock()
     
-    print("Connecting to Gmail API...")
+    def acquire(self, units):
+        """Block until `units` quota units are available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # Calls larger than the bucket (big batches) may go into debt
+                needed = min(units, self.rate)
+                if self.tokens >= needed:
+                    self.tokens -= units
+                    return
+                wait_time = (needed - self.tokens) / self.rate
+            time.sleep(wait_time)
+    
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+    
+    def on_throttle(self):
+        with self.lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+def get_http_status(error):
+    """Return the HTTP status code of an API error, if any."""
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    return int(status) if status is not None else None
+
+def execute(request, limiter=None, units=5):
+    """Execute an API request, backing off on rate-limit and server errors."""
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter:
+            limiter.acquire(units)
+        try:
+            result = request.execute()
+        except HttpError as e:
+            if get_http_status(e) not in RETRYABLE_STATUSES or attempt == MAX_RETRIES:
+                raise
+            if limiter:
+                limiter.on_throttle()
+            time.sleep(min(32, 2 ** attempt) + random.random())
+            continue
+        if limiter:
+            limiter.on_success()
+        return result
+
+def make_service_factory(creds_or_service):
+    """Return a function giving each thread its own Gmail service.
+    
+    The generated API client is not thread-safe, so worker threads must not
+    share one. A ready-made service object (e.g. a fake) is shared as is.
+    """
     if hasattr(creds_or_service, 'users'):
-        service = creds_or_service
-    else:
-        service = build('gmail', 'v1', credentials=creds_or_service)
+        return lambda: creds_or_service
     
-    query = get_query()
-    print(f"Fetching emails (query: '{query}')...")
+    local = threading.local()
     
-    all_messages = []
-    page_token = None
-    page_count = 0
+    def get_service():
+        if not hasattr(local, 'service'):
+            local.service = build('gmail', 'v1', credentials=creds_or_service)
+        return local.service
+    
+    return get_service
+
+def get_message(service, email_id, limiter=None, fmt='full'):
+    """Fetch a single message, or None if it was deleted in the meantime."""
+    try:
+        return execute(service.users().messages().get(
+            userId='me',
+            id=email_id,
+            **GET_PARAMS[fmt]
+        ), limiter, QUOTA_UNITS['get'])
+    except HttpError as e:
+        if get_http_status(e) == 404:
+            print(f"  ⚠ {email_id}: Message no longer exists, skipping")
+            return None
+        raise
+
+def iter_message_pages(get_service, query, limiter=None, page_token=None):
+    """Yield (messages, next_page_token) per Gmail list page.
+    
+    Listing starts at `page_token` when resuming an interrupted run.
+    """
+    service = get_service()
     
     while True:
-        page_count += 1
-        print(f"  Fetching page {page_count}...")
-        
-        results = service.users().messages().list(
+        results = execute(service.users().messages().list(
             userId='me',
             q=query,
             maxResults=100,
             pageToken=page_token
-        ).execute()
-        
-        messages = results.get('messages', [])
-        all_messages.extend(messages)
+        ), limiter, QUOTA_UNITS['list'])
         
         page_token = results.get('nextPageToken')
+        yield results.get('messages', []), page_token
+        
         if not page_token:
-            break
+            return
+
+def prefetch(iterable, depth=1):
+    """Iterate in a background thread, keeping up to `depth` items ready.
     
-    print(f"Found {len(all_messages)} total emails across {page_count} page(s).")
+    Used to list the next page while the current page's messages are being
+    downloaded. Errors in the background thread are re-raised here.
+    """
+    items = queue.Queue(maxsize=depth)
+    finished = object()
     
-    if not all_messages:
-        print("No emails to process.")
-        config = load_config()
-        config['cutoff_date'] = runtime_date_str
-        config['last_run'] = runtime_date.isoformat()
-        save_config(config)
-        print(f"\n✓ Updated cutoff date to: {runtime_date_str}")
-        return
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((None, e))
+            return
+        items.put((finished, None))
     
-    # Load spam filter
-    spam_list = load_spam_list()
-    if spam_list:
-        print(f"  Loaded spam filter with {len(spam_list)} blocked senders\n")
+    threading.Thread(target=produce, daemon=True).start()
     
-    PROCESSING_DIR.mkdir(parents=True, exist_ok=True)
+    while True:
+        item, error = items.get()
+        if error is not None:
+            raise error
+        if item is finished:
+            return
+        yield item
+
+def list_history_messages(service, start_history_id, limiter=None):
+    """List messages added since a mailbox historyId.
     
-    processed, skipped, filtered_spam = 0, 0, 0
+    Returns None when Gmail no longer has history that far back (HTTP 404),
+    in which case the caller has to fall back to a full sync.
+    """
+    all_messages = []
+    seen = set()
+    page_token = None
     
-    for msg in all_messages:
-        email_id = msg['id']
-        output_file = PROCESSING_DIR / f"{email_id}.json"
+    while True:
+        try:
+            results = execute(service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded'],
+                maxResults=500,
+                pageToken=page_token
+            ), limiter, QUOTA_UNITS['history'])
+        except HttpError as e:
+            if get_http_status(e) == 404:
+                return None
+            raise
         
-        if output_file.exists():
-            skipped += 1
-            continue
+        for record in results.get('history', []):
+            for added in record.get('messagesAdded', []):
+                message = added.get('message', {})
+                if message.get('id') in seen:
+                    continue
+                if HISTORY_SKIP_LABELS & set(message.get('labelIds', [])):
+                    continue
+                seen.add(message['id'])
+                all_messages.append(message)
         
-        email = service.users().messages().get(
-            userId='me',
-            id=email_id,
-            format='full'
-        ).execute()
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    
+    print(f"Found {len(all_messages)} new emails since historyId {start_history_id}.")
+    return all_messages
+
+def fetch_chunk(service, chunk, use_batch, limiter=None, fmt='full'):
+    """Fetch one chunk of messages, as a batch request if asked.
+    
+    Returns (id, data, size) tuples, where data is the decoded email for
+    full messages and the raw resource for metadata, and size is the
+    approximate response size in bytes.
+    """
+    results = {}
+    
+    if use_batch:
+        failed = []
         
-        headers = email['payload']['headers']
+        def callback(request_id, response, exception):
+            if exception is not None:
+                failed.append((request_id, exception))
+            else:
+                results[request_id] = response
         
-        # Check spam filter
-        email_from = get_header(headers, 'From')
-        email_subject = get_header(headers, 'Subject')
+        batch = service.new_batch_http_request(callback=callback)
+        for email_id in chunk:
+            batch.add(
+                service.users().messages().get(userId='me', id=email_id, **GET_PARAMS[fmt]),
+                request_id=email_id
+            )
+        execute(batch, limiter, QUOTA_UNITS['get'] * len(chunk))
         
-        if spam_list and is_spam_sender(email_from, email_subject, spam_list):
-            filtered_spam += 1
-            if filtered_spam <= 3:  # Show first 3 filtered emails
-                print(f"  ✓ Filtered spam: {email_subject[:50]}")
+        if limiter and any(get_http_status(e) in RETRYABLE_STATUSES for _, e in failed):
+            limiter.on_throttle()
+        
+        # Retry failed calls one by one so real errors still surface
+        for email_id, _ in failed:
+            results[email_id] = get_message(service, email_id, limiter, fmt)
+    else:
+        for email_id in chunk:
+            results[email_id] = get_message(service, email_id, limiter, fmt)
+    
+    fetched = []
+    for email_id in chunk:
+        message = results[email_id]
+        if message is None:
             continue
+        size = len(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+        data = build_email_data(email_id, message) if fmt == 'full' else message
+        fetched.append((email_id, data, size))
+    return fetched
+
+def get_messages(get_service, message_ids, batch_size=0, concurrency=1, limiter=None, fmt='full'):
+    """Yield (id, data, size) tuples for the given message ids.
+    
+    Messages are grouped into Gmail batch requests when batch_size is set and
+    spread over `concurrency` worker threads. Results are yielded as soon as a
+    chunk completes, so the order is not preserved when concurrency > 1.
+    """
+    use_batch = bool(batch_size) and hasattr(get_service(), 'new_batch_http_request')
+    chunk_size = max(1, min(batch_size, GMAIL_BATCH_LIMIT)) if use_batch else 1
+    chunks = [message_ids[i:i + chunk_size] for i in range(0, len(message_ids), chunk_size)]
+    
+    if concurrency <= 1:
+        for chunk in chunks:
+            yield from fetch_chunk(get_service(), chunk, use_batch, limiter, fmt)
+        return
+    
+    def work(chunk):
+        return fetch_chunk(get_service(), chunk, use_batch, limiter, fmt)
+    
+    # Keep a bounded number of chunks in flight
+    pending = deque(chunks)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        running = set()
+        while pending or running:
+            while pending and len(running) < concurrency * 2:
+                running.add(pool.submit(work, pending.popleft()))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+def build_email_data(email_id, email):
+    """Convert a Gmail message resource into the Processing JSON format."""
+    headers = email['payload']['headers']
+    return {
+        "email_id": email_id,
+        "thread_id": email.get('threadId', ''),
+        "date": get_header(headers, 'Date'),
+        "from": get_header(headers, 'From'),
+        "to": get_header(headers, 'To'),
+        "subject": get_header(headers, 'Subject'),
+        "snippet": email.get('snippet', ''),
+        "body": decode_body(email['payload']),
+        "attachments": extract_attachments(email['payload']),
+        "response": None,
+        "company": None,
+        "assigned": False
+    }
+
+class MessageProcessor:
+    """Filter, download and save listed messages, one page at a time."""
+    
+    def __init__(self, get_service, limiter, classifier, ledger,
+                 batch_size=0, concurrency=1, two_phase=False, routing=None):
+        self.get_service = get_service
+        self.limiter = limiter
+        self.classifier = classifier
+        self.ledger = ledger
+        self.routing = routing
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.two_phase = two_phase and len(classifier) > 0
         
-        email_data = {
-            "email_id": email_id,
-            "thread_id": email.get('threadId', ''),
-            "date": get_header(headers, 'Date'),
-            "from": get_header(headers, 'From'),
-            "to": get_header(headers, 'To'),
-            "subject": get_header(headers, 'Subject'),
-            "snippet": email.get('snippet', ''),
-            "body": decode_body(email['payload']),
-            "response": None,
-            "company": None,
-            "assigned": False
-        }
+        self.listed, self.processed, self.skipped, self.filtered_spam, self.fetched = 0, 0, 0, 0, 0
+        self.routed = 0
+        self.metadata_bytes, self.full_bytes, self.avoided_bytes = 0, 0, 0
+        self.last_message_id = None
+    
+    COUNTERS = ('listed', 'processed', 'skipped', 'filtered_spam', 'fetched', 'routed',
+                'metadata_bytes', 'full_bytes', 'avoided_bytes')
+    
+    def counters(self):
+        return {name: getattr(self, name) for name in self.COUNTERS}
+    
+    def restore(self, counters):
+        for name in self.COUNTERS:
+            setattr(self, name, counters.get(name, 0))
+    
+    def record_spam(self, email_id, subject):
+        self.ledger.record(email_id, STATUS_SPAM)
+        self.filtered_spam += 1
+        if self.filtered_spam <= 3:  # Show first 3 filtered emails
+            print(f"  ✓ Filtered spam: {(subject or '')[:50]}")
+    
+    def filter_metadata(self, message_ids):
+        """Phase one: headers only, so spam never has its body downloaded."""
+        survivors = []
+        for email_id, message, size in get_messages(
+            self.get_service, message_ids, self.batch_size, self.concurrency, self.limiter, fmt='metadata'
+        ):
+            self.metadata_bytes += size
+            headers = message.get('payload', {}).get('headers', [])
+            email_subject = get_header(headers, 'Subject')
+            
+            if self.classifier.is_spam(get_header(headers, 'From'), email_subject):
+                self.avoided_bytes += message.get('sizeEstimate', 0)
+                self.record_spam(email_id, email_subject)
+                continue
+            survivors.append(email_id)
+        return survivors
+    
+    def process(self, messages):
+        """Handle one page of listed messages; returns (new, saved) counts."""
+        self.listed += len(messages)
+        processed_before = self.processed
+        if messages:
+            self.last_message_id = messages[-1]['id']
+        
+        # Anything seen before (filed, discarded or filtered) is never re-downloaded
+        to_fetch = []
+        for msg in messages:
+            if msg['id'] in self.ledger or (PROCESSING_DIR / f"{msg['id']}.json").exists():
+                self.skipped += 1
+            else:
+                to_fetch.append(msg['id'])
+        new_count = len(to_fetch)
+        
+        if self.two_phase and to_fetch:
+            to_fetch = self.filter_metadata(to_fetch)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(email_data, f, indent=2, ensure_ascii=False)
+        for email_id, email_data, size in get_messages(
+            self.get_service, to_fetch, self.batch_size, self.concurrency, self.limiter
+        ):
+            self.fetched += 1
+            self.full_bytes += size
+            output_file = PROCESSING_DIR / f"{email_id}.json"
+            
+            # Check spam filter
+            if self.classifier.is_spam(email_data['from'], email_data['subject']):
+                self.record_spam(email_id, email_data['subject'])
+                continue
+            
+            # Follow-ups of a known thread or recruiter get a routing hint. The
+            # company stays empty, so organize_emails.py keeps the email in
+            # Processing until someone has read it and set its response.
+            route = self.routing.route(email_data['thread_id'], email_data['from']) if self.routing else None
+            if route and route.company:
+                email_data['routing'] = route.as_dict()
+                self.routed += 1
+            
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(email_data, f, indent=2, ensure_ascii=False)
+            self.ledger.record(email_id, STATUS_PROCESSING)
+            self.processed += 1
+        
+        return new_count, self.processed - processed_before
+
+def fetch_emails(query=None, batch_size=0, incremental=False, concurrency=1, two_phase=False,
+                 server_filter=False, resume=False, classifier=None, ledger=None, routing=None):
+    """Fetch emails from Gmail and save to Processing folder.
+    
+    The spam filter, message ledger and routing cache are loaded here unless
+    a caller that already has them open (pipeline.py) passes them in.
+    """
+    runtime_date = datetime.now()
+    
+    state = load_state()
+    if state and not resume:
+        print(f"  ⚠ The run from {state['started_at']} did not finish; use --resume to continue it")
+        state = None
+    elif resume and not state:
+        print("  Nothing to resume, starting a new run")
+    elif state:
+        # Continue the interrupted run with its own query and start time, so
+        # the cutoff only ever advances to when a complete run started
+        runtime_date = datetime.fromisoformat(state['started_at'])
+        query = state.get('query')
+        print(f"Resuming run from {state['started_at']} after page {state['page_number']} "
+              f"(last message {state.get('last_message_id')})")
+    
+    runtime_date_str = runtime_date.strftime("%Y/%m/%d")
+    
+    print("Loading credentials...")
+    creds_or_service = load_credentials()
+    
+    print("Connecting to Gmail API...")
+    get_service = make_service_factory(creds_or_service)
+    service = get_service()
+    limiter = RateLimiter()
+    
+    # Record the mailbox position before listing, so mail arriving during
+    # this run is picked up by the next incremental sync
+    if state:
+        history_id = state.get('history_id')
+    else:
+        history_id = execute(
+            service.users().getProfile(userId='me'), limiter, QUOTA_UNITS['profile']
+        ).get('historyId')
+    
+    # Load spam filter
+    if classifier is None:
+        classifier = load_classifier(UNRELATED_SENDERS_FILE)
+    if len(classifier):
+        print(f"  Loaded spam filter with {len(classifier)} blocked senders")
+    
+    pages = None
+    start_history_id = load_config().get('history_id')
+    
+    if state:
+        incremental = state.get('mode') == 'history'
+        server_filter = state.get('server_filter', False)
+    
+    if incremental and query:
+        print("  Explicit query given, ignoring --incremental")
+    elif incremental and not start_history_id:
+        print("  No stored historyId yet, running a full sync")
+    elif incremental:
+        print(f"Fetching changes since historyId {start_history_id}...")
+        history_messages = list_history_messages(service, start_history_id, limiter)
+        if history_messages is None:
+            print("  History has expired, falling back to a full sync")
+        else:
+            pages = [history_messages]
+            query = None
+    
+    if pages is None:
+        query = get_query(query)
+        if state and state.get('list_query'):
+            # The saved page token belongs to this exact query; senders added
+            # since the crash would change a rebuilt one
+            list_query, excluded = state['list_query'], 0
+        else:
+            list_query, excluded = build_list_query(query, classifier.entries) if server_filter else (query, 0)
+        if excluded:
+            print(f"  Excluding {excluded} of {len(classifier)} spam senders server-side, "
+                  f"the rest client-side")
+        
+        print(f"Fetching emails (query: '{query}')...")
+        if state and state['page_number'] and not state.get('page_token'):
+            pages = []  # Every page was done, only the final bookkeeping was lost
+        else:
+            start_token = state.get('page_token') if state else None
+            pages = prefetch(iter_message_pages(get_service, list_query, limiter, start_token))
+    else:
+        list_query = None
+        pages = [(messages, None) for messages in pages]
+    
+    if two_phase and not len(classifier):
+        print("  No spam filter loaded, skipping the metadata phase")
+    if batch_size or concurrency > 1:
+        print(f"  Fetching with batch size {min(batch_size, GMAIL_BATCH_LIMIT) or 1}, {concurrency} worker(s)")
+    
+    PROCESSING_DIR.mkdir(parents=True, exist_ok=True)
+    fetch_start = time.monotonic()
+    
+    checkpoint = {
+        "started_at": runtime_date.isoformat(),
+        "query": query,
+        "list_query": list_query,
+        "mode": "list" if query else "history",
+        "server_filter": server_filter,
+        "history_id": history_id,
+        "page_number": state['page_number'] if state else 0,
+        "page_token": state.get('page_token') if state else None,
+        "last_message_id": state.get('last_message_id') if state else None,
+    }
+    save_state(checkpoint)
+    
+    with nullcontext(ledger) if ledger is not None else MessageLedger() as ledger:
+        processor = MessageProcessor(
+            get_service, limiter, classifier, ledger,
+            batch_size=batch_size, concurrency=concurrency, two_phase=two_phase,
+            routing=routing if routing is not None else RoutingCache()
+        )
+        if state:
+            processor.restore(state.get('counters', {}))
         
-        processed += 1
-        if processed % 10 == 0:
-            print(f"  [{processed}/{len(all_messages)}] Processing...")
+        for messages, next_page_token in pages:
+            new_count, saved = processor.process(messages)
+            
+            checkpoint['page_number'] += 1
+            checkpoint['page_token'] = next_page_token
+            checkpoint['last_message_id'] = processor.last_message_id
+            checkpoint['counters'] = processor.counters()
+            save_state(checkpoint)
+            
+            print(f"  Page {checkpoint['page_number']}: {len(messages)} listed, {new_count} new, {saved} saved "
+                  f"(total {processor.processed} saved, {processor.filtered_spam} spam)")
     
-    print(f"\n✓ Complete! Processed: {processed}, Skipped: {skipped}")
-    if filtered_spam > 0:
-        print(f"✓ Filtered spam: {filtered_spam} emails")
-    print(f"  Output: {PROCESSING_DIR.absolute()}")
+    elapsed = time.monotonic() - fetch_start
     
+    if not processor.listed:
+        print("No emails to process.")
+    else:
+        print(f"\n✓ Complete! Processed: {processor.processed}, Skipped (already seen): {processor.skipped}")
+        if processor.filtered_spam > 0:
+            print(f"✓ Filtered spam: {processor.filtered_spam} emails")
+        if processor.routed:
+            print(f"✓ Routing cache suggested a job for {processor.routed} emails")
+        if processor.fetched:
+            print(f"✓ Fetched {processor.fetched} emails in {elapsed:.1f}s "
+                  f"({processor.fetched / max(elapsed, 1e-6):.1f} msg/s)")
+        if processor.two_phase:
+            print(f"  Transferred ≈ {processor.metadata_bytes / 1024:.0f} KiB metadata "
+                  f"+ {processor.full_bytes / 1024:.0f} KiB full messages")
+            print(f"  Skipped ≈ {processor.avoided_bytes / 1024:.0f} KiB of spam bodies")
+        elif processor.full_bytes:
+            print(f"  Transferred ≈ {processor.full_bytes / 1024:.0f} KiB")
+        if limiter.throttled:
+            print(f"  Throttled {limiter.throttled} time(s), ended at {limiter.rate:.0f} quota units/s")
+        print(f"  Output: {PROCESSING_DIR.absolute()}")
+    
+    # Only a completed run advances the cutoff
     config = load_config()
     config['cutoff_date'] = runtime_date_str
     config['last_run'] = runtime_date.isoformat()
+    config['history_id'] = history_id
     save_config(config)
+    clear_state()
     print(f"\n✓ Updated cutoff date to: {runtime_date_str}")
 
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Fetch emails from Gmail into Email/Processing.")
+    parser.add_argument("query", nargs="?", help="Gmail search query (default: after:<cutoff_date> from config)")
+    parser.add_argument("--batch-size", type=int, default=0, metavar="N",
+                        help=f"Group message gets into Gmail batch requests of N calls (max {GMAIL_BATCH_LIMIT})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch messages added since the last run's historyId")
+    parser.add_argument("--concurrency", type=int, default=1, metavar="N",
+                        help="Fetch and decode messages on N worker threads")
+    parser.add_argument("--server-filter", action="store_true",
+                        help="Exclude known spam senders in the Gmail list query itself (as many as fit in one query)")
+    parser.add_argument("--two-phase", action="store_true",
+                        help="Fetch headers first and download full bodies only for non-spam")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its last checkpointed page")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        fetch_emails()
+        fetch_emails(
+            query=args.query,
+            batch_size=args.batch_size,
+            incremental=args.incremental,
+            concurrency=args.concurrency,
+            two_phase=args.two_phase,
+            server_filter=args.server_filter,
+            resume=args.resume
+        )
     except Exception as e:
         print(f"ERROR: {e}")
         exit(1)
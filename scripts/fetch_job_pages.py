@@ -1,100 +1,469 @@
+"""Fetch the vacancy page of every active job into its webpage.txt.
+
+Pages are fetched concurrently: asyncio schedules the downloads, which run
+on a pooled keep-alive requests.Session in a thread pool. Politeness is per
+host: two requests to the same host start at least --delay seconds apart,
+while pages on different hosts are fetched at the same time, up to
+--concurrency at once. Every URL's latency is reported at the end.
+
+Jobs that already have a webpage.txt of more than MIN_PAGE_SIZE bytes are
+skipped unless --refetch or --refresh is given.
+
+data/page_cache.json keeps the ETag, Last-Modified and a hash of the page
+text per Link. --refresh re-polls every active vacancy with conditional
+requests, so an unchanged posting costs a 304 Not Modified. A posting whose
+text did change gets a short diff in webpage.diff next to its webpage.txt,
+and changes touching the deadline or salary are flagged in the summary.
+
+Every downloaded body is also kept, compressed, in the job's page_archive/
+(page_archive.py). Turning HTML into text is left to extract_pages.py, so
+`python scripts/extract_pages.py reextract` can redo it without refetching.
+
+Pages that extract to less than MIN_PAGE_SIZE characters are usually
+JavaScript-only ATS shells (Workday, Recruitee, ...). When playwright is
+installed they are rendered in headless Chromium afterwards
+(render_pages.py); --no-render skips that.
+
+Usage:
+    python scripts/fetch_job_pages.py [--concurrency 8] [--delay 1.0] [--timeout 15] [--refetch]
+    python scripts/fetch_job_pages.py --refresh     # Daily re-poll of all active vacancies
+"""
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
 import time
+import asyncio
+import difflib
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from jobs import load_jobs
+from page_archive import put_page
+from extract_pages import extract_text, write_webpage_txt
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+DEFAULT_CONCURRENCY = 8
+HOST_DELAY = 1.0        # Seconds between two requests to the same host
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 15
+MIN_PAGE_SIZE = 100     # Pages with less text are fetched again, or rendered
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PAGE_CACHE_FILE = SCRIPT_DIR.parent / "data" / "page_cache.json"
+PAGE_CACHE_VERSION = 1
+
+# Changed lines containing these are flagged
+DEADLINE_WORDS = ("deadline", "sluitingsdatum", "reageren kan tot", "solliciteren kan tot", "reageren voor", "apply before")
+SALARY_WORDS = ("salaris", "salary", "€", "bruto", "per maand", "schaal")
+MAX_DIFF_LINES = 60
+
+def make_session(concurrency=DEFAULT_CONCURRENCY):
+    """A requests session whose connection pool fits the number of workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+class HostThrottle:
+    """Keeps the requests to each host at least delay seconds apart."""
+
+    def __init__(self, delay=HOST_DELAY):
+        self.delay = delay
+        self.next_start = {}
+
+    async def wait(self, host):
+        """Sleep until the host is free again, without claiming it; returns the seconds waited."""
+        waited = max(self.next_start.get(host, 0) - time.monotonic(), 0)
+        if waited:
+            await asyncio.sleep(waited)
+        return waited
+
+    def claim(self, host):
+        """Take the host's slot if it is free now; False if another request got it first."""
+        now = time.monotonic()
+        if self.next_start.get(host, 0) > now:
+            return False
+        self.next_start[host] = now + self.delay
+        return True
+
+class PageResult:
+    """Outcome of one download."""
+
+    def __init__(self, job, url):
+        self.job = job
+        self.url = url
+        self.status = None
+        self.latency = 0.0   # Request time, excluding the politeness wait
+        self.waited = 0.0
+        self.size = 0
+        self.content = None  # Raw body, dropped once archived
+        self.content_type = None
+        self.text = None
+        self.etag = None
+        self.last_modified = None
+        self.error = None
+        self.outcome = None  # Set when saved: new, changed, unchanged, empty or error
+        self.flags = []      # What a change touches: deadline, salary
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+def get_page(session, url, timeout, headers=None):
+    """Download and extract one page; runs on a worker thread.
+
+    Returns (status, content, text, headers); content and text are None for a 304.
+    """
+    response = session.get(url, timeout=timeout, headers=headers)
+    if response.status_code == 304:
+        return 304, None, None, response.headers
+    response.raise_for_status()
+    return response.status_code, response.content, extract_text(response.content), response.headers
+
+async def fetch_page(session, executor, throttle, semaphore, job, url, timeout, headers=None):
+    result = PageResult(job, url)
+    host = urlsplit(url).netloc or url
+    while True:
+        # Wait for the host before taking a worker, so a slow host never blocks the others
+        result.waited += await throttle.wait(host)
+        await semaphore.acquire()
+        # The host is claimed only now that the request can start: a slot taken
+        # before queueing for a worker would let queued requests start together
+        if throttle.claim(host):
+            break
+        semaphore.release()
+    start = time.perf_counter()
+    try:
+        result.status, result.content, result.text, response_headers = \
+            await asyncio.get_running_loop().run_in_executor(executor, get_page, session, url, timeout, headers)
+        result.size = len(result.content or b'')
+        result.etag = response_headers.get('ETag')
+        result.last_modified = response_headers.get('Last-Modified')
+        result.content_type = response_headers.get('Content-Type')
+    except requests.HTTPError as e:
+        result.status = e.response.status_code
+        result.error = str(e)
+    except Exception as e:
+        result.error = str(e)
+    finally:
+        result.latency = time.perf_counter() - start
+        semaphore.release()
+    return result
+
+async def fetch_pages(targets, concurrency=DEFAULT_CONCURRENCY, delay=HOST_DELAY,
+                      timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), session=None, on_result=None,
+                      request_headers=None):
+    """Fetch [(job, url)] concurrently; returns PageResults in completion order.
+
+    on_result(result) is called as each page arrives, e.g. to save it.
+    request_headers maps a URL to extra headers, such as conditional ones.
+    """
+    request_headers = request_headers or {}
+    own_session = session is None
+    if own_session:
+        session = make_session(concurrency)
+    throttle = HostThrottle(delay)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            tasks = [asyncio.create_task(fetch_page(session, executor, throttle, semaphore, job, url, timeout,
+                                                    request_headers.get(url)))
+                     for job, url in targets]
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if on_result:
+                    on_result(result)
+                results.append(result)
+    finally:
+        if own_session:
+            session.close()
+    return results
+
+class PageCache:
+    """Validators and text hash per URL, persisted in data/page_cache.json."""
+
+    def __init__(self, path=PAGE_CACHE_FILE):
+        self.path = Path(path)
+        self.pages = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == PAGE_CACHE_VERSION:
+                    self.pages = data.get("pages", {})
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"  Warning: Ignoring unreadable page cache ({e})")
+
+    def get(self, url):
+        return self.pages.get(url)
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a cached URL, or None.
+
+        None for a JavaScript shell: its 304 would say nothing about the
+        rendered vacancy, which has to be rendered and diffed again.
+        """
+        entry = self.pages.get(url)
+        if not entry or entry.get("shell"):
+            return None
+        headers = {}
+        if entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers or None
+
+    def update(self, result, text_hash=None):
+        now = datetime.now().isoformat(timespec='seconds')
+        entry = self.pages.setdefault(result.url, {})
+        entry["checked"] = now
+        # A 304 may omit the validators; keep the ones we had then
+        if result.etag:
+            entry["etag"] = result.etag
+        if result.last_modified:
+            entry["last_modified"] = result.last_modified
+        if text_hash and text_hash != entry.get("hash"):
+            entry["hash"] = text_hash
+            entry["changed"] = now
+        entry.pop("shell", None)
 
-SOLICITATIES_DIR = r"u:\Personal\BaanSoliciteren\Solicitaties"
-ARCHIVE_DIR = "1.Archief"
-
-def fetch_and_save_webpage():
-    print(f"Scanning directories in {SOLICITATIES_DIR}...")
-    
-    count = 0
-    skipped = 0
-    errors = 0
-
-    for item in os.listdir(SOLICITATIES_DIR):
-        item_path = os.path.join(SOLICITATIES_DIR, item)
-        
-        # Skip if not a directory
-        if not os.path.isdir(item_path):
+    def mark_shell(self, result):
+        """Record that the URL serves a (nearly) empty page, dropping its validators."""
+        entry = self.pages.setdefault(result.url, {})
+        entry["checked"] = datetime.now().isoformat(timespec='seconds')
+        entry["shell"] = True
+        entry.pop("etag", None)
+        entry.pop("last_modified", None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.path.parent,
+                                         prefix=self.path.name + '.', suffix='.tmp', delete=False) as f:
+            json.dump({"version": PAGE_CACHE_VERSION, "pages": self.pages}, f, indent=2, ensure_ascii=False)
+        os.replace(f.name, self.path)
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def read_saved_text(webpage_txt):
+    """The page text of a webpage.txt, without its Source header; None if missing."""
+    if not webpage_txt.exists():
+        return None
+    content = webpage_txt.read_text(encoding='utf-8')
+    if content.startswith("Source: "):
+        content = content.partition("\n\n")[2]
+    return content
+
+def change_flags(diff_lines, context=4):
+    """Which of deadline/salary the changes in a diff touch.
+
+    Compares the removed and added lines word by word and looks for the
+    keywords in each changed stretch plus a few words around it, so one
+    edit in a long paragraph does not flag every keyword in it.
+    """
+    removed = " ".join(line[1:] for line in diff_lines if line.startswith("-") and not line.startswith("---"))
+    added = " ".join(line[1:] for line in diff_lines if line.startswith("+") and not line.startswith("+++"))
+    old_words, new_words = removed.lower().split(), added.lower().split()
+
+    touched = []
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            touched.append(" ".join(old_words[max(i1 - context, 0):i2 + context]))
+            touched.append(" ".join(new_words[max(j1 - context, 0):j2 + context]))
+
+    flags = []
+    if any(word in text for text in touched for word in DEADLINE_WORDS):
+        flags.append("deadline")
+    if any(word in text for text in touched for word in SALARY_WORDS):
+        flags.append("salary")
+    return flags
+
+def write_diff(job, old_text, new_text):
+    """Write webpage.diff for a changed posting; returns its flags."""
+    diff = list(difflib.unified_diff(old_text.splitlines(), new_text.splitlines(),
+                                     "webpage.txt (before)", "webpage.txt (now)", lineterm='', n=0))
+    flags = change_flags(diff)
+    header = f"Changed {datetime.now():%Y-%m-%d %H:%M}" + (f", touches {' and '.join(flags)}" if flags else "")
+    if len(diff) > MAX_DIFF_LINES:
+        diff = diff[:MAX_DIFF_LINES] + [f"... {len(diff) - MAX_DIFF_LINES} more lines"]
+    with open(job.path / "webpage.diff", 'w', encoding='utf-8') as f:
+        f.write(header + "\n\n" + "\n".join(diff) + "\n")
+    return flags
+
+def collect_targets(refetch=False, refresh=False):
+    """Return ([(job, url)], skipped) for the active jobs that need a page."""
+    targets, skipped = [], 0
+    for job in load_jobs(include_archived=False):
+        if job.info is None:
+            reason = job.errors.get("relevant_info.json", "relevant_info.json not found")
+            print(f"Skipping {job.name}: {reason}")
+            skipped += 1
             continue
-            
-        # Skip Archive
-        if item == ARCHIVE_DIR:
-            print(f"Skipping Archive directory: {item}")
+
+        saved_text = read_saved_text(job.path / "webpage.txt")
+        if not (refetch or refresh) and saved_text is not None and len(saved_text) >= MIN_PAGE_SIZE:
+            skipped += 1
             continue
-            
-        relevant_info_path = os.path.join(item_path, "relevant_info.json")
-        webpage_txt_path = os.path.join(item_path, "webpage.txt")
-        
-        if not os.path.exists(relevant_info_path):
-            print(f"Skipping {item}: relevant_info.json not found")
+
+        link = job.info.get("Link")
+        if not link:
+            print(f"Skipping {job.name}: No Link in relevant_info.json")
             skipped += 1
             continue
-            
-        # Check if webpage.txt already exists
-        if os.path.exists(webpage_txt_path):
-             # Check if it's empty or very small, if so, maybe retry? 
-             # For now, let's assume if it exists, we skip it to avoid re-fetching everything every time.
-             # User said "create", usually implies if missing.
-             # But user also said "For all Solicitaties that are unsent", implying a batch job.
-             # Let's check size.
-             if os.path.getsize(webpage_txt_path) > 100:
-                 print(f"Skipping {item}: webpage.txt already exists")
-                 skipped += 1
-                 continue
-        
-        try:
-            with open(relevant_info_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            link = data.get("Link")
-            if not link:
-                print(f"Skipping {item}: No Link in relevant_info.json")
-                skipped += 1
-                continue
-                
-            print(f"Fetching {link} for {item}...")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(link, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            text = soup.get_text()
-            
-            # Break into lines and remove leading/trailing space on each
-            lines = (line.strip() for line in text.splitlines())
-            # Break multi-headlines into a line each
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            # Drop blank lines
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            with open(webpage_txt_path, 'w', encoding='utf-8') as f:
-                f.write(f"Source: {link}\n\n")
-                f.write(text)
-                
-            print(f"Successfully saved webpage.txt for {item}")
-            count += 1
-            
-            # Be nice to servers
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"Error processing {item}: {e}")
-            errors += 1
-
-    print(f"\nFinished. Processed: {count}, Skipped: {skipped}, Errors: {errors}")
+
+        targets.append((job, link))
+    return targets, skipped
+
+def save_page(result, cache):
+    """Store a fetched page, diffing it against the saved one; sets result.outcome."""
+    if not result.ok:
+        result.outcome = "error"
+        print(f"  ✗ {result.job.name}: {result.error}")
+        return
+
+    if result.not_modified:
+        result.outcome = "unchanged"
+        cache.update(result)
+        print(f"  = {result.job.name}: not modified")
+        return
+
+    put_page(result.job.path, result.url, result.content, result.content_type)
+    result.content = None
+
+    if len(result.text) < MIN_PAGE_SIZE:
+        # Probably rendered by JavaScript; never replace a real page with the empty shell
+        result.outcome = "empty"
+        cache.mark_shell(result)
+        if read_saved_text(result.job.path / "webpage.txt") is None:
+            write_webpage_txt(result.job.path, result.url, result.text)
+        print(f"  ⚠ {result.job.name}: only {len(result.text)} characters of text ({result.latency:.2f}s)")
+        return
+
+    cache.update(result, text_hash(result.text))
+    save_text(result)
+
+def save_text(result):
+    """Write result.text to webpage.txt, diffing it against the saved text; sets result.outcome."""
+    old_text = read_saved_text(result.job.path / "webpage.txt")
+    new_hash = text_hash(result.text)
+
+    if old_text is not None and text_hash(old_text) == new_hash:
+        write_webpage_txt(result.job.path, result.url, result.text)  # Only if the Link moved
+        result.outcome = "unchanged"
+        print(f"  = {result.job.name}: unchanged ({result.latency:.2f}s)")
+        return
+
+    write_webpage_txt(result.job.path, result.url, result.text)
+
+    if old_text is None or len(old_text) < MIN_PAGE_SIZE:
+        result.outcome = "new"
+        print(f"  ✓ {result.job.name} ({result.latency:.2f}s)")
+        return
+
+    result.outcome = "changed"
+    result.flags = write_diff(result.job, old_text, result.text)
+    flagged = f" ⚠ {' and '.join(result.flags)} changed" if result.flags else ""
+    print(f"  ✓ {result.job.name}: changed, see webpage.diff{flagged}")
+
+def print_latency_report(results, elapsed):
+    if not results:
+        return
+    print(f"\nLatency per URL (slowest first):")
+    for result in sorted(results, key=lambda r: -r.latency):
+        status = result.status or "ERR"
+        waited = f", waited {result.waited:.1f}s for host" if result.waited >= 0.05 else ""
+        print(f"  {result.latency:>6.2f}s  {status:<4} {result.url[:80]}{waited}")
+    latencies = sorted(r.latency for r in results)
+    median = latencies[len(latencies) // 2]
+    print(f"\n  {len(results)} URLs in {elapsed:.1f}s wall time "
+          f"(sum of latencies {sum(latencies):.1f}s, median {median:.2f}s, max {latencies[-1]:.2f}s)")
+
+def fetch_and_save_webpage(concurrency=DEFAULT_CONCURRENCY, delay=HOST_DELAY, timeout=READ_TIMEOUT,
+                           refetch=False, refresh=False, render=True):
+    targets, skipped = collect_targets(refetch, refresh)
+    hosts = {urlsplit(url).netloc for _, url in targets}
+    cache = PageCache()
+
+    # Conditional requests only where there is a saved page to fall back on
+    request_headers = {}
+    if refresh:
+        for job, url in targets:
+            headers = cache.conditional_headers(url)
+            if headers and read_saved_text(job.path / "webpage.txt") is not None:
+                request_headers[url] = headers
+
+    mode = f", {len(request_headers)} conditional" if refresh else ""
+    print(f"Fetching {len(targets)} pages from {len(hosts)} hosts ({concurrency} at a time, "
+          f"{delay:.1f}s per host{mode})...\n")
+
+    start = time.perf_counter()
+    results = asyncio.run(fetch_pages(targets, concurrency, delay, (CONNECT_TIMEOUT, timeout),
+                                      on_result=lambda result: save_page(result, cache),
+                                      request_headers=request_headers))
+    elapsed = time.perf_counter() - start
+    cache.save()
+    print_latency_report(results, elapsed)
+
+    empty = [r for r in results if r.outcome == "empty"]
+    if empty and render:
+        # Imported here: only this stage needs playwright
+        from render_pages import async_playwright, render_and_save
+        if async_playwright is None:
+            print(f"\n⚠ {len(empty)} pages came back (nearly) empty. To render them in headless Chromium:")
+            print("    pip install playwright && playwright install chromium")
+        else:
+            print(f"\nRendering {len(empty)} (nearly) empty pages in headless Chromium...\n")
+            try:
+                rendered = render_and_save([(r.job, r.url) for r in empty])
+            except Exception as e:
+                # The fetched pages are saved already; rendering is only a bonus
+                rendered = []
+                print(f"  ✗ Rendering failed: {str(e).strip().splitlines()[0]}")
+                print("    Is the browser installed? playwright install chromium")
+            # Rendered pages replace their empty fetch in the summary
+            by_job = {r.job.name: r for r in rendered if r.outcome != "empty"}
+            results = [by_job.get(r.job.name, r) for r in results]
+
+    outcomes = {name: [r for r in results if r.outcome == name]
+                for name in ("new", "changed", "unchanged", "empty", "error")}
+    not_modified = sum(r.not_modified for r in results)
+    print(f"\nFinished. New: {len(outcomes['new'])}, Changed: {len(outcomes['changed'])}, "
+          f"Unchanged: {len(outcomes['unchanged'])} ({not_modified} via 304), Empty: {len(outcomes['empty'])}, "
+          f"Skipped: {skipped}, Errors: {len(outcomes['error'])}")
+    flagged = [r for r in outcomes['changed'] if r.flags]
+    if flagged:
+        print(f"\n⚠ Postings with deadline or salary changes:")
+        for result in flagged:
+            print(f"  {result.job.name}: {', '.join(result.flags)} (see {result.job.path / 'webpage.diff'})")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch vacancy pages of active jobs into webpage.txt")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Downloads running at once")
+    parser.add_argument("--delay", type=float, default=HOST_DELAY, help="Seconds between requests to the same host")
+    parser.add_argument("--timeout", type=float, default=READ_TIMEOUT, help="Read timeout per request in seconds")
+    parser.add_argument("--refetch", action="store_true", help="Also fetch jobs that already have a webpage.txt")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-poll all active jobs with conditional requests and diff changed postings")
+    parser.add_argument("--no-render", action="store_true", help="Do not render empty pages in headless Chromium")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    fetch_and_save_webpage()
+    args = parse_args()
+    fetch_and_save_webpage(args.concurrency, args.delay, args.timeout, args.refetch, args.refresh,
+                           render=not args.no_render)
@@ -1,37 +1,27 @@
 """
 Generate deadlines.txt from ongoing job applications in Solicitaties/
 """
-import json
-import os
 from pathlib import Path
+from jobs import load_jobs
 
 def get_ongoing_deadlines():
     """Extract deadlines from ongoing job applications."""
-    base_path = Path(__file__).parent.parent / "Solicitaties"
-    
     # Response values that indicate rejection or non-ongoing status
     NOT_ONGOING = {"Rejected"}
     
     deadlines = []
     
-    # Iterate through all job folders
-    for job_folder in base_path.iterdir():
-        if not job_folder.is_dir() or job_folder.name == "1.Archief":
+    # Iterate through all active job folders
+    for job in load_jobs(include_archived=False):
+        if job.errors:
+            print(f"Skipping {job.name}: {'; '.join(job.errors.values())}")
             continue
         
-        stats_file = job_folder / "stats.json"
-        relevant_info_file = job_folder / "relevant_info.json"
-        
-        if not stats_file.exists() or not relevant_info_file.exists():
+        if job.stats is None or job.info is None:
             continue
         
-        # Load stats to check if ongoing
-        with open(stats_file, 'r', encoding='utf-8') as f:
-            stats = json.load(f)
-        
-        # Load relevant_info to get deadline
-        with open(relevant_info_file, 'r', encoding='utf-8') as f:
-            relevant_info = json.load(f)
+        stats = job.stats
+        relevant_info = job.info
         
         response = stats.get("Response", "Unknown")
         rejected = stats.get("Rejected", False)
@@ -40,7 +30,7 @@ def get_ongoing_deadlines():
         # Only include ongoing jobs with actual deadlines
         if not rejected and response not in NOT_ONGOING and deadline and deadline not in [None, "", "null", "Rolling / None"]:
             deadlines.append({
-                "job": job_folder.name,
+                "job": job.name,
                 "response": response,
                 "deadline": deadline
             })
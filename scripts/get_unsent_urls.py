@@ -1,47 +1,27 @@
-import os
 import json
-
-SOLICITATIES_DIR = r"u:\Personal\BaanSoliciteren\Solicitaties"
+from jobs import load_jobs, SOLICITATIES_DIR
 
 def get_unsent_jobs():
     unsent_jobs = []
     
-    if not os.path.exists(SOLICITATIES_DIR):
+    if not SOLICITATIES_DIR.exists():
         print(f"Directory not found: {SOLICITATIES_DIR}")
         return
 
-    for item in os.listdir(SOLICITATIES_DIR):
-        job_dir = os.path.join(SOLICITATIES_DIR, item)
-        
-        # Skip archives and non-directories
-        if not os.path.isdir(job_dir):
-            continue
-        if item.startswith("1.Archief") or item.startswith("1. Archief"):
+    # Archived jobs are never unsent
+    for job in load_jobs(include_archived=False):
+        if "stats.json" in job.errors:
+            print(f"Error processing {job.name}: {job.errors['stats.json']}")
             continue
-            
-        stats_path = os.path.join(job_dir, "stats.json")
-        info_path = os.path.join(job_dir, "relevant_info.json")
         
-        if not os.path.exists(stats_path):
+        if job.stats is None:
             continue
             
-        try:
-            with open(stats_path, 'r', encoding='utf-8') as f:
-                stats = json.load(f)
-            
-            if stats.get("Response") == "Unsent":
-                link = None
-                if os.path.exists(info_path):
-                    with open(info_path, 'r', encoding='utf-8') as f:
-                        info = json.load(f)
-                        link = info.get("Link")
-                
-                unsent_jobs.append({
-                    "folder": item,
-                    "link": link
-                })
-        except Exception as e:
-            print(f"Error processing {item}: {e}")
+        if job.stats.get("Response") == "Unsent":
+            unsent_jobs.append({
+                "folder": job.name,
+                "link": job.info.get("Link") if job.info else None
+            })
 
     print(json.dumps(unsent_jobs, indent=2))
 
@@ -0,0 +1,275 @@
+"""Inverted index over job folder names for matching emails to jobs.
+
+organize_emails.py used to re-list Solicitaties/ and re-split every folder
+name for every email. JobIndex parses the folder names once per run into
+postings lists keyed by keyword:
+
+- company tokens   (sender domain +50, subject +20, body +10)
+- job title tokens (subject +15, body +5)
+- vacancy numbers  (subject or body +100)
+
+Scoring an email only touches the postings of keywords that occur in it.
+Keywords keep the substring semantics of the old per-folder scoring: every
+keyword is at least three characters long, so the keywords worth checking
+are found by intersecting the text's trigrams with the keywords' first
+three characters. Scores are summed with numpy.bincount when numpy is
+installed and with a plain dict otherwise.
+
+The hand-typed company narrows the candidates via company_resolver. When
+no candidate scores above MIN_SCORE, a company with a single job gets that
+job, and a company with several jobs raises AmbiguousJobError.
+"""
+import re
+from collections import defaultdict
+from company_resolver import ALIASES_FILE, CompanyResolver, UnknownCompanyError, normalize_company
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Same weights as the original per-folder calculate_match_score()
+WEIGHT_DOMAIN = 50
+WEIGHT_COMPANY_SUBJECT = 20
+WEIGHT_COMPANY_BODY = 10
+WEIGHT_TITLE_SUBJECT = 15
+WEIGHT_TITLE_BODY = 5
+WEIGHT_VACANCY = 100
+
+MIN_SCORE = 10      # A match needs more than this
+BODY_CHARS = 500    # Only the start of the body is checked
+VACANCY_RE = re.compile(r'\d{5,}')
+
+# Postings fields
+DOMAIN, SUBJECT, BODY, VACANCY = range(4)
+
+def parse_job_folder_name(folder_name):
+    """Parse job folder name to extract job title and company."""
+    # Format: JobTitle_—_Company
+    parts = folder_name.split('_—_')
+    if len(parts) == 2:
+        job_title = parts[0].replace('_', ' ').lower()
+        company = parts[1].replace('_', ' ').lower()
+        return job_title, company
+    return None, None
+
+def extract_sender_domain(email_from):
+    """Extract domain from email sender."""
+    match = re.search(r'<([^>]+)>', email_from or '')
+    email = match.group(1) if match else (email_from or '')
+    if '@' in email:
+        return email.split('@')[-1].lower()
+    return None
+
+class AmbiguousJobError(LookupError):
+    """The company has several jobs and the email content favours none of them."""
+
+    def __init__(self, company, jobs):
+        self.company = company
+        self.jobs = jobs
+        super().__init__(f"Company '{company}' has {len(jobs)} jobs and nothing in the email "
+                         f"picks one: {', '.join(jobs)}")
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class JobIndex:
+    """Job folder names parsed once into keyword postings."""
+
+    def __init__(self, job_names, archived=(), aliases_file=ALIASES_FILE):
+        self.names = list(job_names)
+        self.positions = {name: job for job, name in enumerate(self.names)}
+        self.archived = set(archived)
+        self.companies = []          # Parsed company per job, None if unparseable
+        self.terms = []              # Per job: {(field, keyword id): summed weight}
+        self.keyword_ids = {}        # keyword -> id
+        self.prefixes = defaultdict(list)  # first three chars -> [(keyword, id)]
+        self._candidates = {}
+
+        for name in self.names:
+            job_title, company = parse_job_folder_name(name)
+            self.companies.append(company)
+            terms = defaultdict(int)
+            self.terms.append(terms)
+            if not job_title or not company:
+                continue  # Unparseable names never score
+
+            # Repeated tokens count once per repeat, exactly as the loops did
+            for part in company.split():
+                if len(part) > 3:
+                    terms[DOMAIN, self._keyword(part)] += WEIGHT_DOMAIN
+                if len(part) > 2:
+                    terms[SUBJECT, self._keyword(part)] += WEIGHT_COMPANY_SUBJECT
+                    terms[BODY, self._keyword(part)] += WEIGHT_COMPANY_BODY
+            for part in job_title.split():
+                if len(part) > 2:
+                    terms[SUBJECT, self._keyword(part)] += WEIGHT_TITLE_SUBJECT
+                    terms[BODY, self._keyword(part)] += WEIGHT_TITLE_BODY
+            for vacancy in VACANCY_RE.findall(name):
+                terms[VACANCY, self._keyword(vacancy)] += WEIGHT_VACANCY
+
+        # Invert into postings: (field, keyword id) -> (job indices, weights)
+        postings = defaultdict(lambda: ([], []))
+        for job, terms in enumerate(self.terms):
+            for key, weight in terms.items():
+                postings[key][0].append(job)
+                postings[key][1].append(weight)
+        if np is not None:
+            postings = {key: (np.array(jobs, dtype=np.int64), np.array(weights, dtype=np.int64))
+                        for key, (jobs, weights) in postings.items()}
+        self.postings = dict(postings)
+        self.mean_terms = sum(map(len, self.terms)) / max(len(self.terms), 1)
+
+        # Jobs per normalized company, for resolving the hand-typed company field
+        self.company_jobs = defaultdict(list)
+        for job, company in enumerate(self.companies):
+            if company:
+                self.company_jobs[normalize_company(company)].append(job)
+        self.resolver = CompanyResolver(self.company_jobs, aliases_file)
+
+    @classmethod
+    def from_catalog(cls, jobs):
+        """Build the index from jobs.load_jobs() records."""
+        return cls([job.name for job in jobs], [job.name for job in jobs if job.archived])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, job_name):
+        return job_name in self.positions
+
+    def _keyword(self, keyword):
+        kid = self.keyword_ids.get(keyword)
+        if kid is None:
+            kid = self.keyword_ids[keyword] = len(self.keyword_ids)
+            self.prefixes[keyword[:3]].append((keyword, kid))
+        return kid
+
+    def find_keywords(self, text):
+        """Return the ids of all indexed keywords occurring in text."""
+        if not text:
+            return set()
+        hits = set()
+        for prefix in self.prefixes.keys() & trigrams(text):
+            for keyword, kid in self.prefixes[prefix]:
+                if keyword in text:
+                    hits.add(kid)
+        return hits
+
+    def is_archived(self, job_name):
+        return job_name in self.archived
+
+    def prepare(self, companies):
+        """Resolve many company names in one batch before matching emails."""
+        companies = [c for c in dict.fromkeys(companies)
+                     if c and c != "DISCARD" and c not in self._candidates and c not in self.positions]
+        for company, result in self.resolver.resolve_many(companies).items():
+            if isinstance(result, Exception):
+                self._candidates[company] = result
+            else:
+                self._candidates[company] = sorted(job for name, _ in result for job in self.company_jobs[name])
+
+    def candidates(self, company):
+        """Indices of the jobs an email for this company is scored against, or None for all.
+
+        Raises UnknownCompanyError when no job folder company is close enough.
+        """
+        if not company or company == "DISCARD":
+            return None
+        if company in self.positions:
+            return [self.positions[company]]  # Tagged with the exact folder name
+        if company not in self._candidates:
+            self.prepare([company])
+        result = self._candidates[company]
+        if isinstance(result, UnknownCompanyError):
+            raise result
+        return result
+
+    def accepts(self, company, job_name):
+        """Whether an email tagged with company may be filed under job_name."""
+        candidates = self.candidates(company)
+        return job_name in self.positions and (candidates is None or self.positions[job_name] in candidates)
+
+    def hits(self, email_from, subject, body):
+        """Return the (field, keyword id) keys the email matches."""
+        sender_domain = extract_sender_domain(email_from)
+        subject_hits = self.find_keywords((subject or '').lower())
+        body_hits = self.find_keywords((body or '').lower()[:BODY_CHARS])
+        domain_hits = self.find_keywords(sender_domain) if sender_domain else set()
+
+        keys = {(DOMAIN, kid) for kid in domain_hits}
+        keys.update((SUBJECT, kid) for kid in subject_hits)
+        keys.update((BODY, kid) for kid in body_hits)
+        keys.update((VACANCY, kid) for kid in subject_hits | body_hits)
+        return {key for key in keys if key in self.postings}
+
+    def _best_by_postings(self, hits, candidates):
+        """Sum the postings of all hits; cost follows how common the keywords are."""
+        if np is not None:
+            jobs = np.concatenate([self.postings[key][0] for key in hits])
+            weights = np.concatenate([self.postings[key][1] for key in hits])
+            totals = np.bincount(jobs, weights=weights, minlength=len(self.names))
+            if candidates is not None:
+                totals = totals[candidates]
+            best = int(totals.argmax())  # First maximum, like the old loop
+            job = candidates[best] if candidates is not None else best
+            return job, int(totals[best])
+
+        totals = defaultdict(int)
+        for key in hits:
+            for job, weight in zip(*self.postings[key]):
+                totals[job] += weight
+        allowed = set(candidates) if candidates is not None else None
+        best_job, best_score = None, 0
+        for job, score in totals.items():
+            if allowed is not None and job not in allowed:
+                continue
+            if score > best_score or (score == best_score and job < best_job):
+                best_job, best_score = job, score
+        return best_job, best_score
+
+    def _best_by_candidates(self, hits, candidates):
+        """Score each candidate against the hits; cost follows the number of candidates."""
+        best_job, best_score = None, 0
+        for job in candidates:
+            score = sum(weight for key, weight in self.terms[job].items() if key in hits)
+            if score > best_score:
+                best_job, best_score = job, score
+        return best_job, best_score
+
+    def best_match(self, company, subject, email_from, body=""):
+        """Return (job name, score) of the best candidate, or (None, 0).
+
+        Ties go to the first candidate in index order, as in the old loop.
+        """
+        hits = self.hits(email_from, subject, body)
+        if not hits or not self.names:
+            return None, 0
+
+        candidates = self.candidates(company)
+        postings_cost = sum(len(self.postings[key][0]) for key in hits)
+        if candidates is not None and len(candidates) * self.mean_terms < postings_cost:
+            job, score = self._best_by_candidates(hits, candidates)
+        else:
+            job, score = self._best_by_postings(hits, candidates)
+
+        return (self.names[job], score) if score > 0 else (None, 0)
+
+    def match(self, company, subject, email_from, body=""):
+        """Determine the correct job folder based on email content."""
+        if not self.names:
+            return None
+
+        best_match, best_score = self.best_match(company, subject, email_from, body)
+
+        # Only return a match if we have reasonable confidence
+        if best_score > MIN_SCORE:
+            return best_match
+
+        # A company with a single job needs no content match
+        candidates = self.candidates(company)
+        if candidates is None:
+            return None
+        if len(candidates) == 1:
+            return self.names[candidates[0]]
+        raise AmbiguousJobError(company, [self.names[job] for job in candidates])
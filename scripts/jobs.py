@@ -0,0 +1,177 @@
+"""Catalog of job folders under Solicitaties/ and Solicitaties/1.Archief.
+
+Every job folder holds a relevant_info.json and a stats.json. Instead of
+re-parsing all of them on every run, load_jobs() keeps a manifest in
+data/jobs_manifest.json with (mtime, size, parsed JSON) per file and only
+re-reads files whose mtime or size changed since the last run.
+
+Usage from other scripts:
+    from jobs import load_jobs
+    for job in load_jobs():
+        if not job.archived and job.stats:
+            ...
+
+Run directly to list the catalog: python scripts/jobs.py
+"""
+import os
+import json
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass, field
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+
+SOLICITATIES_DIR = PROJECT_ROOT / "Solicitaties"
+ARCHIVE_DIR = SOLICITATIES_DIR / "1.Archief"
+MANIFEST_FILE = PROJECT_ROOT / "data" / "jobs_manifest.json"
+
+MANIFEST_VERSION = 1
+JOB_FILES = ("relevant_info.json", "stats.json")
+
+@dataclass
+class Job:
+    """One job folder with its parsed relevant_info.json and stats.json."""
+    name: str
+    folder: str                 # Folder path as a plain string, see path
+    archived: bool
+    info: dict | None = None    # None if relevant_info.json is missing or unreadable
+    stats: dict | None = None   # None if stats.json is missing or unreadable
+    errors: dict = field(default_factory=dict)  # file name -> parse error
+    stamps: dict = field(default_factory=dict)  # file name -> [mtime_ns, size]
+
+    @property
+    def path(self) -> Path:
+        return Path(self.folder)
+
+    @property
+    def role(self) -> str:
+        parts = self.name.split("_—_")
+        return parts[0].replace("_", " ") if len(parts) == 2 else self.name.replace("_", " ")
+
+    @property
+    def company(self) -> str:
+        parts = self.name.split("_—_")
+        return parts[1].replace("_", " ") if len(parts) == 2 else "Unknown"
+
+    @property
+    def info_file(self) -> Path:
+        return self.path / "relevant_info.json"
+
+    @property
+    def stats_file(self) -> Path:
+        return self.path / "stats.json"
+
+    def save_stats(self, stats=None):
+        """Write stats.json (and keep the in-memory copy in sync)."""
+        if stats is not None:
+            self.stats = stats
+        with open(self.stats_file, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, indent=2, ensure_ascii=False)
+        st = os.stat(self.stats_file)
+        self.stamps["stats.json"] = [st.st_mtime_ns, st.st_size]
+
+def _load_manifest(manifest_file):
+    if not manifest_file.exists():
+        return {}
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}  # A damaged manifest only costs one cold run
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+def _save_manifest(manifest_file, files):
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    # A temp file of our own: scripts running side by side (tasks.py) all save the manifest
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=manifest_file.parent,
+                                     prefix=manifest_file.name + '.', suffix='.tmp', delete=False) as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(f.name, manifest_file)
+
+def _read_json(path, st, cached):
+    """Return the manifest entry for a file, re-parsing only if it changed."""
+    if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+        return cached, False
+
+    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "data": None, "error": None}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry["data"] = json.load(f)
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry, True
+
+def _job_folders(solicitaties_dir, archive_dir):
+    """Yield (DirEntry, archived) for every job folder, active ones first."""
+    for base, archived in ((solicitaties_dir, False), (archive_dir, True)):
+        if not base.exists():
+            continue
+        with os.scandir(base) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if not entry.is_dir() or (not archived and entry.name == archive_dir.name):
+                    continue
+                yield entry, archived
+
+def load_jobs(include_archived=True, solicitaties_dir=SOLICITATIES_DIR, manifest_file=MANIFEST_FILE):
+    """Return all job folders as Job records, using the manifest where possible."""
+    solicitaties_dir = Path(solicitaties_dir)
+    archive_dir = solicitaties_dir / ARCHIVE_DIR.name
+    manifest_file = Path(manifest_file)
+
+    cached_files = _load_manifest(manifest_file)
+    files = {}
+    changed = False
+    jobs = []
+
+    for folder, archived in _job_folders(solicitaties_dir, archive_dir):
+        job = Job(name=folder.name, folder=folder.path, archived=archived)
+        prefix = f"{archive_dir.name}/{folder.name}/" if archived else f"{folder.name}/"
+
+        # Plain strings and os.stat here: pathlib dominates a warm run otherwise
+        for file_name in JOB_FILES:
+            rel_path = prefix + file_name
+            file_path = folder.path + os.sep + file_name
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                changed |= rel_path in cached_files
+                continue
+
+            entry, reparsed = _read_json(file_path, st, cached_files.get(rel_path))
+            files[rel_path] = entry
+            changed |= reparsed
+            job.stamps[file_name] = [entry["mtime_ns"], entry["size"]]
+
+            if entry["error"]:
+                job.errors[file_name] = entry["error"]
+            elif file_name == "stats.json":
+                job.stats = entry["data"]
+            else:
+                job.info = entry["data"]
+
+        if include_archived or not archived:
+            jobs.append(job)
+
+    # Drop entries of folders that were moved or deleted
+    changed |= len(files) != len(cached_files)
+    if changed:
+        _save_manifest(manifest_file, files)
+
+    return jobs
+
+def main():
+    jobs = load_jobs()
+    active = [j for j in jobs if not j.archived]
+    print(f"Job catalog: {len(jobs)} jobs ({len(active)} active, {len(jobs) - len(active)} archived)")
+    for job in jobs:
+        response = (job.stats or {}).get("Response", "-")
+        marker = "A" if job.archived else " "
+        print(f"  {marker} {job.name:<60} {response}")
+        for file_name, error in job.errors.items():
+            print(f"      ✗ {file_name}: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Plan-then-apply journal for batches of file operations.
+
+organize_emails.py and archive_jobs.py first decide every move in memory,
+then write the whole plan to a journal file and apply it in one batch. If
+the run dies halfway, the next run finds the journal and replays it before
+doing anything else. Every operation is idempotent, so replaying steps that
+already happened is harmless:
+
+    {"op": "write_json", "path": ..., "data": ..., "indent": 2}
+    {"op": "move",       "src": ..., "dst": ...}
+    {"op": "delete",     "path": ...}
+    {"op": "file",       "src": ..., "location": "Ongoing", "job": ...}   (through an email store)
+
+Any operation may carry "ledger": {"id", "status", "job"}, recorded in the
+message ledger once the operation is done.
+"""
+import os
+import json
+import errno
+import shutil
+from pathlib import Path
+from datetime import datetime
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DATA_DIR = SCRIPT_DIR.parent / "data"
+
+def replace_or_move(src, dst):
+    """Rename src to dst; os.replace on one filesystem, shutil.move across them."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
+
+def write_json_atomic(path, data, indent=2):
+    """Write JSON to a temp file, fsync it and rename it over path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def describe(op):
+    """One line describing an operation, for --dry-run."""
+    kind = op['op']
+    if kind == 'move':
+        return f"move   {op['src']} -> {op['dst']}"
+    if kind == 'file':
+        return f"file   {Path(op['src']).name} -> {op['location']}/{op['job']}"
+    if kind == 'delete':
+        return f"delete {op['path']}"
+    if kind == 'write_json':
+        return f"write  {op['path']}"
+    return f"{kind} {op}"
+
+class Journal:
+    """A pending batch of operations stored in a JSON file."""
+
+    def __init__(self, name):
+        self.path = DATA_DIR / f"{name}_journal.json"
+
+    def pending(self):
+        """Return the unfinished journal, or None."""
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            # Torn write: the plan never started applying, so nothing to replay
+            self.clear()
+            return None
+
+    def write(self, ops):
+        journal = {"created": datetime.now().isoformat(timespec='seconds'), "ops": ops}
+        write_json_atomic(self.path, journal)
+        return journal
+
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+def apply_op(op, store=None):
+    """Apply one operation; returns False if it had nothing left to do."""
+    kind = op['op']
+
+    if kind == 'write_json':
+        write_json_atomic(op['path'], op['data'], op.get('indent', 2))
+        return True
+
+    if kind == 'move':
+        src, dst = Path(op['src']), Path(op['dst'])
+        if not src.exists():
+            return False  # Already moved
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        replace_or_move(src, dst)
+        return True
+
+    if kind == 'delete':
+        path = Path(op['path'])
+        if not path.exists():
+            return False
+        path.unlink()
+        return True
+
+    if kind == 'file':
+        src = Path(op['src'])
+        if not src.exists():
+            return False  # Already filed
+        store.file_email(src, op['location'], op['job'])
+        return True
+
+    raise ValueError(f"Unknown journal operation: {kind}")
+
+def apply_ops(ops, store=None, ledger=None):
+    """Apply a plan in order; returns (applied, already done, failed)."""
+    applied, skipped, failed = 0, 0, 0
+    for op in ops:
+        try:
+            if apply_op(op, store):
+                applied += 1
+            else:
+                skipped += 1
+        except Exception as e:
+            print(f"  ✗ {describe(op)}: {e}")
+            failed += 1
+            continue
+        if ledger is not None and op.get('ledger'):
+            ledger.record(op['ledger']['id'], op['ledger']['status'], op['ledger'].get('job'))
+    return applied, skipped, failed
+
+def replay(journal, store=None, ledger=None):
+    """Finish a journal left behind by a crashed run."""
+    pending = journal.pending()
+    if not pending:
+        return False
+    print(f"Replaying unfinished run from {pending['created']} ({len(pending['ops'])} operations)...")
+    applied, skipped, failed = apply_ops(pending['ops'], store, ledger)
+    if store is not None:
+        store.save()
+    if failed:
+        raise RuntimeError(f"{failed} journal operation(s) failed; fix them and run again")
+    journal.clear()
+    print(f"  ✓ Replayed: {applied} applied, {skipped} already done\n")
+    return True
@@ -0,0 +1,135 @@
+"""Persistent ledger of every Gmail message ID that has been seen.
+
+The ledger is an append-only JSON Lines file with one record per status
+change, e.g. {"id": "18c2...", "status": "ongoing", "job": "..."}. On load
+it is folded into an in-memory dict, so membership checks are O(1) and the
+fetcher can skip known messages before any messages().get call.
+"""
+import json
+from pathlib import Path
+from datetime import datetime
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+EMAIL_DIR = SCRIPT_DIR.parent / "Email"
+LEDGER_FILE = EMAIL_DIR / "seen_messages.jsonl"
+
+# Status values written by the scripts
+STATUS_PROCESSING = "processing"  # saved to Email/Processing by fetch_emails
+STATUS_SPAM = "spam"              # dropped by the spam filter at fetch time
+STATUS_DISCARDED = "discarded"    # marked DISCARD and deleted by organize_emails
+STATUS_ONGOING = "ongoing"        # filed under Email/Ongoing/<job>
+STATUS_ARCHIVED = "archived"      # filed under Email/Archive/<job>
+
+# Rewrite the log once it holds this many superseded records
+COMPACT_THRESHOLD = 5000
+
+class MessageLedger:
+    """In-memory view of the seen-messages log with append-only persistence."""
+
+    def __init__(self, path=LEDGER_FILE, email_dir=None):
+        self.path = Path(path)
+        self.email_dir = Path(email_dir) if email_dir else self.path.parent
+        self.entries = {}
+        self.appended = 0
+        self._file = None
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            self._seed_from_folders()
+            return
+
+        lines = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line after a crash
+                lines += 1
+                self.entries[record['id']] = record
+
+        if lines - len(self.entries) > COMPACT_THRESHOLD:
+            self.compact()
+
+    def _seed_from_folders(self):
+        """Build the first ledger from emails already on disk."""
+        seeds = [(self.email_dir / "Processing", STATUS_PROCESSING, False)]
+        seeds += [(self.email_dir / "Ongoing", STATUS_ONGOING, True)]
+        seeds += [(self.email_dir / "Archive", STATUS_ARCHIVED, True)]
+
+        for folder, status, per_job in seeds:
+            if not folder.exists():
+                continue
+            files = folder.glob("*/*.json") if per_job else folder.glob("*.json")
+            for email_file in files:
+                if not email_file.stem or email_file.name.startswith(("unrelated_", "rejected_")):
+                    continue
+                record = {"id": email_file.stem, "status": status}
+                if per_job:
+                    record["job"] = email_file.parent.name
+                self.entries[email_file.stem] = record
+
+        # Emails already migrated into the segment store
+        index_file = self.email_dir / "Segments" / "index.json"
+        if index_file.exists():
+            with open(index_file, 'r', encoding='utf-8') as f:
+                postings = json.load(f).get('postings', {})
+            for location, jobs in postings.items():
+                status = STATUS_ARCHIVED if location == "Archive" else STATUS_ONGOING
+                for job, ids in jobs.items():
+                    for email_id in ids:
+                        self.entries[email_id] = {"id": email_id, "status": status, "job": job}
+
+        if self.entries:
+            print(f"  Seeded message ledger with {len(self.entries)} emails already on disk")
+            self.compact()
+
+    def __contains__(self, email_id):
+        return email_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def status(self, email_id):
+        """Return the last recorded status for a message, or None."""
+        record = self.entries.get(email_id)
+        return record['status'] if record else None
+
+    def record(self, email_id, status, job=None):
+        """Append a status change for a message."""
+        record = {"id": email_id, "status": status, "at": datetime.now().isoformat(timespec='seconds')}
+        if job:
+            record["job"] = job
+        self.entries[email_id] = record
+
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.appended += 1
+
+    def compact(self):
+        """Rewrite the log with only the latest record per message."""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".jsonl.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self.entries.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        tmp_path.replace(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,13 +1,17 @@
 """Organize emails from Processing into job-specific folders."""
 import json
-import re
+import argparse
 from pathlib import Path
-import shutil
+from email_store import open_store
+from job_index import JobIndex
+from jobs import load_jobs
+from journal import Journal, apply_ops, describe, replay
+from message_ledger import MessageLedger, STATUS_DISCARDED, STATUS_ONGOING, STATUS_ARCHIVED
+from routing_cache import Route, RoutingCache
+from sender_classifier import extract_email, load_classifier
 
 SCRIPT_DIR = Path(__file__).parent
 PROCESSING_DIR = SCRIPT_DIR.parent / "Email" / "Processing"
-ONGOING_DIR = SCRIPT_DIR.parent / "Email" / "Ongoing"
-ARCHIVE_DIR = SCRIPT_DIR.parent / "Email" / "Archive"
 SOLICITATIES_DIR = SCRIPT_DIR.parent / "Solicitaties"
 UNRELATED_SENDERS_FILE = PROCESSING_DIR / "unrelated_email_senders.json"
 REJECTED_COMPANIES_FILE = PROCESSING_DIR / "rejected_companies.json"
@@ -19,172 +23,29 @@ def load_json_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def save_json_file(file_path, data):
-    """Save data to JSON file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-def extract_sender_domain(email_from):
-    """Extract domain from email sender."""
-    # Extract email from "Name <email@domain.com>" format
-    match = re.search(r'<([^>]+)>', email_from)
-    if match:
-        email = match.group(1)
-    else:
-        email = email_from
-    
-    # Extract domain
-    if '@' in email:
-        return email.split('@')[-1].lower()
-    return None
-
-def get_all_job_folders():
-    """Get list of all job folders (active and archived)."""
-    all_jobs = []
-    
-    if not SOLICITATIES_DIR.exists():
-        return all_jobs
-    
-    # Active jobs
-    for folder in SOLICITATIES_DIR.iterdir():
-        if folder.is_dir() and folder.name != "1.Archief":
-            all_jobs.append(folder.name)
-            
-    # Archived jobs
-    archive_dir = SOLICITATIES_DIR / "1.Archief"
-    if archive_dir.exists():
-        for folder in archive_dir.iterdir():
-            if folder.is_dir():
-                all_jobs.append(folder.name)
-    
-    return all_jobs
-
-def is_job_archived(job_folder_name):
-    """Check if a job folder exists in the archive."""
-    archive_path = SOLICITATIES_DIR / "1.Archief" / job_folder_name
-    return archive_path.exists()
-
-def parse_job_folder_name(folder_name):
-    """Parse job folder name to extract job title and company."""
-    # Format: JobTitle_—_Company
-    parts = folder_name.split('_—_')
-    if len(parts) == 2:
-        job_title = parts[0].replace('_', ' ').lower()
-        company = parts[1].replace('_', ' ').lower()
-        return job_title, company
-    return None, None
-
-def calculate_match_score(folder_name, sender_email, subject, body):
-    """Calculate how well an email matches a job folder."""
-    job_title, company = parse_job_folder_name(folder_name)
-    if not job_title or not company:
-        return 0
-    
-    score = 0
-    sender_domain = extract_sender_domain(sender_email)
-    subject_lower = (subject or '').lower()
-    body_lower = (body or '').lower()[:500]  # Check first 500 chars of body
-    
-    # Check if sender domain matches company
-    if sender_domain:
-        company_parts = company.split()
-        for part in company_parts:
-            if len(part) > 3 and part in sender_domain:
-                score += 50  # Strong match on sender domain
-    
-    # Check for company name in subject/body
-    company_keywords = company.split()
-    for keyword in company_keywords:
-        if len(keyword) > 2:  # Skip very short words
-            if keyword in subject_lower:
-                score += 20
-            if keyword in body_lower:
-                score += 10
-    
-    # Check for job title keywords in subject/body
-    job_keywords = job_title.split()
-    for keyword in job_keywords:
-        if len(keyword) > 2:  # Skip very short words like "2a"
-            if keyword in subject_lower:
-                score += 15
-            if keyword in body_lower:
-                score += 5
-    
-    # Special handling for specific identifiers (like vacancy numbers)
-    # Extract potential vacancy numbers from folder name
-    vacancy_matches = re.findall(r'\d{5,}', folder_name)
-    for vacancy in vacancy_matches:
-        if vacancy in subject_lower or vacancy in body_lower:
-            score += 100  # Very strong match on vacancy number
-    
-    return score
-
-def get_job_folder(company, subject, email_from, body=""):
+def get_job_folder(job_index, company, subject, email_from, body="", route=None):
     """Determine the correct job folder based on email content."""
-    # Get all job folders (active and archived)
-    all_jobs = get_all_job_folders()
-    
-    if not all_jobs:
-        return None
-    
-    # If company is specified, filter to matching companies first
-    if company and company != "DISCARD":
-        company_lower = company.lower()
-        matching_jobs = []
-        
-        for folder in all_jobs:
-            _, folder_company = parse_job_folder_name(folder)
-            if folder_company and company_lower in folder_company:
-                matching_jobs.append(folder)
-        
-        # If we have company matches, use those; otherwise use all jobs
-        candidate_jobs = matching_jobs if matching_jobs else all_jobs
-    else:
-        candidate_jobs = all_jobs
-    
-    # Score each candidate job
-    best_match = None
-    best_score = 0
-    
-    for folder in candidate_jobs:
-        score = calculate_match_score(folder, email_from, subject, body)
-        if score > best_score:
-            best_score = score
-            best_match = folder
-    
-    # Only return a match if we have reasonable confidence (score > 10)
-    if best_score > 10:
-        return best_match
-    
-    # Fallback: if company specified, return first matching folder
-    if company and company != "DISCARD" and candidate_jobs:
-        return candidate_jobs[0]
-    
-    return None
+    # A routing cache hit wins unless the email was tagged for another company
+    if route and job_index.accepts(company, route.job):
+        return route.job
+    return job_index.match(company, subject, email_from, body)
 
-def organize_emails():
-    """Process emails in Processing folder and organize into job-specific folders."""
-    if not PROCESSING_DIR.exists():
-        print("No Processing directory found.")
-        return
-    
-    unrelated_senders = load_json_file(UNRELATED_SENDERS_FILE)
-    rejected_companies = load_json_file(REJECTED_COMPANIES_FILE)
-    
-    ONGOING_DIR.mkdir(parents=True, exist_ok=True)
-    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
-    
-    email_files = list(PROCESSING_DIR.glob("*.json"))
-    email_files = [f for f in email_files if f.name not in ['unrelated_email_senders.json', 'rejected_companies.json']]
-    
-    print(f"Processing {len(email_files)} emails...\n")
-    
-    discarded, archived, moved_ongoing, skipped = 0, 0, 0, 0
+def plan_emails(email_files, loaded, job_index, routing, unrelated_senders, rejected_companies):
+    """Decide where every email goes without touching the files.
+
+    Returns the journal operations and the counts for the summary. The
+    sender list, rejected companies, routing cache and aliases are only
+    updated in memory.
+    """
+    ops = []
+    counts = {"discarded": 0, "archived": 0, "ongoing": 0, "skipped": 0, "routed": 0}
     
     for email_file in email_files:
         try:
-            with open(email_file, 'r', encoding='utf-8-sig') as f:
-                email_data = json.load(f)
+            email_data = loaded.get(email_file)
+            if email_data is None:
+                with open(email_file, 'r', encoding='utf-8-sig') as f:
+                    email_data = json.load(f)
             
             company = email_data.get('company')
             response = email_data.get('response')
@@ -193,40 +54,56 @@ def organize_emails():
             body = email_data.get('body', '')
             
             if company is None and response is None:
-                skipped += 1
+                counts["skipped"] += 1
                 continue
             
             if company == "DISCARD":
-                sender_email = email_from.split('<')[-1].split('>')[0] if '<' in email_from else email_from
-                if sender_email and sender_email not in unrelated_senders:
-                    unrelated_senders.append(sender_email)
+                sender_email = extract_email(email_from)
+                if sender_email:
+                    unrelated_senders.add(sender_email)
                 
-                email_file.unlink()
-                discarded += 1
+                ops.append({"op": "delete", "path": str(email_file),
+                            "ledger": {"id": email_file.stem, "status": STATUS_DISCARDED}})
+                counts["discarded"] += 1
                 print(f"  ✓ Discarded: {subject[:50]}")
                 continue
             
-            job_folder = get_job_folder(company, subject, email_from, body)
+            # Prefer the route fetch_emails suggested, else ask the cache now
+            hint = email_data.get('routing')
+            if hint and hint.get('job'):
+                route = Route(hint['job'], hint.get('confidence', 0), hint.get('source'))
+            else:
+                route = routing.route(email_data.get('thread_id'), email_from)
+            try:
+                job_folder = get_job_folder(job_index, company, subject, email_from, body, route)
+            except LookupError as e:
+                print(f"  ✗ {email_file.name}: {e}")
+                print(f"    Set \"company\" to the exact job folder name to file it\n")
+                counts["skipped"] += 1
+                continue
             
             if not job_folder:
                 print(f"  ⚠ {email_file.name}: Unknown company '{company}', skipping")
-                skipped += 1
+                counts["skipped"] += 1
                 continue
             
+            if company and company not in job_index:
+                job_index.resolver.learn(company, job_index.companies[job_index.positions[job_folder]])
+            
+            if route and route.job == job_folder:
+                counts["routed"] += 1
+            routing.learn(email_data.get('thread_id'), email_from, job_folder)
+            
             # Check if job is archived - if so, always route to Archive
-            job_is_archived = is_job_archived(job_folder)
+            job_is_archived = job_index.is_archived(job_folder)
             
             if response in ["Rejected", "Expired"] or job_is_archived:
-                dest_base = ARCHIVE_DIR
-                dest_folder = dest_base / job_folder
-                dest_file = dest_folder / email_file.name
-                
                 if company and company not in rejected_companies:
                     rejected_companies.append(company)
                 
-                dest_folder.mkdir(parents=True, exist_ok=True)
-                shutil.move(str(email_file), str(dest_file))
-                archived += 1
+                ops.append({"op": "file", "src": str(email_file), "location": "Archive", "job": job_folder,
+                            "ledger": {"id": email_file.stem, "status": STATUS_ARCHIVED, "job": job_folder}})
+                counts["archived"] += 1
                 
                 if job_is_archived:
                     print(f"  ✓ Archived (Job Archived): {job_folder}")
@@ -234,13 +111,9 @@ def organize_emails():
                     print(f"  ✓ Archived ({response}): {job_folder}")
                 print(f"    {subject[:60]}\n")
             else:
-                dest_base = ONGOING_DIR
-                dest_folder = dest_base / job_folder
-                dest_file = dest_folder / email_file.name
-                
-                dest_folder.mkdir(parents=True, exist_ok=True)
-                shutil.move(str(email_file), str(dest_file))
-                moved_ongoing += 1
+                ops.append({"op": "file", "src": str(email_file), "location": "Ongoing", "job": job_folder,
+                            "ledger": {"id": email_file.stem, "status": STATUS_ONGOING, "job": job_folder}})
+                counts["ongoing"] += 1
                 print(f"  ✓ Ongoing: {job_folder} ({response or 'No response'})")
                 print(f"    {subject[:60]}\n")
             
@@ -248,20 +121,108 @@ def organize_emails():
             print(f"  ✗ Error processing {email_file.name}: {e}\n")
             continue
     
-    save_json_file(UNRELATED_SENDERS_FILE, unrelated_senders)
-    save_json_file(REJECTED_COMPANIES_FILE, rejected_companies)
+    return ops, counts
+
+def organize_emails(dry_run=False, store=None, ledger=None, classifier=None, jobs=None, routing=None):
+    """Process emails in Processing folder and organize into job-specific folders.
+    
+    All moves are planned first, written to a journal and then applied in
+    one batch, so a crash halfway is finished by the next run. The store,
+    ledger, sender list, job catalog and routing cache can be passed in by a
+    caller that already has them loaded (pipeline.py); a passed-in ledger is
+    left open.
+    """
+    if not PROCESSING_DIR.exists():
+        print("No Processing directory found.")
+        return
+    
+    own_ledger = ledger is None
+    if own_ledger:
+        ledger = MessageLedger()
+    if store is None:
+        store = open_store()
+    journal = Journal("organize_emails")
     
-    print(f"✓ Complete!")
-    print(f"  Discarded: {discarded}")
-    print(f"  Archived: {archived}")
-    print(f"  Moved to Ongoing: {moved_ongoing}")
-    print(f"  Skipped (unassigned): {skipped}")
+    if dry_run:
+        if journal.pending():
+            print(f"⚠ An unfinished run is journaled in {journal.path}; it is replayed on the next real run\n")
+    else:
+        replay(journal, store, ledger)
+    
+    unrelated_senders = classifier if classifier is not None else load_classifier(UNRELATED_SENDERS_FILE)
+    rejected_companies = load_json_file(REJECTED_COMPANIES_FILE)
+    
+    # Parse every job folder name once for the whole run
+    if jobs is None:
+        jobs = load_jobs(solicitaties_dir=SOLICITATIES_DIR)
+    job_index = JobIndex.from_catalog(jobs)
+    
+    if routing is None:
+        routing = RoutingCache()
+    if not routing.path.exists():
+        routing.seed(store)
+    routing.prune(job_index.names)
+    
+    email_files = list(PROCESSING_DIR.glob("*.json"))
+    email_files = [f for f in email_files if f.name not in ['unrelated_email_senders.json', 'rejected_companies.json']]
+    
+    print(f"{'Planning' if dry_run else 'Processing'} {len(email_files)} emails...\n")
+    
+    # Resolve all hand-typed companies in one batch
+    loaded = {}
+    for email_file in email_files:
+        try:
+            with open(email_file, 'r', encoding='utf-8-sig') as f:
+                loaded[email_file] = json.load(f)
+        except Exception:
+            pass  # Reported when the email itself is planned
+    job_index.prepare(email_data.get('company') for email_data in loaded.values())
+    
+    ops, counts = plan_emails(email_files, loaded, job_index, routing, unrelated_senders, rejected_companies)
+    
+    # The lists go first, so the senders of discarded emails are never lost
+    ops = [
+        {"op": "write_json", "path": str(UNRELATED_SENDERS_FILE), "data": unrelated_senders.entries, "indent": 0},
+        {"op": "write_json", "path": str(REJECTED_COMPANIES_FILE), "data": rejected_companies, "indent": 2},
+    ] + ops
+    
+    if dry_run:
+        print(f"Plan ({len(ops)} operations):")
+        for op in ops:
+            print(f"  {describe(op)}")
+        print(f"\n✓ Dry run, nothing changed")
+        if own_ledger:
+            ledger.close()
+        return
+    
+    journal.write(ops)
+    applied, already_done, failed = apply_ops(ops, store, ledger)
+    store.save()
+    routing.save()
+    job_index.resolver.save()
+    if own_ledger:
+        ledger.close()
+    if failed:
+        raise RuntimeError(f"{failed} operation(s) failed; they are retried from {journal.path} on the next run")
+    journal.clear()
+    
+    print(f"✓ Complete! ({applied} operations applied)")
+    print(f"  Discarded: {counts['discarded']}")
+    print(f"  Archived: {counts['archived']}")
+    print(f"  Moved to Ongoing: {counts['ongoing']}")
+    print(f"  Skipped (unassigned): {counts['skipped']}")
+    print(f"  Routed by thread/sender cache: {counts['routed']}")
     print(f"\n  Tracking {len(unrelated_senders)} unrelated senders")
     print(f"  Tracking {len(rejected_companies)} rejected companies")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Organize emails from Processing into job folders")
+    parser.add_argument("--dry-run", action="store_true", help="Print the planned moves without changing anything")
+    return parser.parse_args()
+
 if __name__ == "__main__":
     try:
-        organize_emails()
+        organize_emails(dry_run=parse_args().dry_run)
     except Exception as e:
         print(f"ERROR: {e}")
         exit(1)
@@ -0,0 +1,122 @@
+"""Content-addressed archive of raw vacancy pages, per job folder.
+
+fetch_job_pages.py stores every response body it downloads under the job's
+page_archive/ folder as <sha256>.html.gz, so the same page fetched twice
+costs one file. page_archive/index.json lists the versions, the most
+recently seen last, with the URL and when that body was first and last
+seen. Pages rendered in headless Chromium (render_pages.py) are stored
+next to the plain HTTP responses, marked rendered. Because the raw
+HTML is kept, webpage.txt can be regenerated with a better extractor
+(extract_pages.py reextract) without contacting the employer sites again.
+
+The archive lives inside the job folder, so it moves along when
+archive_jobs.py moves the job to 1.Archief.
+
+Usage: python scripts/page_archive.py [stats]
+"""
+import os
+import sys
+import gzip
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+from jobs import load_jobs
+
+ARCHIVE_DIR_NAME = "page_archive"
+INDEX_FILE_NAME = "index.json"
+
+def archive_dir(job_path):
+    return job_path / ARCHIVE_DIR_NAME
+
+def page_path(job_path, sha256):
+    """Return the path a raw page with this hash is stored at."""
+    return archive_dir(job_path) / f"{sha256}.html.gz"
+
+def load_index(job_path):
+    """The versions stored for a job, oldest first; [] if there are none."""
+    index_file = archive_dir(job_path) / INDEX_FILE_NAME
+    if not index_file.exists():
+        return []
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"  ⚠ Unreadable {index_file}: {e}")
+        return []
+
+def save_index(job_path, index):
+    index_file = archive_dir(job_path) / INDEX_FILE_NAME
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=index_file.parent,
+                                     prefix=index_file.name + '.', suffix='.tmp', delete=False) as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(f.name, index_file)
+
+def put_page(job_path, url, content, content_type=None, rendered=False):
+    """Store a raw response body for a job and return its SHA-256.
+
+    A body that is already stored for this URL only refreshes its
+    last_seen and moves to the end, so alternating between an HTTP
+    response and its rendered version does not grow the index.
+    """
+    sha256 = hashlib.sha256(content).hexdigest()
+    path = page_path(job_path, sha256)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # mtime=0 keeps the compressed file identical for identical content, so a
+        # fetch and a reextract or render storing the same page may both replace it
+        with tempfile.NamedTemporaryFile('wb', dir=path.parent, prefix=path.name + '.',
+                                         suffix='.tmp', delete=False) as f:
+            f.write(gzip.compress(content, mtime=0))
+        os.replace(f.name, path)
+
+    now = datetime.now().isoformat(timespec='seconds')
+    index = load_index(job_path)
+    known = [entry for entry in index if entry["sha256"] == sha256 and entry["url"] == url]
+    if known:
+        index.remove(known[0])
+        entry = dict(known[0], last_seen=now)
+    else:
+        entry = {"sha256": sha256, "url": url, "content_type": content_type, "size": len(content),
+                 "rendered": rendered, "first_seen": now, "last_seen": now}
+    index.append(entry)
+    save_index(job_path, index)
+    return sha256
+
+def latest_page(job_path, rendered=None):
+    """The most recently seen index entry of a job, or None if nothing is archived.
+
+    rendered=True or False only considers rendered or plain HTTP versions.
+    """
+    index = [entry for entry in load_index(job_path)
+             if rendered is None or entry.get("rendered", False) == rendered]
+    return index[-1] if index else None
+
+def read_page(job_path, sha256):
+    with gzip.open(page_path(job_path, sha256), 'rb') as f:
+        return f.read()
+
+def print_stats():
+    jobs = load_jobs()
+    archived = [(job, load_index(job.path)) for job in jobs]
+    archived = [(job, index) for job, index in archived if index]
+    files = [path for job, _ in archived for path in archive_dir(job.path).glob("*.html.gz")]
+    raw = sum(entry["size"] for _, index in archived for entry in index)
+    stored = sum(path.stat().st_size for path in files)
+    print(f"Jobs with archived pages: {len(archived)} of {len(jobs)}")
+    print(f"  Versions: {sum(len(index) for _, index in archived)}, files: {len(files)}")
+    print(f"  Raw size: {raw / 1024:.0f} KiB, stored compressed: {stored / 1024:.0f} KiB")
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        print_stats()
+    else:
+        raise SystemExit(f"Unknown command: {command}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
@@ -0,0 +1,180 @@
+"""Run the update_project workflow stages in one process.
+
+Each stage used to be its own python process, paying interpreter and
+Google client start-up and re-loading the same data. Here the stages share
+one PipelineState: the job catalog, the email store, the message ledger, the
+unrelated-sender list and the routing cache are loaded once, when the first
+stage needs them, and handed to every later stage.
+
+Stages, in order:
+    fetch      fetch_emails.py              (Gmail -> Email/Processing)
+    organize   organize_emails.py           (Processing -> Ongoing/Archive)
+    stats      update_stats.py
+    archive    archive_jobs.py
+    letters    extract_previous_letters.py
+
+Usage:
+    python scripts/pipeline.py                                    # All stages
+    python scripts/pipeline.py --stages fetch                     # Then tag emails by hand
+    python scripts/pipeline.py --stages organize,stats,archive,letters
+    python scripts/pipeline.py --incremental                      # History sync, incremental stats
+    python scripts/pipeline.py --dry-run                          # Print the moves, write nothing
+
+--dry-run only runs organize and archive, which print their moves instead
+of making them; the other stages have no dry-run mode and are skipped.
+"""
+import time
+import argparse
+from email_store import open_store
+from jobs import load_jobs
+from message_ledger import MessageLedger
+from routing_cache import RoutingCache
+from sender_classifier import UNRELATED_SENDERS_FILE, load_classifier
+
+STAGES = ("fetch", "organize", "stats", "archive", "letters")
+DRY_RUN_STAGES = ("organize", "archive")
+
+class PipelineState:
+    """Objects shared between stages, each loaded on first use."""
+
+    def __init__(self):
+        self._jobs = None
+        self._store = None
+        self._ledger = None
+        self._classifier = None
+        self._routing = None
+
+    @property
+    def jobs(self):
+        if self._jobs is None:
+            self._jobs = load_jobs()
+        return self._jobs
+
+    def invalidate_jobs(self):
+        """Forget the catalog after job folders were moved."""
+        self._jobs = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = open_store()
+        return self._store
+
+    @property
+    def ledger(self):
+        if self._ledger is None:
+            self._ledger = MessageLedger()
+        return self._ledger
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            self._classifier = load_classifier(UNRELATED_SENDERS_FILE)
+        return self._classifier
+
+    @property
+    def routing(self):
+        if self._routing is None:
+            self._routing = RoutingCache()
+        return self._routing
+
+    def close(self):
+        if self._store is not None:
+            self._store.save()
+        if self._ledger is not None:
+            self._ledger.close()
+
+def run_fetch(state, args):
+    # Imported here so the other stages run without the Google client libraries
+    from fetch_emails import fetch_emails
+    fetch_emails(incremental=args.incremental, classifier=state.classifier,
+                 ledger=state.ledger, routing=state.routing)
+
+def run_organize(state, args):
+    from organize_emails import organize_emails
+    organize_emails(dry_run=args.dry_run, store=state.store, ledger=state.ledger,
+                    classifier=state.classifier, jobs=state.jobs, routing=state.routing)
+
+def run_stats(state, args):
+    from update_stats import update_stats
+    update_stats(incremental=args.incremental, jobs=state.jobs, store=state.store)
+
+def run_archive(state, args):
+    from archive_jobs import archive_jobs
+    if archive_jobs(dry_run=args.dry_run, jobs=state.jobs):
+        state.invalidate_jobs()
+
+def run_letters(state, args):
+    from extract_previous_letters import extract_previous_letters, write_letters_json
+    letters, output_path = extract_previous_letters(jobs=state.jobs)
+    write_letters_json(letters, output_path)
+
+RUNNERS = {
+    "fetch": run_fetch,
+    "organize": run_organize,
+    "stats": run_stats,
+    "archive": run_archive,
+    "letters": run_letters,
+}
+
+def parse_stages(value):
+    stages = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(STAGES)}")
+    return stages
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the update_project workflow in one process")
+    parser.add_argument("--stages", type=parse_stages, default=list(STAGES),
+                        help=f"Comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument("--skip", type=parse_stages, default=[], help="Comma-separated stages to leave out")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch via Gmail history and only update changed jobs' stats")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only print the moves organize and archive would make; skip the other stages")
+    return parser.parse_args(argv)
+
+def run_pipeline(stages, args):
+    """Run the given stages in workflow order; returns [(stage, seconds, ok)]."""
+    state = PipelineState()
+    timings = []
+    try:
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            if args.dry_run and stage not in DRY_RUN_STAGES:
+                print(f"\n  ⚠ Skipping {stage}: it has no dry-run mode and would write files")
+                continue
+            print(f"\n{'=' * 60}\n▶ {stage}\n{'=' * 60}")
+            start = time.perf_counter()
+            try:
+                RUNNERS[stage](state, args)
+            except Exception as e:
+                timings.append((stage, time.perf_counter() - start, False))
+                print(f"  ✗ {stage} failed: {e}")
+                print(f"  Later stages depend on it, stopping")
+                break
+            timings.append((stage, time.perf_counter() - start, True))
+    finally:
+        state.close()
+    return timings
+
+def main():
+    args = parse_args()
+    stages = [s for s in args.stages if s not in args.skip]
+    timings = run_pipeline(stages, args)
+
+    print(f"\n{'=' * 60}\nPipeline timing")
+    for stage, seconds, ok in timings:
+        print(f"  {'✓' if ok else '✗'} {stage:<10}{seconds:>8.2f}s")
+    print(f"    {'total':<10}{sum(t for _, t, _ in timings):>8.2f}s")
+    if not all(ok for _, _, ok in timings):
+        exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
@@ -0,0 +1,230 @@
+"""Render JavaScript-only vacancy pages in headless Chromium.
+
+Many ATS pages (Workday, Recruitee, ...) send requests an empty shell and
+build the vacancy in JavaScript, so fetch_job_pages.py extracts almost no
+text from them. This stage renders such pages in a pool of Chromium tabs:
+the browser is launched once per run, --concurrency tabs are opened in one
+context and reused for every page, and images, fonts and media are never
+loaded. The rendered HTML is archived (page_archive.py, marked rendered)
+and extracted into webpage.txt like a fetched page.
+
+fetch_job_pages.py runs this stage itself for the pages that came back
+(nearly) empty. On its own it renders every active job whose webpage.txt
+has less than MIN_PAGE_SIZE characters of text, or the jobs given.
+
+Needs: pip install playwright && playwright install chromium
+(or --browser pointing at an installed Chrome/Chromium)
+
+Usage:
+    python scripts/render_pages.py [--concurrency 4] [--timeout 30] [--browser PATH] [JOB ...]
+"""
+import time
+import asyncio
+import argparse
+from jobs import load_jobs
+from page_archive import put_page
+from extract_pages import extract_text
+from fetch_job_pages import HEADERS, MIN_PAGE_SIZE, PageResult, read_saved_text, save_text
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+except ImportError:
+    async_playwright = PlaywrightTimeout = None
+
+RENDER_CONCURRENCY = 4
+RENDER_TIMEOUT = 30   # Seconds for a page to load
+SETTLE_TIMEOUT = 5    # Extra seconds for the page's own requests to finish
+BLOCKED_RESOURCES = {"image", "media", "font"}
+
+class BrowserPool:
+    """One headless Chromium with a fixed number of reusable tabs.
+
+    Use as an async context manager; render() waits for a free tab, so the
+    number of tabs is also the concurrency cap. A tab that fails is closed
+    and replaced; if no replacement can be opened, even in a new context,
+    the pool shrinks, and once no tab is left every render raises.
+    """
+
+    def __init__(self, size=RENDER_CONCURRENCY, timeout=RENDER_TIMEOUT, executable_path=None):
+        self.size = size
+        self.timeout = timeout
+        self.executable_path = executable_path
+        self.tabs = asyncio.Queue()
+        self.live_tabs = 0
+        self.playwright = None
+        self.browser = None
+        self.context = None
+
+    async def __aenter__(self):
+        if async_playwright is None:
+            raise RuntimeError("playwright is not installed (pip install playwright && playwright install chromium)")
+        self.playwright = await async_playwright().start()
+        try:
+            self.browser = await self.playwright.chromium.launch(headless=True, executable_path=self.executable_path)
+            self.context = await self._new_context()
+            for _ in range(self.size):
+                self.tabs.put_nowait(await self.context.new_page())
+                self.live_tabs += 1
+        except Exception:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.browser = self.playwright = None
+
+    async def _route(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self):
+        context = await self.browser.new_context(user_agent=HEADERS['User-Agent'])
+        await context.route("**/*", self._route)
+        return context
+
+    async def _replace_tab(self, tab):
+        """Close a failed tab and open a new one; None if the browser gives none."""
+        try:
+            await tab.close()
+        except Exception:
+            pass  # Already gone with a crashed renderer
+        try:
+            return await self.context.new_page()
+        except Exception:
+            pass
+        try:
+            # The context itself may be broken; later tabs go to a fresh one
+            self.context = await self._new_context()
+            return await self.context.new_page()
+        except Exception as e:
+            self.live_tabs -= 1
+            print(f"  ⚠ Could not replace a browser tab ({str(e).strip().splitlines()[0]}); "
+                  f"{self.live_tabs} tabs left")
+            if self.live_tabs == 0:
+                self.tabs.put_nowait(None)  # Wakes the renders still waiting for a tab
+            return None
+
+    async def render(self, url):
+        """Return (status, html bytes) of url after its scripts ran."""
+        tab = await self.tabs.get()
+        if tab is None:
+            self.tabs.put_nowait(None)  # For the next waiter
+            raise RuntimeError("No working browser tabs left")
+        try:
+            response = await tab.goto(url, wait_until="load", timeout=self.timeout * 1000)
+            try:
+                await tab.wait_for_load_state("networkidle", timeout=SETTLE_TIMEOUT * 1000)
+            except PlaywrightTimeout:
+                pass  # Trackers that never go quiet; the vacancy is usually there by now
+            return (response.status if response else None), (await tab.content()).encode('utf-8')
+        except Exception:
+            # A tab that hung or crashed is never handed out again
+            tab = await self._replace_tab(tab)
+            raise
+        finally:
+            if tab is not None:
+                self.tabs.put_nowait(tab)
+
+async def render_page(pool, job, url):
+    result = PageResult(job, url)
+    start = time.perf_counter()
+    try:
+        result.status, result.content = await pool.render(url)
+        result.size = len(result.content)
+        result.content_type = "text/html; charset=utf-8"
+        if result.status and result.status >= 400:
+            result.error = f"HTTP {result.status} for {url}"
+        else:
+            result.text = await asyncio.to_thread(extract_text, result.content)
+    except Exception as e:
+        result.error = str(e).strip().splitlines()[0]  # Playwright appends a call log
+    result.latency = time.perf_counter() - start
+    return result
+
+async def render_pages(targets, concurrency=RENDER_CONCURRENCY, timeout=RENDER_TIMEOUT,
+                       executable_path=None, on_result=None):
+    """Render [(job, url)] in one browser; returns PageResults in completion order."""
+    results = []
+    async with BrowserPool(concurrency, timeout, executable_path) as pool:
+        tasks = [asyncio.create_task(render_page(pool, job, url)) for job, url in targets]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if on_result:
+                on_result(result)
+            results.append(result)
+    return results
+
+def save_rendered(result):
+    """Archive a rendered page and save its text; sets result.outcome."""
+    if not result.ok:
+        result.outcome = "error"
+        print(f"  ✗ {result.job.name}: {result.error}")
+        return
+
+    put_page(result.job.path, result.url, result.content, result.content_type, rendered=True)
+    result.content = None
+
+    if len(result.text) < MIN_PAGE_SIZE:
+        result.outcome = "empty"
+        print(f"  ⚠ {result.job.name}: still only {len(result.text)} characters after rendering")
+        return
+    save_text(result)
+
+def render_and_save(targets, concurrency=RENDER_CONCURRENCY, timeout=RENDER_TIMEOUT, executable_path=None):
+    """Render and save the pages; returns their PageResults."""
+    start = time.perf_counter()
+    results = asyncio.run(render_pages(targets, concurrency, timeout, executable_path, on_result=save_rendered))
+    print(f"\n  Rendered {len(results)} pages in {time.perf_counter() - start:.1f}s ({concurrency} tabs)")
+    return results
+
+def collect_targets(names=None):
+    """[(job, url)] for the given jobs, or every active job with a (nearly) empty webpage.txt."""
+    targets = []
+    for job in load_jobs(include_archived=bool(names)):
+        link = job.info.get("Link") if job.info else None
+        if not link:
+            continue
+        if names:
+            if job.name in names:
+                targets.append((job, link))
+            continue
+        saved_text = read_saved_text(job.path / "webpage.txt")
+        if saved_text is None or len(saved_text) < MIN_PAGE_SIZE:
+            targets.append((job, link))
+    return targets
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render JavaScript-only vacancy pages in headless Chromium")
+    parser.add_argument("jobs", nargs="*", help="Job folder names (default: active jobs with an empty webpage.txt)")
+    parser.add_argument("--concurrency", type=int, default=RENDER_CONCURRENCY, help="Browser tabs rendering at once")
+    parser.add_argument("--timeout", type=float, default=RENDER_TIMEOUT, help="Seconds for a page to load")
+    parser.add_argument("--browser", default=None, help="Chrome/Chromium executable instead of playwright's own")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    targets = collect_targets(set(args.jobs))
+    if not targets:
+        print("No pages to render.")
+        return
+    print(f"Rendering {len(targets)} pages in headless Chromium ({args.concurrency} tabs)...\n")
+    results = render_and_save(targets, args.concurrency, args.timeout, args.browser)
+    counts = {name: sum(r.outcome == name for r in results) for name in ("new", "changed", "unchanged", "empty", "error")}
+    print(f"\nFinished. New: {counts['new']}, Changed: {counts['changed']}, Unchanged: {counts['unchanged']}, "
+          f"Still empty: {counts['empty']}, Errors: {counts['error']}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
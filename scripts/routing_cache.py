@@ -0,0 +1,180 @@
+"""Routing cache: which job folder a thread, sender or domain belongs to.
+
+Follow-up mails in the same Gmail thread, or from the same recruiter,
+almost always belong to the job folder the first mail was filed under.
+organize_emails.py records every filed email here, keyed by:
+
+- thread_id        (confidence 0.95)
+- sender address   (confidence 0.85, not for shared ATS addresses)
+- sender domain    (confidence 0.60, not for free-mail or ATS domains)
+
+The base confidence is scaled by how often the key agreed with the job it
+maps to, so a recruiter who mails about two jobs drops below the routing
+threshold instead of sending everything to one of them. fetch_emails.py
+adds the hit as a "routing" hint to new emails in Email/Processing; once a
+response is set, organize_emails.py files the email there without
+re-scoring every job.
+
+Entries expire after ROUTE_TTL_DAYS without a new email, when their job
+folder no longer exists, or when a table grows beyond MAX_ROUTES.
+"""
+import json
+from pathlib import Path
+from datetime import datetime, timedelta
+from sender_classifier import extract_email
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROUTING_CACHE_FILE = SCRIPT_DIR.parent / "Email" / "routing_cache.json"
+
+CACHE_VERSION = 1
+KINDS = ("thread", "sender", "domain")
+BASE_CONFIDENCE = {"thread": 0.95, "sender": 0.85, "domain": 0.60}
+MIN_CONFIDENCE = 0.5
+ROUTE_TTL_DAYS = 180
+MAX_ROUTES = 10000  # Per table, least recently seen entries go first
+
+# Free-mail domains: a recruiter's own address is fine, the domain is not
+FREEMAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'hotmail.com', 'outlook.com', 'live.com', 'live.nl',
+    'yahoo.com', 'icloud.com', 'ziggo.nl', 'kpnmail.nl',
+}
+
+# Applicant tracking systems send for many employers from shared no-reply
+# addresses, so neither the address nor the domain says anything about the job
+ATS_DOMAINS = {
+    'myworkday.com', 'workday.com', 'recruitee.com', 'greenhouse.io', 'lever.co',
+    'homerun.co', 'smartrecruiters.com', 'successfactors.com', 'successfactors.eu',
+    'teamtailor.com', 'jobylon.com', 'linkedin.com', 'indeed.com',
+}
+
+def company_of(job):
+    """Company part of a job folder name, as organize_emails expects it."""
+    parts = job.split("_—_")
+    return parts[1].replace("_", " ") if len(parts) == 2 else None
+
+def route_keys(thread_id, email_from):
+    """Return [(kind, key)] for an email, most specific first."""
+    keys = []
+    if thread_id:
+        keys.append(("thread", thread_id))
+    sender = extract_email(email_from)
+    if sender and '@' in sender:
+        domain = sender.rpartition('@')[2]
+        if domain in ATS_DOMAINS:
+            return keys
+        keys.append(("sender", sender))
+        if domain and domain not in FREEMAIL_DOMAINS:
+            keys.append(("domain", domain))
+    return keys
+
+class Route:
+    """A cache hit: the job, how sure the cache is, and which key matched."""
+
+    def __init__(self, job, confidence, source):
+        self.job = job
+        self.confidence = confidence
+        self.source = source
+
+    @property
+    def company(self):
+        return company_of(self.job)
+
+    def as_dict(self):
+        return {"job": self.job, "confidence": round(self.confidence, 2), "source": self.source}
+
+    def __repr__(self):
+        return f"Route({self.job!r}, {self.confidence:.2f}, {self.source!r})"
+
+class RoutingCache:
+    """Persistent thread/sender/domain -> job folder map."""
+
+    def __init__(self, path=ROUTING_CACHE_FILE):
+        self.path = Path(path)
+        self.tables = {kind: {} for kind in KINDS}
+        self.dirty = False
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    for kind in KINDS:
+                        self.tables[kind] = data.get(kind, {})
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"  Warning: Ignoring unreadable routing cache ({e})")
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    @staticmethod
+    def confidence(kind, entry):
+        return BASE_CONFIDENCE[kind] * entry['hits'] / (entry['hits'] + entry['conflicts'])
+
+    def route(self, thread_id, email_from, min_confidence=MIN_CONFIDENCE):
+        """Return the best Route for an email, or None if nothing is confident enough."""
+        for kind, key in route_keys(thread_id, email_from):
+            entry = self.tables[kind].get(key)
+            if entry:
+                confidence = self.confidence(kind, entry)
+                if confidence >= min_confidence:
+                    return Route(entry['job'], confidence, kind)
+        return None
+
+    def learn(self, thread_id, email_from, job, when=None):
+        """Record that an email with these keys was filed under job."""
+        seen = (when or datetime.now()).isoformat(timespec='seconds')
+        for kind, key in route_keys(thread_id, email_from):
+            table = self.tables[kind]
+            entry = table.get(key)
+            if entry is None:
+                table[key] = {"job": job, "hits": 1, "conflicts": 0, "last_seen": seen}
+            elif entry['job'] == job:
+                entry['hits'] += 1
+                entry['last_seen'] = seen
+            else:
+                entry['conflicts'] += 1
+                entry['last_seen'] = seen
+                if entry['conflicts'] > entry['hits']:
+                    # The key has moved on to another job
+                    table[key] = {"job": job, "hits": 1, "conflicts": 0, "last_seen": seen}
+        self.dirty = True
+
+    def prune(self, known_jobs=None, now=None):
+        """Evict expired entries, entries of vanished job folders and the overflow."""
+        cutoff = ((now or datetime.now()) - timedelta(days=ROUTE_TTL_DAYS)).isoformat(timespec='seconds')
+        known_jobs = set(known_jobs) if known_jobs is not None else None
+        removed = 0
+
+        for kind, table in self.tables.items():
+            stale = [
+                key for key, entry in table.items()
+                if entry['last_seen'] < cutoff or (known_jobs is not None and entry['job'] not in known_jobs)
+            ]
+            if len(table) - len(stale) > MAX_ROUTES:
+                stale_keys = set(stale)
+                keep = sorted((k for k in table if k not in stale_keys),
+                              key=lambda k: table[k]['last_seen'], reverse=True)
+                stale.extend(keep[MAX_ROUTES:])
+            for key in stale:
+                del table[key]
+            removed += len(stale)
+
+        self.dirty |= bool(removed)
+        return removed
+
+    def seed(self, store):
+        """Build a first cache from the emails already filed in an email store."""
+        for location in ("Ongoing", "Archive"):
+            for job in store.jobs(location):
+                for email_data in store.iter_emails(location, job):
+                    self.learn(email_data.get('thread_id'), email_data.get('from'), job)
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, **self.tables}, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(self.path)
+        self.dirty = False
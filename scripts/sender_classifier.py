@@ -0,0 +1,137 @@
+"""Classify email senders against the unrelated-senders list.
+
+Shared by fetch_emails.py (spam filter) and organize_emails.py (learning
+new unrelated senders). Entries in unrelated_email_senders.json can be:
+
+- a full address:        news@example.com
+- a domain:              example.com or @example.com (also matches subdomains)
+- a wildcard pattern:    *@mailchimp*
+
+Exact addresses and domains are hashed lookups; all wildcards and all job
+keywords are compiled into one regex each, so a check costs the same with
+ten entries as with ten thousand.
+"""
+import re
+import json
+import fnmatch
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+UNRELATED_SENDERS_FILE = SCRIPT_DIR.parent / "Email" / "Processing" / "unrelated_email_senders.json"
+
+# Job-related keywords for safety check
+JOB_KEYWORDS = [
+    'sollicitatie', 'vacature', 'application', 'vacancy',
+    'interview', 'recruitment', 'career', 'job',
+    'werving', 'selectie', 'hiring', 'baan',
+]
+
+def extract_email(from_field):
+    """Extract email address from 'From' field."""
+    if not from_field:
+        return None
+
+    # Look for email in angle brackets
+    match = re.search(r'<([^>]+)>', from_field)
+    if match:
+        return match.group(1).strip().lower()
+
+    # Otherwise assume entire field is email
+    return from_field.strip().lower()
+
+def is_wildcard(entry):
+    return '*' in entry or '?' in entry
+
+def is_domain(entry):
+    return entry.startswith('@') or '@' not in entry
+
+class SenderClassifier:
+    """Compiled matcher for unrelated senders and job keywords."""
+
+    def __init__(self, entries=(), keywords=JOB_KEYWORDS):
+        self.addresses = set()
+        self.domains = set()
+        self.patterns = set()
+        self._pattern_re = None
+        self._keyword_re = re.compile("|".join(re.escape(k.lower()) for k in keywords))
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        """Add a sender entry; returns False if it was already known."""
+        entry = (entry or '').strip().lower()
+        if not entry or entry in self:
+            return False
+
+        if is_wildcard(entry):
+            self.patterns.add(entry)
+            self._pattern_re = None
+        elif is_domain(entry):
+            self.domains.add(entry.lstrip('@'))
+        else:
+            self.addresses.add(entry)
+        return True
+
+    def __contains__(self, entry):
+        entry = (entry or '').strip().lower()
+        if is_wildcard(entry):
+            return entry in self.patterns
+        if is_domain(entry):
+            return entry.lstrip('@') in self.domains
+        return entry in self.addresses
+
+    def __len__(self):
+        return len(self.addresses) + len(self.domains) + len(self.patterns)
+
+    @property
+    def entries(self):
+        """All entries in their persisted form, sorted."""
+        return sorted(self.addresses | {f"@{d}" for d in self.domains} | self.patterns)
+
+    def matches_sender(self, address):
+        """Check an address against exact, domain-suffix and wildcard entries."""
+        if not address:
+            return False
+        address = address.lower()
+        if address in self.addresses:
+            return True
+
+        domain = address.rpartition('@')[2]
+        if self.domains:
+            labels = domain.split('.')
+            for i in range(len(labels) - 1):
+                if '.'.join(labels[i:]) in self.domains:
+                    return True
+
+        if self.patterns:
+            if self._pattern_re is None:
+                self._pattern_re = re.compile("|".join(fnmatch.translate(p) for p in sorted(self.patterns)))
+            if self._pattern_re.match(address):
+                return True
+
+        return False
+
+    def has_job_keyword(self, subject):
+        return bool(subject) and self._keyword_re.search(subject.lower()) is not None
+
+    def is_spam(self, email_from, subject):
+        """Check if email is from known spam sender."""
+        if not self.matches_sender(extract_email(email_from)):
+            return False
+        # Safety check: never filter job-related emails
+        return not self.has_job_keyword(subject)
+
+def load_classifier(path=UNRELATED_SENDERS_FILE):
+    """Load the unrelated senders list into a classifier."""
+    path = Path(path)
+    if not path.exists():
+        return SenderClassifier()
+    with open(path, 'r', encoding='utf-8') as f:
+        return SenderClassifier(json.load(f))
+
+def save_classifier(classifier, path=UNRELATED_SENDERS_FILE):
+    """Save the classifier as a sorted, de-duplicated JSON list, one entry per line."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(classifier.entries, f, indent=0, ensure_ascii=False)
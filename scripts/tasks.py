@@ -0,0 +1,293 @@
+"""Make-style task graph over the project's scripts.
+
+Every task declares the script it runs, the files it reads (glob patterns)
+and the files it writes. A task is skipped when the content hash of its
+inputs and outputs matches the hash recorded after its last successful
+run; change a relevant_info.json and only the tasks reading it run again.
+Hashes are recorded after a task has run, so tasks that rewrite their own
+inputs (update_stats rewriting stats.json) are up to date afterwards.
+
+Tasks run as separate python processes. Branches of the graph run in
+parallel (fetch_job_pages alongside fetch_emails, generate_cv alongside
+everything); a task only starts once all its dependencies succeeded.
+Running in parallel is only safe when neither task writes what the other
+reads, so a task that writes another task's inputs must be ordered before
+or after it through deps. check_graph() enforces this on the declared
+outputs: update_stats and calculate_potential both rewrite stats.json, so
+everything reading stats.json waits for both.
+
+File hashes are cached in data/tasks_state.json by (mtime, size), so a
+no-op run only stats the input files.
+
+Usage:
+    python scripts/tasks.py                       # Everything that is out of date
+    python scripts/tasks.py generate_deadlines    # A target and what it depends on
+    python scripts/tasks.py --list                # Show the graph and what is stale
+    python scripts/tasks.py --force update_stats  # Run even if up to date
+    python scripts/tasks.py -j 2                  # At most two tasks at a time
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import argparse
+import subprocess
+from datetime import date
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+STATE_FILE = PROJECT_ROOT / "data" / "tasks_state.json"
+
+STATE_VERSION = 1
+
+JOB_INFO = ["Solicitaties/**/relevant_info.json"]
+JOB_STATS = ["Solicitaties/**/stats.json"]
+
+class Task:
+    """One script with its inputs, outputs and dependencies.
+
+    always: run every time (the inputs live outside the repository, e.g. Gmail)
+    daily:  today's date counts as an input (deadlines expire without any file changing)
+    """
+
+    def __init__(self, name, script, inputs=(), outputs=(), deps=(), args=(), always=False, daily=False):
+        self.name = name
+        self.script = script
+        self.inputs = [script, *inputs]  # Editing the script reruns the task
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.args = list(args)
+        self.always = always
+        self.daily = daily
+
+    def command(self):
+        return [sys.executable, str(PROJECT_ROOT / self.script), *self.args]
+
+TASKS = {task.name: task for task in [
+    Task("fetch_emails", "scripts/fetch_emails.py", always=True),
+    Task("fetch_job_pages", "scripts/fetch_job_pages.py",
+         inputs=["Solicitaties/*/relevant_info.json"], outputs=["Solicitaties/*/webpage.txt"]),
+    Task("organize_emails", "scripts/organize_emails.py", deps=["fetch_emails"],
+         inputs=["Email/Processing/*.json", *JOB_INFO]),
+    Task("update_stats", "scripts/update_stats.py", deps=["organize_emails"], daily=True,
+         inputs=[*JOB_INFO, *JOB_STATS, "Email/Summaries/*.json"], outputs=JOB_STATS),
+    # Moves job folders, so it waits for everything writing into them
+    Task("archive_jobs", "scripts/archive_jobs.py", deps=["update_stats", "fetch_job_pages"],
+         inputs=JOB_STATS),
+    Task("calculate_potential", "Baan_analyze/Code-en-Data/calculate_Job_Potentential.py",
+         deps=["archive_jobs"], inputs=[*JOB_INFO, *JOB_STATS], outputs=JOB_STATS),
+    Task("plot_potential", "Baan_analyze/Code-en-Data/plot_potential_jobs.py",
+         deps=["calculate_potential"], inputs=JOB_STATS, outputs=["Baan_analyze/job_potential.png"]),
+    Task("generate_deadlines", "scripts/generate_deadlines.py", deps=["calculate_potential"],
+         inputs=[*JOB_INFO, *JOB_STATS], outputs=["data/deadlines.txt"]),
+    Task("extract_previous_letters", "scripts/extract_previous_letters.py", deps=["archive_jobs"],
+         inputs=["Solicitaties/**/Motivatie.txt"], outputs=["data/Vorige solicitatie brieven.json"]),
+    Task("generate_cv", "SimpleCV/generate_cv.py",
+         inputs=["SimpleCV/CV.md", "SimpleCV/*.jpg", "SimpleCV/Thesis_page.png"],
+         outputs=["SimpleCV/CV.html", "SimpleCV/CV.pdf", "SimpleCV/CV.png"]),
+]}
+
+def ancestors(name):
+    """Every task that has to finish before this one."""
+    found, todo = set(), list(TASKS[name].deps)
+    while todo:
+        dep = todo.pop()
+        if dep not in found:
+            found.add(dep)
+            todo.extend(TASKS[dep].deps)
+    return found
+
+def check_graph():
+    """Raise if two tasks that may run in parallel write each other's inputs or outputs."""
+    for writer in TASKS.values():
+        written = set(writer.outputs)
+        for other in TASKS.values():
+            if other is writer or not written & set(other.inputs + other.outputs):
+                continue
+            if writer.name not in ancestors(other.name) and other.name not in ancestors(writer.name):
+                raise RuntimeError(f"{writer.name} writes files {other.name} uses, "
+                                   f"but neither depends on the other")
+
+def load_state():
+    if not STATE_FILE.exists():
+        return {"version": STATE_VERSION, "tasks": {}, "files": {}}
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        state = {}
+    if state.get("version") != STATE_VERSION:
+        return {"version": STATE_VERSION, "tasks": {}, "files": {}}
+    return state
+
+def save_state(state):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=STATE_FILE.parent,
+                                     prefix=STATE_FILE.name + '.', suffix='.tmp', delete=False) as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(f.name, STATE_FILE)
+
+def expand(patterns):
+    """Relative paths of all files matching the patterns, sorted."""
+    paths = set()
+    for pattern in patterns:
+        for path in PROJECT_ROOT.glob(pattern):
+            if path.is_file():
+                paths.add(path.relative_to(PROJECT_ROOT).as_posix())
+    return sorted(paths)
+
+def file_hash(rel_path, file_cache):
+    """sha256 of a file, re-read only when its mtime or size changed."""
+    st = os.stat(PROJECT_ROOT / rel_path)
+    cached = file_cache.get(rel_path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(PROJECT_ROOT / rel_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    file_cache[rel_path] = [st.st_mtime_ns, st.st_size, digest.hexdigest()]
+    return file_cache[rel_path][2]
+
+def task_hash(task, file_cache):
+    """One hash over the names and contents of a task's inputs and outputs."""
+    digest = hashlib.sha256()
+    for label, patterns in (("in", task.inputs), ("out", task.outputs)):
+        for rel_path in expand(patterns):
+            digest.update(f"{label}\0{rel_path}\0{file_hash(rel_path, file_cache)}\n".encode('utf-8'))
+    if task.daily:
+        digest.update(date.today().isoformat().encode('utf-8'))
+    return digest.hexdigest()
+
+def is_stale(task, state):
+    if task.always:
+        return True
+    if task.outputs and not all(expand([pattern]) for pattern in task.outputs):
+        return True  # An output is missing
+    return state["tasks"].get(task.name) != task_hash(task, state["files"])
+
+def with_deps(targets):
+    """The targets plus everything they depend on, in declaration order."""
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(TASKS[name].deps)
+    return [name for name in TASKS if name in needed]
+
+def run_task(task):
+    """Run one task as a subprocess; returns (returncode, output, seconds)."""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    start = time.perf_counter()
+    result = subprocess.run(task.command(), cwd=PROJECT_ROOT, env=env, capture_output=True,
+                            text=True, encoding='utf-8', errors='replace')
+    return result.returncode, result.stdout + result.stderr, time.perf_counter() - start
+
+def run_graph(names, state, force=(), jobs=None):
+    """Run the stale tasks among names, in parallel where the graph allows.
+
+    Returns {task: "ran" | "up to date" | "failed" | "blocked"}.
+    """
+    results = {}
+    pending = list(names)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 4) as pool:
+        while pending or running:
+            # Start every task whose dependencies are done
+            for name in list(pending):
+                task = TASKS[name]
+                deps = [d for d in task.deps if d in names]
+                if any(results.get(d) in ("failed", "blocked") for d in deps):
+                    results[name] = "blocked"
+                    pending.remove(name)
+                    print(f"  ✗ {name}: skipped, a dependency failed")
+                    continue
+                if not all(d in results for d in deps):
+                    continue
+                pending.remove(name)
+                # Hashed only now: a dependency may just have rewritten the inputs
+                if name not in force and not is_stale(task, state):
+                    results[name] = "up to date"
+                    print(f"  - {name}: up to date")
+                    continue
+                print(f"  ▶ {name}")
+                running[pool.submit(run_task, task)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                task = TASKS[name]
+                returncode, output, seconds = future.result()
+                if output.strip():
+                    print("\n".join(f"    {name} | {line}" for line in output.rstrip().splitlines()))
+                if returncode == 0:
+                    results[name] = "ran"
+                    if not task.always:
+                        state["tasks"][name] = task_hash(task, state["files"])
+                    save_state(state)
+                    print(f"  ✓ {name} ({seconds:.1f}s)")
+                else:
+                    results[name] = "failed"
+                    state["tasks"].pop(name, None)
+                    save_state(state)
+                    print(f"  ✗ {name} failed with exit code {returncode} ({seconds:.1f}s)")
+    return results
+
+def print_graph(state):
+    for task in TASKS.values():
+        status = "always" if task.always else ("stale" if is_stale(task, state) else "up to date")
+        deps = f" <- {', '.join(task.deps)}" if task.deps else ""
+        print(f"  {task.name:<26}{status:<12}{deps}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the project's scripts as a task graph")
+    parser.add_argument("targets", nargs="*", help=f"Tasks to bring up to date (default: all). Tasks: {', '.join(TASKS)}")
+    parser.add_argument("--list", action="store_true", help="Show the tasks and whether they are up to date")
+    parser.add_argument("--force", action="store_true", help="Run the targets even if they are up to date")
+    parser.add_argument("--skip", nargs="*", default=[], metavar="TASK", help="Leave these tasks out")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Maximum number of tasks running at once")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    check_graph()
+    unknown = [t for t in args.targets + args.skip if t not in TASKS]
+    if unknown:
+        raise SystemExit(f"Unknown task(s): {', '.join(unknown)}")
+
+    state = load_state()
+    if args.list:
+        print_graph(state)
+        save_state(state)  # Keep the file hashes computed for the listing
+        return
+
+    targets = args.targets or list(TASKS)
+    names = [name for name in with_deps(targets) if name not in args.skip]
+    force = set(targets) if args.force else set()
+
+    print(f"Tasks: {', '.join(names)}\n")
+    start = time.perf_counter()
+    results = run_graph(names, state, force=force, jobs=args.jobs)
+    save_state(state)
+
+    counts = {status: sum(1 for r in results.values() if r == status)
+              for status in ("ran", "up to date", "failed", "blocked")}
+    print(f"\n✓ Done in {time.perf_counter() - start:.1f}s: {counts['ran']} ran, {counts['up to date']} up to date"
+          + (f", {counts['failed']} failed, {counts['blocked']} blocked" if counts['failed'] else ""))
+    if counts['failed']:
+        exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        exit(1)
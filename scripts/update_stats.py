@@ -1,19 +1,22 @@
 """Update stats.json files based on email responses and deadlines."""
-import json
-import shutil
 import re
+import json
+import argparse
 from pathlib import Path
 from datetime import date
+from email_store import job_responses, open_store
+from jobs import load_jobs
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 
 SOLICITATIES_DIR = PROJECT_ROOT / "Solicitaties"
-ARCHIVE_DIR = PROJECT_ROOT / "Solicitaties" / "1.Archief"
-EMAIL_ONGOING_DIR = PROJECT_ROOT / "Email" / "Ongoing"
-EMAIL_ARCHIVE_DIR = PROJECT_ROOT / "Email" / "Archive"
+EMAIL_DIR = PROJECT_ROOT / "Email"
 CONFIG_DIR = PROJECT_ROOT / "config"
 STATS_SCHEMA_PATH = CONFIG_DIR / "stats.schema.json"
+STATS_CACHE_FILE = PROJECT_ROOT / "data" / "stats_cache.json"
+
+STATS_CACHE_VERSION = 1
 
 # Response priority (lower number = higher priority)
 RESPONSE_HIERARCHY = {
@@ -79,216 +82,215 @@ def should_update_response(current_response, new_response):
     
     return new_priority < current_priority
 
-def move_emails_to_archive(job_name):
+def move_emails_to_archive(store, job_name):
     """Move all emails from Ongoing to Archive."""
-    ongoing_folder = EMAIL_ONGOING_DIR / job_name
-    archive_folder = EMAIL_ARCHIVE_DIR / job_name
-    
-    if not ongoing_folder.exists():
-        return 0
-    
-    archive_folder.mkdir(parents=True, exist_ok=True)
-    
-    email_files = list(ongoing_folder.glob("*.json"))
-    moved_count = 0
-    
-    for email_file in email_files:
-        dest_file = archive_folder / email_file.name
-        try:
-            shutil.move(str(email_file), str(dest_file))
-            moved_count += 1
-        except Exception as e:
-            print(f"    Warning: Failed to move {email_file.name}: {e}")
-    
+    return store.move_job(job_name, "Ongoing", "Archive")
+
+def job_fingerprint(job, store):
+    """Everything update_job() looks at, as cheap stat() results."""
+    return [job.archived, job.stamps.get("stats.json"), job.stamps.get("relevant_info.json"),
+            store.stamp("Ongoing", job.name), store.stamp("Archive", job.name)]
+
+def load_stats_cache(cache_file=STATS_CACHE_FILE):
+    if not cache_file.exists():
+        return {}
     try:
-        if ongoing_folder.exists() and not list(ongoing_folder.glob("*")):
-            ongoing_folder.rmdir()
-    except:
-        pass
-    
-    return moved_count
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}  # A damaged cache only costs one full run
+    return cache.get("jobs", {}) if cache.get("version") == STATS_CACHE_VERSION else {}
 
-def update_stats():
-    """Update all stats.json files based on emails and deadlines."""
-    if not SOLICITATIES_DIR.exists():
-        print("No Solicitaties directory found.")
-        return
-    
-    company_folders = []
+def save_stats_cache(entries, cache_file=STATS_CACHE_FILE):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({"version": STATS_CACHE_VERSION, "jobs": entries}, f, ensure_ascii=False, separators=(',', ':'))
+    tmp_file.replace(cache_file)
+
+def expiry_due(entry, current_date):
+    """Whether an unchanged job's cached deadline has passed while it was still open."""
+    deadline = entry.get("deadline")
+    return entry.get("response") in ["Unsent", "Called"] and bool(deadline) and date.fromisoformat(deadline) < current_date
+
+def update_job(job, store, current_date):
+    """Update one job's stats.json from its emails and deadline.
     
-    for f in SOLICITATIES_DIR.iterdir():
-        if f.is_dir() and f.name != "Archief":
-            company_folders.append(f)
+    Returns (updated, archived, expired) flags for the summary.
+    """
+    job_name = job.name
+    updated, archived, expired = False, False, False
     
-    if ARCHIVE_DIR.exists():
-        for f in ARCHIVE_DIR.iterdir():
-            if f.is_dir():
-                company_folders.append(f)
+    stats = job.stats
+    deadline_date = parse_deadline(job.info.get("Deadline")) if job.info else None
+
+    # Check if expired
+    current_response = stats.get('Response', 'Unknown')
+    is_expired = False
     
-    active_count = len([f for f in company_folders if not str(f).startswith(str(ARCHIVE_DIR))])
-    archived_count = len([f for f in company_folders if str(f).startswith(str(ARCHIVE_DIR))])
+    if current_response in ["Unsent", "Called"] and deadline_date:
+        if deadline_date < current_date:
+            is_expired = True
+
+    # Handle manually rejected jobs
+    if stats.get('Rejected', False):
+        if store.has_job("Ongoing", job_name):
+            moved = move_emails_to_archive(store, job_name)
+            if moved > 0:
+                print(f"  ✓ {job_name}")
+                print(f"    Manually rejected - moved {moved} email(s) to Archive")
+                print()
+                archived = True
     
-    print(f"Updating stats for {len(company_folders)} jobs ({active_count} active, {archived_count} archived)...\n")
-    updated, archived, expired = 0, 0, 0
+    is_archived = store.has_job("Archive", job_name)
     
-    current_date = date.today()
+    # Responses of all emails, from the job's summary rather than the emails themselves
+    highest_response = get_highest_response(job_responses(store, job_name))
     
-    for company_folder in company_folders:
-        stats_file = company_folder / "stats.json"
-        info_file = company_folder / "relevant_info.json"
+    if is_archived:
+        highest_response = "Rejected"
         
-        if not stats_file.exists():
-            continue
+    if not highest_response and is_expired:
+        highest_response = "Expired"
         
-        job_name = company_folder.name
+    if not highest_response:
+        return updated, archived, expired
+    
+    # Auto-archive if needed
+    archive_worthy_states = {"Rejected", "Expired", "Other"}
+    if highest_response in archive_worthy_states and not is_archived:
+        if store.count("Ongoing", job_name):
+            moved = move_emails_to_archive(store, job_name)
+            if moved > 0:
+                print(f"  ✓ {job_name}")
+                print(f"    Auto-archived {moved} email(s) (detected {highest_response} status)")
+                print()
+                archived = True
+                is_archived = True
+    
+    # Update stats.json
+    old_response = stats.get('Response', 'Unknown')
+    
+    if is_archived and old_response != "Rejected":
+        stats['Response'] = highest_response
+        stats['Rejected'] = True
         
-        try:
-            with open(stats_file, 'r', encoding='utf-8') as f:
-                stats = json.load(f)
-        except Exception as e:
-            print(f"  ✗ {job_name}: Error reading stats - {e}\n")
-            continue
-            
-        deadline_date = None
-        if info_file.exists():
-            try:
-                with open(info_file, 'r', encoding='utf-8') as f:
-                    info = json.load(f)
-                    deadline_date = parse_deadline(info.get("Deadline"))
-            except Exception:
-                pass
-
-        # Check if expired
-        current_response = stats.get('Response', 'Unknown')
-        is_expired = False
+        job.save_stats(stats)
         
-        if current_response in ["Unsent", "Called"] and deadline_date:
-            if deadline_date < current_date:
-                is_expired = True
-
-        # Handle manually rejected jobs
-        if stats.get('Rejected', False):
-            ongoing_folder = EMAIL_ONGOING_DIR / job_name
-            if ongoing_folder.exists():
-                moved = move_emails_to_archive(job_name)
-                if moved > 0:
-                    print(f"  ✓ {job_name}")
-                    print(f"    Manually rejected - moved {moved} email(s) to Archive")
-                    print()
-                    archived += 1
+        print(f"  ✓ {job_name}")
+        print(f"    {old_response} → {highest_response}")
+        print(f"    (Archived folder detected)")
+        print()
+        return True, archived, expired
+    
+    allow_update = False
+    if highest_response == "Expired" and old_response in ["Unsent", "Called"]:
+        allow_update = True
+    elif should_update_response(old_response, highest_response):
+        allow_update = True
         
-        archive_folder = EMAIL_ARCHIVE_DIR / job_name
-        is_archived = archive_folder.exists()
+    if allow_update and old_response != highest_response:
+        stats['Response'] = highest_response
         
-        # Collect all emails
-        company_emails = []
+        if highest_response == "Rejected":
+            stats['Rejected'] = True
         
-        ongoing_folder = EMAIL_ONGOING_DIR / job_name
-        if ongoing_folder.exists():
-            for email_file in ongoing_folder.glob("*.json"):
-                try:
-                    with open(email_file, 'r', encoding='utf-8-sig') as f:
-                        email_data = json.load(f)
-                        company_emails.append(email_data)
-                except Exception as e:
-                    print(f"  Warning: Failed to read {email_file}: {e}")
+        if highest_response == "Hired":
+            stats['Hired'] = True
         
-        if archive_folder.exists():
-            for email_file in archive_folder.glob("*.json"):
-                try:
-                    with open(email_file, 'r', encoding='utf-8-sig') as f:
-                        email_data = json.load(f)
-                        company_emails.append(email_data)
-                except Exception as e:
-                    print(f"  Warning: Failed to read {email_file}: {e}")
+        if highest_response in ["Interview Scheduled", "Offer", "Hired"]:
+            stats['Interviewed'] = True
         
-        highest_response = None
+        job.save_stats(stats)
         
-        if company_emails:
-            responses = [email.get('response') for email in company_emails]
-            highest_response = get_highest_response(responses)
+        print(f"  ✓ {job_name}")
+        print(f"    {old_response} → {highest_response}")
+        if highest_response == "Expired":
+            print(f"    (Deadline {deadline_date} passed)")
+            expired = True
+        print()
+        updated = True
+    
+    return updated, archived, expired
+
+def update_stats(incremental=False, jobs=None, store=None):
+    """Update all stats.json files based on emails and deadlines.
+    
+    Every run records a fingerprint per job in data/stats_cache.json. With
+    incremental=True, jobs whose fingerprint is unchanged are skipped unless
+    their cached deadline has passed in the meantime. The job catalog and
+    email store are loaded here unless they are passed in.
+    """
+    if not SOLICITATIES_DIR.exists():
+        print("No Solicitaties directory found.")
+        return
+    
+    if jobs is None:
+        jobs = load_jobs()
+    active_count = len([j for j in jobs if not j.archived])
+    archived_count = len(jobs) - active_count
+    
+    print(f"Updating stats for {len(jobs)} jobs ({active_count} active, {archived_count} archived)...\n")
+    if store is None:
+        store = open_store(EMAIL_DIR)
+    cache = load_stats_cache() if incremental else {}
+    new_cache = {}
+    updated, archived, expired, unchanged = 0, 0, 0, 0
+    
+    current_date = date.today()
+    
+    for job in jobs:
+        job_name = job.name
         
-        if is_archived:
-            highest_response = "Rejected"
-            
-        if not highest_response and is_expired:
-            highest_response = "Expired"
-            
-        if not highest_response:
+        if "stats.json" in job.errors:
+            print(f"  ✗ {job_name}: Error reading stats - {job.errors['stats.json']}\n")
             continue
         
-        # Auto-archive if needed
-        archive_worthy_states = {"Rejected", "Expired", "Other"}
-        if highest_response in archive_worthy_states and not is_archived:
-            ongoing_folder = EMAIL_ONGOING_DIR / job_name
-            if ongoing_folder.exists() and list(ongoing_folder.glob("*.json")):
-                moved = move_emails_to_archive(job_name)
-                if moved > 0:
-                    print(f"  ✓ {job_name}")
-                    print(f"    Auto-archived {moved} email(s) (detected {highest_response} status)")
-                    print()
-                    archived += 1
-                    is_archived = True
+        entry = cache.get(job_name)
+        if entry and entry["fingerprint"] == job_fingerprint(job, store) and not expiry_due(entry, current_date):
+            new_cache[job_name] = entry
+            unchanged += 1
+            continue
         
-        # Update stats.json
-        try:
-            old_response = stats.get('Response', 'Unknown')
-            
-            if is_archived and old_response != "Rejected":
-                stats['Response'] = highest_response
-                stats['Rejected'] = True
-                
-                with open(stats_file, 'w', encoding='utf-8') as f:
-                    json.dump(stats, f, indent=2, ensure_ascii=False)
-                
-                print(f"  ✓ {job_name}")
-                print(f"    {old_response} → {highest_response}")
-                print(f"    (Archived folder detected)")
-                print()
-                updated += 1
+        if job.stats is not None:
+            try:
+                job_updated, job_archived, job_expired = update_job(job, store, current_date)
+            except Exception as e:
+                print(f"  ✗ {job_name}: Error updating stats - {e}\n")
                 continue
-            
-            allow_update = False
-            if highest_response == "Expired" and old_response in ["Unsent", "Called"]:
-                allow_update = True
-            elif should_update_response(old_response, highest_response):
-                allow_update = True
-                
-            if allow_update and old_response != highest_response:
-                stats['Response'] = highest_response
-                
-                if highest_response == "Rejected":
-                    stats['Rejected'] = True
-                
-                if highest_response == "Hired":
-                    stats['Hired'] = True
-                
-                if highest_response in ["Interview Scheduled", "Offer", "Hired"]:
-                    stats['Interviewed'] = True
-                
-                with open(stats_file, 'w', encoding='utf-8') as f:
-                    json.dump(stats, f, indent=2, ensure_ascii=False)
-                
-                print(f"  ✓ {job_name}")
-                print(f"    {old_response} → {highest_response}")
-                if highest_response == "Expired":
-                    print(f"    (Deadline {deadline_date} passed)")
-                    expired += 1
-                print()
-                updated += 1
+            updated += job_updated
+            archived += job_archived
+            expired += job_expired
         
-        except Exception as e:
-            print(f"  ✗ {job_name}: Error updating stats - {e}\n")
+        # Fingerprint after any writes, so the next run sees this state as unchanged
+        deadline_date = parse_deadline(job.info.get("Deadline")) if job.info else None
+        new_cache[job_name] = {
+            "fingerprint": job_fingerprint(job, store),
+            "deadline": deadline_date.isoformat() if deadline_date else None,
+            "response": (job.stats or {}).get('Response'),
+        }
+    
+    store.save()
+    # Fingerprints of segment-store jobs only hold once the index is saved
+    save_stats_cache(new_cache)
     
     print(f"✓ Updated {updated} company stats.")
     if archived > 0:
         print(f"✓ Auto-archived emails for {archived} manually rejected applications.")
     if expired > 0:
         print(f"✓ Marked {expired} applications as Expired.")
+    if incremental:
+        print(f"✓ Skipped {unchanged} unchanged jobs.")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update stats.json files from emails and deadlines")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip jobs whose files and emails did not change since the last run")
+    return parser.parse_args()
 
 if __name__ == "__main__":
     try:
-        update_stats()
+        update_stats(incremental=parse_args().incremental)
     except Exception as e:
         print(f"ERROR: {e}")
         exit(1)
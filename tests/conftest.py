@@ -0,0 +1,9 @@
+"""Shared setup: the scripts import each other as top-level modules.
+
+Run from the repository root: python -m pytest tests
+(needs pytest and the Google client libraries fetch_emails.py imports)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,127 @@
+"""In-memory stand-in for the Gmail API client used by fetch_emails.py.
+
+fetch_emails() uses any object with .users() as the service itself, so
+FakeGmail is handed to it through load_credentials. Every executed call is
+logged in .calls as (kind, detail, thread id).
+"""
+import copy
+import base64
+import threading
+import httplib2
+from googleapiclient.errors import HttpError
+
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"")
+
+def make_message(i, sender="hr@acme.nl", subject=None):
+    body = base64.urlsafe_b64encode(f"Body {i}".encode()).decode()
+    return {
+        "id": f"m{i}", "threadId": f"t{i}", "snippet": "snippet", "sizeEstimate": 4000,
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "headers": [{"name": "From", "value": f"Recruiter <{sender}>"},
+                        {"name": "Subject", "value": subject or f"Vacature {i}"},
+                        {"name": "Date", "value": "Mon, 5 Jan 2026 10:00:00 +0100"},
+                        {"name": "To", "value": "me@example.com"}],
+            "parts": [{"mimeType": "text/plain", "body": {"data": body}},
+                      {"mimeType": "application/pdf", "filename": "cv.pdf",
+                       "body": {"attachmentId": f"a{i}", "size": 1234}}],
+        },
+    }
+
+class Request:
+    def __init__(self, service, kind, detail, run):
+        self.service, self.kind, self.detail, self.run = service, kind, detail, run
+
+    def execute(self):
+        self.service.log(self.kind, self.detail)
+        return self.run()
+
+class Batch:
+    def __init__(self, service, callback):
+        self.service, self.callback, self.requests = service, callback, []
+
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        self.service.log("batch", len(self.requests))
+        for request, request_id in self.requests:
+            try:
+                self.callback(request_id, request.run(), None)
+            except HttpError as e:
+                self.callback(request_id, None, e)
+
+class FakeGmail:
+    """A mailbox of messages listed newest first, page_size per list page.
+
+    failures maps a message id to the HTTP statuses its next gets fail
+    with; history=None makes history().list answer 404 (expired).
+    """
+
+    def __init__(self, messages, page_size=100, failures=None, history=(), history_id="500"):
+        self.mailbox = {m["id"]: m for m in messages}
+        self.order = [m["id"] for m in messages]
+        self.page_size = page_size
+        self.failures = {k: list(v) for k, v in (failures or {}).items()}
+        self.history_ids = history
+        self.history_id = history_id
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def log(self, kind, detail):
+        with self.lock:
+            self.calls.append((kind, detail, threading.get_ident()))
+
+    def count(self, kind):
+        return sum(call[0] == kind for call in self.calls)
+
+    # users(), messages() and history() all resolve to the service itself
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def history(self):
+        return self
+
+    def getProfile(self, userId):
+        return Request(self, "profile", None, lambda: {"historyId": self.history_id})
+
+    def list(self, userId, q=None, maxResults=100, pageToken=None, startHistoryId=None, **kwargs):
+        if startHistoryId is not None:
+            return Request(self, "history", startHistoryId, self._history_page)
+
+        def run():
+            start = int(pageToken or 0)
+            ids = self.order[start:start + self.page_size]
+            page = {"messages": [{"id": i, "threadId": self.mailbox[i]["threadId"]} for i in ids]}
+            if start + self.page_size < len(self.order):
+                page["nextPageToken"] = str(start + self.page_size)
+            return page
+        return Request(self, "list", q, run)
+
+    def _history_page(self):
+        if self.history_ids is None:
+            raise http_error(404)
+        return {"history": [{"messagesAdded": [{"message": {"id": i, "labelIds": ["INBOX"]}}]}
+                            for i in self.history_ids], "historyId": self.history_id}
+
+    def get(self, userId, id, format="full", **kwargs):
+        def run():
+            with self.lock:
+                statuses = self.failures.get(id)
+                status = statuses.pop(0) if statuses else None
+            if status is not None:
+                raise http_error(status)
+            if id not in self.mailbox:
+                raise http_error(404)
+            message = copy.deepcopy(self.mailbox[id])
+            if format == "metadata":
+                message["payload"] = {"headers": message["payload"]["headers"]}
+            return message
+        return Request(self, f"get:{format}", id, run)
+
+    def new_batch_http_request(self, callback):
+        return Batch(self, callback)
@@ -0,0 +1,79 @@
+"""Local HTTP servers standing in for vacancy sites, one per simulated host.
+
+Every host listens on its own port of 127.0.0.1, so each counts as a
+separate host for the per-host throttle. Hosts log when each request
+arrived and which headers it carried; hosts sharing an InFlight count how
+many requests they are serving at once.
+"""
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = ("<html><head><title>Vacature</title></head><body><main><h1>Data Engineer</h1>"
+        "<p>Wij zoeken een Data Engineer voor ons team in Groningen. Je bouwt datapijplijnen "
+        "en werkt samen met analisten.</p><p>Reageren kan tot 31 januari 2026.</p></main></body></html>")
+
+class InFlight:
+    """Requests being served right now, and the most there ever were."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.now = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.now -= 1
+
+def html(body=PAGE, status=200, headers=None):
+    """A respond() result for an HTML page."""
+    return status, {"Content-Type": "text/html; charset=utf-8", **(headers or {})}, body.encode("utf-8")
+
+class LocalHost:
+    """A stand-in host; respond(request) returns (status, headers, body) for each GET."""
+
+    def __init__(self, respond=None, latency=0.0, in_flight=None):
+        self.respond = respond or (lambda request: html())
+        self.latency = latency
+        self.in_flight = in_flight or InFlight()
+        self.arrivals = []   # time.monotonic() per request
+        self.requests = []   # (path, headers) per request
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host.arrivals.append(time.monotonic())
+                host.requests.append((self.path, dict(self.headers)))
+                with host.in_flight:
+                    time.sleep(host.latency)
+                    status, headers, body = host.respond(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def url(self, path="/vacature"):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def min_gap(self):
+        """Shortest time between two requests, or None for fewer than two."""
+        arrivals = sorted(self.arrivals)
+        return min((b - a for a, b in zip(arrivals, arrivals[1:])), default=None)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
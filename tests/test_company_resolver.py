@@ -0,0 +1,85 @@
+"""Resolving the hand-typed company field, and refusing to guess."""
+import json
+import pytest
+import company_resolver
+from company_resolver import CompanyResolver, UnknownCompanyError, normalize_company
+from job_index import AmbiguousJobError, JobIndex
+
+COMPANIES = ["Teijin Aramid", "Politie", "Politie Assen", "Gemeente Groningen", "Nestlé Nederland"]
+JOBS = ["Data_Engineer_—_Teijin_Aramid", "Data_Analist_—_Gemeente_Groningen",
+        "Beleidsmedewerker_—_Gemeente_Groningen", "Rechercheur_—_Politie_Assen"]
+
+@pytest.fixture(params=["rapidfuzz", "difflib"])
+def matcher(request, monkeypatch):
+    """Run each test with rapidfuzz cdist and with the difflib fallback."""
+    if request.param == "rapidfuzz":
+        pytest.importorskip("rapidfuzz")
+    else:
+        monkeypatch.setattr(company_resolver, "process", None)
+    return request.param
+
+@pytest.fixture
+def resolver(tmp_path, matcher):
+    return CompanyResolver(COMPANIES, tmp_path / "company_aliases.json")
+
+@pytest.mark.parametrize("name, expected", [
+    ("Teijin_Aramid B.V.", "teijin aramid"),
+    ("NESTLÉ Nederland N.V.", "nestle nederland"),
+    ("  Gemeente-Groningen ", "gemeente groningen"),
+    ("Bvba Solutions", "bvba solutions"),   # Only whole legal forms go
+    (None, ""),
+])
+def test_normalize_company(name, expected):
+    assert normalize_company(name) == expected
+
+def test_exact_name_also_offers_companies_containing_it(resolver):
+    assert resolver.resolve("Teijin Aramid BV") == [("teijin aramid", 100.0)]
+    assert resolver.resolve("politie") == [("politie", 100.0), ("politie assen", 90.0)]
+
+def test_typo_resolves_fuzzily(resolver):
+    [(company, score), *_] = resolver.resolve("Gemeente Groningn")
+    assert company == "gemeente groningen" and score >= company_resolver.MIN_COMPANY_SCORE
+
+def test_unknown_company_fails_with_a_shortlist(resolver):
+    with pytest.raises(UnknownCompanyError) as error:
+        resolver.resolve("Shell")
+    assert error.value.company == "Shell"
+    assert len(error.value.shortlist) <= company_resolver.SHORTLIST_SIZE
+    assert "Shell" in str(error.value)
+
+def test_resolve_many_reports_failures_per_name(resolver):
+    results = resolver.resolve_many(["Politie Assen", "Shell", "Politie Assen"])
+    assert results["Politie Assen"][0] == ("politie assen", 100.0)
+    assert isinstance(results["Shell"], UnknownCompanyError)
+    assert len(results) == 2
+
+def test_learned_alias_is_saved_and_used(resolver, tmp_path):
+    assert resolver.learn("TA", "Teijin_Aramid")
+    assert not resolver.learn("TA", "Teijin Aramid")          # Known already
+    assert not resolver.learn("Politie", "Politie Assen")      # Resolves exactly by itself
+    resolver.save()
+
+    assert json.loads((tmp_path / "company_aliases.json").read_text(encoding="utf-8")) == {"ta": "teijin aramid"}
+    reloaded = CompanyResolver(COMPANIES, tmp_path / "company_aliases.json")
+    assert reloaded.resolve("ta") == [("teijin aramid", 100.0)]
+
+@pytest.fixture
+def index(tmp_path, matcher):
+    return JobIndex(JOBS, aliases_file=tmp_path / "company_aliases.json")
+
+def test_company_with_one_job_needs_no_content_match(index):
+    assert index.match("Teijin Aramid B.V.", "Bedankt", "noreply@workday.com") == JOBS[0]
+
+def test_company_with_several_jobs_must_be_told_apart(index):
+    assert index.match("Gemeente Groningen", "Uw sollicitatie Beleidsmedewerker", "x@y.nl") == JOBS[2]
+    with pytest.raises(AmbiguousJobError) as error:
+        index.match("Gemeente Groningen", "Bedankt", "noreply@workday.com")
+    assert error.value.jobs == [JOBS[1], JOBS[2]]
+
+def test_content_never_overrides_the_company(index):
+    # "Data Engineer" scores highest for Teijin Aramid, but the email is tagged for the police
+    assert index.match("Politie Assen", "Data Engineer vacature", "x@y.nl") == JOBS[3]
+    assert not index.accepts("Politie Assen", JOBS[0])
+    assert index.accepts(None, JOBS[0]) and index.accepts(JOBS[0], JOBS[0])
+    with pytest.raises(UnknownCompanyError):
+        index.match("Shell", "Data Engineer vacature", "x@y.nl")
@@ -0,0 +1,158 @@
+"""Recursive MIME decoding and the content-addressed attachment store."""
+import sys
+import json
+import base64
+import threading
+import pytest
+import email_blobs
+import fetch_emails as fe
+from email_blobs import blob_path, decode_data, fetch_attachment, put_blob, read_blob
+from email_store import FolderStore
+
+@pytest.fixture(autouse=True)
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_blobs, "EMAIL_DIR", tmp_path / "Email")
+    monkeypatch.setattr(email_blobs, "BLOB_DIR", tmp_path / "Email" / "Blobs")
+    return tmp_path / "Email" / "Blobs"
+
+def b64(data):
+    """Gmail's encoding: URL-safe base64 without padding."""
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def text(mime_type, content):
+    return {"mimeType": mime_type, "body": {"data": b64(content.encode()), "size": len(content)}}
+
+def test_plain_text_is_found_at_any_depth():
+    payload = {"mimeType": "multipart/mixed", "parts": [
+        {"mimeType": "multipart/related", "parts": [
+            {"mimeType": "multipart/alternative", "parts": [
+                text("text/html", "<p>HTML version</p>"),
+                text("text/plain", "Plain version"),
+            ]},
+        ]},
+    ]}
+    assert fe.decode_body(payload) == "Plain version"
+
+def test_html_only_mail_is_converted_to_text():
+    html = ("<html><head><style>p {color: red}</style></head><body><script>track()</script>"
+            "<p>Beste Anna,</p><p>Je bent   uitgenodigd &amp; welkom.</p></body></html>")
+    payload = {"mimeType": "multipart/alternative", "parts": [text("text/html", html)]}
+    assert fe.decode_body(payload) == "Beste Anna,\nJe bent uitgenodigd & welkom."
+
+def test_attachments_are_references_and_never_the_body():
+    cv = {"mimeType": "text/plain", "filename": "cv.txt", "body": {"data": b64(b"Curriculum"), "size": 10}}
+    pdf = {"mimeType": "application/pdf", "filename": "vacature.pdf", "body": {"attachmentId": "a1", "size": 90000}}
+    payload = {"mimeType": "multipart/mixed", "parts": [cv, text("text/plain", "Zie bijlage"), pdf]}
+
+    assert fe.decode_body(payload) == "Zie bijlage"
+    small, large = fe.extract_attachments(payload)
+    assert large == {"filename": "vacature.pdf", "mime_type": "application/pdf", "size": 90000,
+                     "attachment_id": "a1", "sha256": None}
+    assert small["attachment_id"] is None
+    assert read_blob(small["sha256"]) == b"Curriculum"  # Inlined bytes go to the blob store
+
+def test_single_part_message_and_empty_message():
+    assert fe.decode_body(text("text/plain", "Kort bericht")) == "Kort bericht"
+    assert fe.decode_body({"mimeType": "multipart/mixed", "parts": []}) == ""
+
+def test_decode_data_restores_missing_padding():
+    for data in (b"a", b"ab", b"abc", b"\xfb\xff"):
+        assert decode_data(b64(data)) == data
+
+def test_same_bytes_are_stored_once(blob_dir):
+    first = put_blob(b"recruiter pdf")
+    assert put_blob(b"recruiter pdf") == first
+    assert blob_path(first) == blob_dir / first[:2] / first
+    assert [path.name for path in blob_dir.rglob("*") if path.is_file()] == [first]
+
+def test_concurrent_writers_of_the_same_blob(blob_dir):
+    errors = []
+
+    def write():
+        try:
+            for _ in range(20):
+                put_blob(b"signature logo")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len([path for path in blob_dir.rglob("*") if path.is_file()]) == 1  # No temp files left
+
+class AttachmentService:
+    """Just enough of the Gmail client for users().messages().attachments().get()."""
+
+    def __init__(self, files):
+        self.files = files
+        self.downloads = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def attachments(self):
+        return self
+
+    def get(self, userId, messageId, id):
+        self.downloads.append((messageId, id))
+        return self
+
+    def execute(self):
+        return {"data": b64(self.files[self.downloads[-1][1]])}
+
+def test_attachment_is_downloaded_only_once():
+    service = AttachmentService({"a1": b"%PDF-1.7"})
+    attachment = {"filename": "cv.pdf", "attachment_id": "a1", "sha256": None}
+
+    path = fetch_attachment(service, "m1", attachment)
+    assert path.read_bytes() == b"%PDF-1.7"
+    assert fetch_attachment(service, "m1", attachment) == path
+    assert service.downloads == [("m1", "a1")]
+
+def run_main(monkeypatch, store, *args):
+    monkeypatch.setattr(email_blobs, "open_store", lambda: store)
+    monkeypatch.setattr(sys, "argv", ["email_blobs.py", *args])
+    email_blobs.main()
+
+def test_main_records_hashes_in_a_processing_email(tmp_path, monkeypatch):
+    email_file = tmp_path / "Email" / "Processing" / "m1.json"
+    email_file.parent.mkdir(parents=True)
+    email_file.write_text(json.dumps({"attachments": [
+        {"filename": "cv.pdf", "size": 8, "attachment_id": "a1", "sha256": None},
+        {"filename": "logo.png", "size": 4, "attachment_id": "a2", "sha256": None},
+    ]}), encoding="utf-8")
+    service = AttachmentService({"a1": b"%PDF-1.7", "a2": b"PNG!"})
+    monkeypatch.setattr(fe, "load_credentials", lambda: service)
+
+    run_main(monkeypatch, FolderStore(tmp_path / "Email"), "m1", "cv.pdf")
+
+    attachments = json.loads(email_file.read_text(encoding="utf-8"))["attachments"]
+    assert read_blob(attachments[0]["sha256"]) == b"%PDF-1.7"
+    assert attachments[1]["sha256"] is None  # Not asked for
+    assert service.downloads == [("m1", "a1")]
+
+def test_main_updates_a_filed_email_through_the_store(tmp_path, monkeypatch):
+    store = FolderStore(tmp_path / "Email")
+    filed = tmp_path / "Email" / "Archive" / "Job_A" / "m2.json"
+    filed.parent.mkdir(parents=True)
+    filed.write_text(json.dumps({"email_id": "m2", "attachments": [
+        {"filename": "cv.pdf", "attachment_id": "a1", "sha256": None},
+    ]}), encoding="utf-8")
+    monkeypatch.setattr(fe, "load_credentials", lambda: AttachmentService({"a1": b"%PDF-1.7"}))
+
+    run_main(monkeypatch, store, "m2")
+    [attachment] = store.get("m2")["attachments"]
+    assert read_blob(attachment["sha256"]) == b"%PDF-1.7"
+
+    # A second run finds every hash recorded and neither downloads nor rewrites
+    before = filed.stat().st_mtime_ns
+    monkeypatch.setattr(fe, "load_credentials", lambda: AttachmentService({}))
+    run_main(monkeypatch, store, "m2")
+    assert filed.stat().st_mtime_ns == before
@@ -0,0 +1,201 @@
+"""The two email store backends and the reader API they share."""
+import os
+import json
+import pytest
+import email_store
+from email_store import FolderStore, SegmentStore, job_responses, migrate, open_store, rebuild_summaries
+
+def write_email(folder, email_id, **fields):
+    path = folder / f"{email_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"email_id": email_id, "subject": f"Subject {email_id}", **fields}), encoding="utf-8")
+    return path
+
+@pytest.fixture(params=["folders", "segments"])
+def store(request, tmp_path):
+    if request.param == "folders":
+        return FolderStore(tmp_path / "Email")
+    return SegmentStore(tmp_path / "Email" / "Segments")
+
+def test_filed_emails_read_back_the_same_from_either_backend(store, tmp_path):
+    processing = tmp_path / "Email" / "Processing"
+    for email_id, job in (("m1", "Job_A"), ("m2", "Job_A"), ("m3", "Job_B")):
+        store.file_email(write_email(processing, email_id, response="Pending"), "Ongoing", job)
+    store.save()
+
+    assert not list(processing.iterdir())  # Filed emails leave Processing
+    assert store.jobs("Ongoing") == ["Job_A", "Job_B"] and store.jobs("Archive") == []
+    assert sorted(store.email_ids("Ongoing", "Job_A")) == ["m1", "m2"]
+    assert store.count("Ongoing", "Job_B") == 1 and store.count("Archive", "Job_B") == 0
+    assert store.has_job("Ongoing", "Job_A") and not store.has_job("Archive", "Job_A")
+    assert store.get("m3")["subject"] == "Subject m3"
+    assert store.get("m9") is None
+    assert sorted(email["email_id"] for email in store.iter_emails("Ongoing", "Job_A")) == ["m1", "m2"]
+    assert store.summaries.get("Job_A") == {"m1": {"date": None, "response": "Pending"},
+                                            "m2": {"date": None, "response": "Pending"}}
+
+def test_moving_a_job_keeps_its_emails(store, tmp_path):
+    for email_id in ("m1", "m2"):
+        store.file_email(write_email(tmp_path / "Email" / "Processing", email_id), "Ongoing", "Job_A")
+    store.save()
+
+    assert store.move_job("Job_A", "Ongoing", "Archive") == 2
+    assert store.move_job("Job_X", "Ongoing", "Archive") == 0
+    store.save()
+
+    assert not store.has_job("Ongoing", "Job_A")
+    assert sorted(store.email_ids("Archive", "Job_A")) == ["m1", "m2"]
+    assert store.get("m1")["email_id"] == "m1"
+
+def test_update_replaces_a_stored_email(store, tmp_path):
+    store.file_email(write_email(tmp_path / "Email" / "Processing", "m1"), "Archive", "Job_A")
+    store.save()
+
+    store.update(dict(store.get("m1"), attachments=[{"sha256": "ab12"}]))
+    store.save()
+    assert store.get("m1")["attachments"] == [{"sha256": "ab12"}]
+    assert store.count("Archive", "Job_A") == 1
+    with pytest.raises(KeyError):
+        store.update({"email_id": "m9"})
+
+def test_stamp_changes_when_a_job_gains_an_email(store, tmp_path):
+    assert store.stamp("Ongoing", "Job_A") is None
+    store.file_email(write_email(tmp_path / "Email" / "Processing", "m1"), "Ongoing", "Job_A")
+    store.save()
+    before = store.stamp("Ongoing", "Job_A")
+
+    store.file_email(write_email(tmp_path / "Email" / "Processing", "m2"), "Ongoing", "Job_A")
+    store.save()
+    assert store.stamp("Ongoing", "Job_A") != before
+
+def test_segment_index_survives_a_reopen(tmp_path):
+    store = SegmentStore(tmp_path / "Segments")
+    for i in range(5):
+        store.add({"email_id": f"m{i}", "body": "x" * i}, "Ongoing", "Job_A" if i % 2 else "Job_B")
+    store.save()
+
+    reopened = SegmentStore(tmp_path / "Segments")
+    assert reopened.email_ids("Ongoing", "Job_A") == ["m1", "m3"]
+    assert [email["body"] for email in reopened.iter_emails("Ongoing", "Job_B")] == ["", "xx", "xxxx"]
+    reopened.move_job("Job_A", "Ongoing", "Archive")
+    assert reopened.locations["m3"] == ("Archive", "Job_A")
+
+def test_adding_a_stored_email_only_reposts_it(tmp_path):
+    store = SegmentStore(tmp_path / "Segments")
+    store.add({"email_id": "m1", "body": "first"}, "Ongoing", "Job_A")
+    store.add({"email_id": "m1", "body": "second"}, "Archive", "Job_A")
+
+    assert store.get("m1")["body"] == "first"
+    assert store.email_ids("Ongoing", "Job_A") == [] and store.email_ids("Archive", "Job_A") == ["m1"]
+    assert len(store.index["segments"]) == 1
+
+def test_sources_are_only_removed_once_the_index_is_saved(tmp_path):
+    store = SegmentStore(tmp_path / "Email" / "Segments")
+    src = write_email(tmp_path / "Email" / "Processing", "m1")
+    store.file_email(src, "Ongoing", "Job_A")
+
+    assert src.exists() and not store.index_file.exists()
+    store.save()
+    assert not src.exists() and store.index_file.exists()
+
+def test_full_segment_rolls_over_to_a_new_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_store, "SEGMENT_SIZE_LIMIT", 1)
+    store = SegmentStore(tmp_path / "Segments")
+    for i in range(3):
+        store.add({"email_id": f"m{i}"}, "Ongoing", "Job_A")
+
+    assert store.index["segments"] == ["seg-000001.jsonl.gz", "seg-000002.jsonl.gz", "seg-000003.jsonl.gz"]
+    assert [email["email_id"] for email in store.iter_emails("Ongoing", "Job_A")] == ["m0", "m1", "m2"]
+
+def test_zstd_segments_when_zstandard_is_installed(tmp_path):
+    pytest.importorskip("zstandard")
+    store = SegmentStore(tmp_path / "Segments")
+    store.add({"email_id": "m1"}, "Ongoing", "Job_A")
+
+    assert store.index["segments"] == ["seg-000001.jsonl.zst"]
+    assert store.get("m1") == {"email_id": "m1"}
+
+def test_migrate_moves_folders_into_segments(tmp_path):
+    email_dir = tmp_path / "Email"
+    write_email(email_dir / "Ongoing" / "Job_A", "m1", response="Pending")
+    write_email(email_dir / "Archive" / "Job_B", "m2", response="Rejected")
+    (email_dir / "Archive" / "Job_B" / "m3.json").write_text("{", encoding="utf-8")
+    assert isinstance(open_store(email_dir), FolderStore)
+
+    migrate(email_dir)
+
+    store = open_store(email_dir)
+    assert isinstance(store, SegmentStore)
+    assert store.email_ids("Ongoing", "Job_A") == ["m1"]
+    assert store.get("m2")["response"] == "Rejected"
+    assert not (email_dir / "Ongoing" / "Job_A").exists()
+    assert [path.name for path in (email_dir / "Archive" / "Job_B").iterdir()] == ["m3.json"]  # Unreadable, kept
+
+# Response summaries
+
+def count_reads(store, monkeypatch):
+    reads = []
+    iter_items = store.iter_items
+
+    def counting(location, job):
+        reads.append((location, job))
+        return iter_items(location, job)
+    monkeypatch.setattr(store, "iter_items", counting)
+    return reads
+
+def test_responses_come_from_the_summary(store, tmp_path, monkeypatch):
+    processing = tmp_path / "Email" / "Processing"
+    store.file_email(write_email(processing, "m1", response="Received"), "Ongoing", "Job_A")
+    store.file_email(write_email(processing, "m2", response="Rejected"), "Ongoing", "Job_A")
+    store.move_job("Job_A", "Ongoing", "Archive")
+    store.save()
+    reads = count_reads(store, monkeypatch)
+
+    assert sorted(job_responses(store, "Job_A")) == ["Received", "Rejected"]
+    assert job_responses(store, "Job_B") == []
+    assert reads == []  # No email was opened
+
+def test_missing_or_incomplete_summary_is_rebuilt(store, tmp_path, monkeypatch):
+    processing = tmp_path / "Email" / "Processing"
+    store.file_email(write_email(processing, "m1", response="Received"), "Ongoing", "Job_A")
+    store.save()
+    store.summaries.summary_dir.joinpath("Job_A.json").unlink()
+    store.summaries.loaded.clear()
+
+    assert job_responses(store, "Job_A") == ["Received"]
+    store.save()
+    assert json.loads(store.summaries.summary_dir.joinpath("Job_A.json").read_text(encoding="utf-8")) == {
+        "m1": {"date": None, "response": "Received"}}
+
+    store.summaries.replace("Job_A", {"m1": {"date": None, "response": "Received"},
+                                      "m9": {"date": None, "response": "Hired"}})
+    reads = count_reads(store, monkeypatch)
+    assert job_responses(store, "Job_A") == ["Received"]
+    assert reads == [("Ongoing", "Job_A"), ("Archive", "Job_A")]
+
+def test_hand_edited_folder_email_refreshes_the_summary(tmp_path):
+    store = FolderStore(tmp_path / "Email")
+    store.file_email(write_email(tmp_path / "Email" / "Processing", "m1", response="Received"), "Ongoing", "Job_A")
+    store.save()
+    filed = write_email(store.job_dir("Ongoing", "Job_A"), "m1", response="Offer")
+    written = store.summaries.written_ns("Job_A")
+    os.utime(filed, ns=(written + 10_000_000, written + 10_000_000))
+
+    assert job_responses(FolderStore(tmp_path / "Email"), "Job_A") == ["Offer"]
+
+def test_segment_update_refreshes_the_summary(tmp_path):
+    store = SegmentStore(tmp_path / "Email" / "Segments")
+    store.file_email(write_email(tmp_path / "Email" / "Processing", "m1", response="Received"), "Ongoing", "Job_A")
+    store.save()
+
+    store.update(dict(store.get("m1"), response="Offer"))
+    store.save()
+    assert job_responses(SegmentStore(tmp_path / "Email" / "Segments"), "Job_A") == ["Offer"]
+
+def test_rebuild_summaries_drops_jobs_without_emails(store, tmp_path):
+    store.file_email(write_email(tmp_path / "Email" / "Processing", "m1", response="Received"), "Ongoing", "Job_A")
+    store.summaries.replace("Gone", {"m0": {"date": None, "response": "Hired"}})
+    store.save()
+
+    rebuild_summaries(store)
+    assert sorted(path.stem for path in store.summaries.summary_dir.glob("*.json")) == ["Job_A"]
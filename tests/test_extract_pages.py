@@ -0,0 +1,92 @@
+"""The fast selectolax/lxml extractors and their fallback to bs4."""
+import pytest
+import extract_pages
+from extract_pages import extract_text, fast_text, html_to_text, is_boilerplate
+
+VACANCY = ("<h1>Data Engineer</h1><p>Wij zoeken een Data Engineer voor ons team in Groningen. "
+           "Je bouwt datapijplijnen en werkt samen met analisten.</p><p>Reageren kan tot 31 januari 2026.</p>")
+
+def page(body):
+    return f"<html><head><title>Vacature</title><style>p {{color: red}}</style></head><body>{body}</body></html>".encode()
+
+@pytest.fixture(params=["selectolax", "lxml"])
+def extractor(request):
+    if request.param not in extract_pages.available_extractors():
+        pytest.skip(f"{request.param} is not installed")
+    return request.param
+
+def lines(text):
+    return text.splitlines()
+
+def test_boilerplate_is_dropped(extractor):
+    content = page(
+        '<nav><a href="/">Home</a><a href="/vacatures">Alle vacatures</a></nav>'
+        '<div class="cookie-banner">Wij gebruiken cookies</div>'
+        '<header><div class="logo">Acme</div></header>'
+        f'<main>{VACANCY}<button>Solliciteer</button></main>'
+        '<footer>© Acme 2026</footer><script>track()</script>'
+    )
+    text = fast_text(content, extractor)
+
+    assert lines(text)[0] == "Data Engineer"
+    assert "Reageren kan tot 31 januari 2026." in lines(text)
+    for dropped in ("Alle vacatures", "cookies", "© Acme", "Solliciteer", "track()", "color"):
+        assert dropped not in text
+
+def test_aspnet_form_wrapper_is_kept(extractor):
+    content = page(f'<form id="aspnetForm" action="/vacature.aspx"><div class="content">{VACANCY}</div></form>')
+    assert "Reageren kan tot 31 januari 2026." in fast_text(content, extractor)
+
+def test_whole_token_names_keep_vacancy_containers(extractor):
+    content = page(
+        f'<div class="modal-body">{VACANCY}</div>'
+        '<div class="vacancy-share-content"><p>Deel deze vacature met een vriend die ook data leuk vindt.</p></div>'
+        '<div class="share"><a href="#">LinkedIn</a></div>'
+    )
+    text = fast_text(content, extractor)
+    assert "Data Engineer" in text and "Deel deze vacature" in text
+    assert "LinkedIn" not in text
+
+def test_header_inside_main_is_content(extractor):
+    content = page(f'<header>Site</header><article><header><h1>Data Engineer</h1><p>Groningen, 36 uur</p>'
+                   f'</header>{VACANCY}</article>')
+    text = fast_text(content, extractor)
+    assert "Groningen, 36 uur" in lines(text) and "Site" not in lines(text)
+
+def test_short_teaser_main_falls_back_to_the_body(extractor):
+    content = page(f'<main><p>Bekijk onze vacatures</p></main><div class="vacature">{VACANCY}</div>')
+    text = fast_text(content, extractor)
+    assert "Reageren kan tot 31 januari 2026." in text
+
+def test_losing_most_of_the_page_hands_it_to_bs4(extractor):
+    # The main is long enough on its own, but the vacancy sits next to it
+    long_vacancy = VACANCY * 4
+    content = page(f'<main><p>{"Over Acme. " * 12}</p></main><div>{long_vacancy}</div>')
+
+    assert fast_text(content, extractor) is None
+    assert extract_text(content, extractor) == html_to_text(content)
+
+def test_tiny_page_hands_it_to_bs4(extractor):
+    content = page('<div id="app"></div><script src="app.js"></script>')
+    assert fast_text(content, extractor) is None
+    assert extract_text(content, extractor) == html_to_text(content)
+
+@pytest.mark.parametrize("attributes, expected", [
+    ({"role": "Navigation"}, True),
+    ({"class": "site-footer footer"}, True),
+    ({"id": "cookieConsent"}, True),
+    ({"class": "gdpr-overlay"}, True),
+    ({"class": "modal-body"}, False),
+    ({"class": "vacancy-share-content"}, False),
+    ({"class": "main-menu-item"}, False),
+    ({"class": None, "id": None}, False),
+])
+def test_is_boilerplate(attributes, expected):
+    assert is_boilerplate(attributes) is expected
+
+def test_bs4_is_always_available():
+    content = page(VACANCY)
+    assert extract_text(content, "bs4") == html_to_text(content)
+    assert "Data Engineer" in html_to_text(content)
+    with pytest.raises(ValueError, match="not installed"):
+        extract_text(content, "html5lib")
@@ -0,0 +1,370 @@
+"""fetch_emails.py against an in-memory Gmail service."""
+import json
+from datetime import datetime
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import fetch_emails as fe
+from fake_gmail import FakeGmail, http_error, make_message
+from message_ledger import MessageLedger, STATUS_PROCESSING, STATUS_SPAM
+from routing_cache import RoutingCache
+from sender_classifier import SenderClassifier
+
+class FakeClock:
+    """Stands in for the time module in fetch_emails: sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fe, "time", clock)
+    return clock
+
+@pytest.fixture
+def mailbox(tmp_path, monkeypatch):
+    """Point fetch_emails at a temporary Email folder and config."""
+    processing = tmp_path / "Email" / "Processing"
+    processing.mkdir(parents=True)
+    monkeypatch.setattr(fe, "PROCESSING_DIR", processing)
+    monkeypatch.setattr(fe, "CONFIG_FILE", tmp_path / "config" / "fetch_emails_config.json")
+    monkeypatch.setattr(fe, "STATE_FILE", tmp_path / "data" / "fetch_state.json")
+    ledger = MessageLedger(tmp_path / "Email" / "seen_messages.jsonl")
+
+    def run(service, spam=(), **kwargs):
+        monkeypatch.setattr(fe, "load_credentials", lambda: service)
+        fe.fetch_emails(classifier=SenderClassifier(spam), ledger=ledger,
+                        routing=RoutingCache(tmp_path / "Email" / "routing_cache.json"), **kwargs)
+
+    def saved():
+        return sorted(path.stem for path in processing.glob("m*.json"))
+
+    yield SimpleNamespace(processing=processing, ledger=ledger, run=run, saved=saved)
+    ledger.close()
+
+def message_ids(n):
+    return [f"m{i}" for i in range(n)]
+
+# Batch splitting
+
+def test_batches_split_at_batch_size():
+    service = FakeGmail([make_message(i) for i in range(95)])
+    fetched = list(fe.get_messages(lambda: service, message_ids(95), batch_size=40))
+
+    assert [call[1] for call in service.calls if call[0] == "batch"] == [40, 40, 15]
+    assert [email_id for email_id, _, _ in fetched] == message_ids(95)
+    assert fetched[7][1]["subject"] == "Vacature 7"
+
+def test_batch_size_is_capped_at_the_gmail_limit():
+    service = FakeGmail([make_message(i) for i in range(150)])
+    list(fe.get_messages(lambda: service, message_ids(150), batch_size=250))
+
+    assert [call[1] for call in service.calls if call[0] == "batch"] == [100, 50]
+
+def test_without_batch_size_every_message_is_its_own_get():
+    service = FakeGmail([make_message(i) for i in range(5)])
+    list(fe.get_messages(lambda: service, message_ids(5)))
+
+    assert service.count("batch") == 0
+    assert service.count("get:full") == 5
+
+def test_batched_fetch_saves_the_same_output(mailbox):
+    messages = [make_message(i, sender="noreply@spam.nl", subject="Nieuwsbrief") if i % 4 == 0 else make_message(i)
+                for i in range(30)]
+    service = FakeGmail(messages, page_size=10)
+    mailbox.run(service, query="after:2026/01/01", batch_size=8, spam=["spam.nl"])
+
+    assert mailbox.saved() == sorted(f"m{i}" for i in range(30) if i % 4)
+    assert mailbox.ledger.status("m4") == STATUS_SPAM
+    assert mailbox.ledger.status("m5") == STATUS_PROCESSING
+    email = json.loads((mailbox.processing / "m5.json").read_text(encoding="utf-8"))
+    assert email["body"] == "Body 5"
+    assert email["attachments"][0]["attachment_id"] == "a5"
+
+# Retries
+
+class Flaky:
+    """A request failing with the given statuses before it succeeds."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.attempts = 0
+
+    def execute(self):
+        self.attempts += 1
+        if self.statuses:
+            raise http_error(self.statuses.pop(0))
+        return {"ok": True}
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_execute_retries_rate_limits_and_server_errors(status, clock):
+    request, limiter = Flaky(status, status), fe.RateLimiter()
+
+    assert fe.execute(request, limiter) == {"ok": True}
+    assert request.attempts == 3
+    backoffs = [seconds for seconds in clock.sleeps if seconds >= 1]  # The rest is the limiter refilling
+    assert len(backoffs) == 2 and backoffs[1] > backoffs[0]
+    assert limiter.throttled == 2
+    assert limiter.rate < limiter.max_rate
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_execute_raises_other_errors_at_once(status):
+    request = Flaky(status)
+
+    with pytest.raises(fe.HttpError):
+        fe.execute(request)
+    assert request.attempts == 1
+
+def test_execute_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(fe, "MAX_RETRIES", 2)
+    request = Flaky(503, 503, 503, 503)
+
+    with pytest.raises(fe.HttpError):
+        fe.execute(request)
+    assert request.attempts == 3
+
+def test_failed_batch_calls_are_retried_one_by_one():
+    service = FakeGmail([make_message(i) for i in range(10)], failures={"m3": [429], "m7": [503]})
+    limiter = fe.RateLimiter()
+    fetched = list(fe.get_messages(lambda: service, message_ids(10), batch_size=10, limiter=limiter))
+
+    assert [email_id for email_id, _, _ in fetched] == message_ids(10)
+    assert sorted(call[1] for call in service.calls if call[0] == "get:full") == ["m3", "m7"]
+    assert limiter.throttled == 1  # Once per batch, not per failed call
+
+def test_deleted_message_is_skipped():
+    service = FakeGmail([make_message(i) for i in range(3)])
+    fetched = list(fe.get_messages(lambda: service, ["m0", "gone", "m2"], batch_size=10))
+
+    assert [email_id for email_id, _, _ in fetched] == ["m0", "m2"]
+
+# Thread-local services
+
+def test_each_thread_builds_its_own_service(monkeypatch):
+    built = []
+
+    def build(*args, **kwargs):
+        service = object()
+        built.append(service)
+        return service
+    monkeypatch.setattr(fe, "build", build)
+    get_service = fe.make_service_factory(object())  # Credentials, not a service
+    barrier = threading.Barrier(4)
+
+    def worker(_):
+        barrier.wait()  # All four threads alive at once
+        return get_service(), get_service()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pairs = list(pool.map(worker, range(4)))
+
+    assert all(first is second for first, second in pairs)
+    assert len({id(first) for first, _ in pairs}) == 4
+    assert len(built) == 4
+
+def test_a_ready_made_service_is_shared():
+    service = FakeGmail([])
+    assert fe.make_service_factory(service)() is service
+
+def test_concurrent_fetch_never_shares_a_service_between_threads(monkeypatch):
+    messages = [make_message(i) for i in range(200)]
+    services = []
+
+    def build(*args, **kwargs):
+        service = FakeGmail(messages)
+        services.append(service)
+        return service
+    monkeypatch.setattr(fe, "build", build)
+    get_service = fe.make_service_factory(object())
+    fetched = list(fe.get_messages(get_service, message_ids(200), batch_size=10, concurrency=4))
+
+    assert sorted(email_id for email_id, _, _ in fetched) == sorted(message_ids(200))
+    used = [service for service in services if service.calls]
+    assert len(used) > 1
+    assert all(len({call[2] for call in service.calls}) == 1 for service in used)
+
+# Ledger
+
+def test_messages_in_the_ledger_or_processing_are_not_downloaded(mailbox):
+    mailbox.ledger.record("m1", STATUS_SPAM)
+    mailbox.ledger.record("m2", "archived", "Data_Engineer_—_Acme")
+    (mailbox.processing / "m3.json").write_text("{}", encoding="utf-8")
+    service = FakeGmail([make_message(i) for i in range(6)])
+    mailbox.run(service, query="after:2026/01/01", batch_size=10)
+
+    fetched = {call[1] for call in service.calls if call[0] == "get:full"}
+    assert service.count("batch") == 1
+    assert fetched == set()  # Nothing failed, so no single gets either
+    assert mailbox.saved() == ["m0", "m3", "m4", "m5"]
+    assert (mailbox.processing / "m3.json").read_text(encoding="utf-8") == "{}"
+    assert mailbox.ledger.status("m1") == STATUS_SPAM
+
+def test_second_run_downloads_nothing(mailbox):
+    service = FakeGmail([make_message(i) for i in range(5)])
+    mailbox.run(service, query="after:2026/01/01")
+    for path in mailbox.processing.glob("m*.json"):
+        path.unlink()  # Filed by organize_emails in the meantime
+    service.calls.clear()
+    mailbox.run(service, query="after:2026/01/01")
+
+    assert service.count("get:full") == 0
+    assert mailbox.saved() == []
+
+# History sync
+
+def write_config(history_id):
+    fe.CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fe.CONFIG_FILE.write_text(json.dumps({"cutoff_date": "2026/01/01", "last_run": None,
+                                          "history_id": history_id}), encoding="utf-8")
+
+def test_history_sync_fetches_only_added_messages(mailbox):
+    write_config("100")
+    service = FakeGmail([make_message(i) for i in range(5)], history=["m1", "m3"], history_id="200")
+    mailbox.run(service, incremental=True)
+
+    assert service.count("list") == 0
+    assert mailbox.saved() == ["m1", "m3"]
+    assert fe.load_config()["history_id"] == "200"
+
+def test_expired_history_falls_back_to_a_full_sync(mailbox):
+    write_config("100")
+    service = FakeGmail([make_message(i) for i in range(5)], history=None, history_id="200")
+    mailbox.run(service, incremental=True)
+
+    kinds = [call[0] for call in service.calls]
+    assert kinds.index("history") < kinds.index("list")
+    assert [call[1] for call in service.calls if call[0] == "list"] == ["after:2026/01/01"]
+    assert mailbox.saved() == message_ids(5)
+    assert fe.load_config()["history_id"] == "200"
+    assert not fe.STATE_FILE.exists()
+
+def test_list_history_returns_none_when_expired():
+    assert fe.list_history_messages(FakeGmail([], history=None), "100") is None
+
+# Two-phase fetch
+
+def test_two_phase_downloads_bodies_only_for_non_spam(mailbox):
+    messages = [make_message(i, sender="noreply@spam.nl", subject="Nieuwsbrief") if i % 2 else make_message(i)
+                for i in range(10)]
+    service = FakeGmail(messages)
+    mailbox.run(service, query="after:2026/01/01", batch_size=10, two_phase=True, spam=["spam.nl"])
+
+    full = [call for call in service.calls if call[0] == "batch"]
+    assert [call[1] for call in full] == [10, 5]  # Metadata for all, then full for the survivors
+    assert mailbox.saved() == ["m0", "m2", "m4", "m6", "m8"]
+    assert all(mailbox.ledger.status(f"m{i}") == STATUS_SPAM for i in range(1, 10, 2))
+
+def test_two_phase_keeps_job_mail_from_a_listed_sender(mailbox):
+    service = FakeGmail([make_message(0, sender="noreply@spam.nl", subject="Uitnodiging sollicitatiegesprek")])
+    mailbox.run(service, query="after:2026/01/01", two_phase=True, spam=["spam.nl"])
+
+    assert mailbox.saved() == ["m0"]
+
+def test_two_phase_without_a_spam_list_is_a_normal_fetch(mailbox):
+    service = FakeGmail([make_message(i) for i in range(3)])
+    mailbox.run(service, query="after:2026/01/01", two_phase=True)
+
+    assert service.count("get:metadata") == 0
+    assert mailbox.saved() == ["m0", "m1", "m2"]
+
+# Server-side spam exclusion
+
+def test_exclusion_terms_skip_what_gmail_cannot_express():
+    terms = fe.spam_exclusion_terms(["News@Example.com", "example.org", "@mail.example.net", "*@mailchimp*",
+                                     "quoted \"name\"", "news@example.com"])
+    assert terms == ["-from:@mail.example.net", "-from:@example.org", "-from:news@example.com"]
+
+def test_list_query_keeps_job_mail_and_fits_the_length_limit():
+    spam = [f"sender{i:04d}@spam-domain.nl" for i in range(500)]
+    list_query, excluded = fe.build_list_query("after:2026/01/01", spam)
+
+    assert len(list_query) <= fe.MAX_QUERY_LENGTH
+    assert 0 < excluded < len(spam)
+    assert list_query.startswith("after:2026/01/01 ((-from:sender0000@spam-domain.nl ")
+    assert "subject:(sollicitatie OR vacature" in list_query
+    assert fe.build_list_query("after:2026/01/01", []) == ("after:2026/01/01", 0)
+
+@pytest.mark.parametrize("subject", ["Uitnodiging sollicitatiegesprek", "Nieuwe vacatures voor jou",
+                                     "Jobalert: 5 nieuwe jobs", "Your application at Acme",
+                                     "Bevestiging van je sollicitatie", "Careers at Beta"])
+def test_job_subjects_kept_locally_pass_the_server_side_exclusion(subject):
+    assert SenderClassifier().has_job_keyword(subject)
+    words = {word.strip(":,.!?").lower() for word in subject.split()}
+    assert words & set(fe.SERVER_JOB_TERMS)  # Gmail matches whole words only
+
+def test_senders_left_out_of_the_query_are_filtered_client_side(mailbox, monkeypatch):
+    monkeypatch.setattr(fe, "MAX_QUERY_LENGTH", 750)  # Room for a few senders only
+    spam = [f"noreply@spam{i:02d}.nl" for i in range(40)]
+    messages = [make_message(i, sender=spam[-1], subject="Nieuwsbrief") if i % 5 == 0 else make_message(i)
+                for i in range(20)]
+    service = FakeGmail(messages, page_size=5)
+    mailbox.run(service, query="after:2026/01/01", server_filter=True, spam=spam)
+
+    [list_query] = {call[1] for call in service.calls if call[0] == "list"}
+    assert "-from:noreply@spam00.nl" in list_query and "-from:noreply@spam39.nl" not in list_query
+    assert service.count("list") == 4  # One pass over the pages, nothing listed up front
+    assert mailbox.saved() == sorted(f"m{i}" for i in range(20) if i % 5)
+    assert mailbox.ledger.status("m0") == STATUS_SPAM
+
+# Streaming
+
+def test_prefetch_keeps_order_and_reraises_errors():
+    def pages():
+        yield 1
+        yield 2
+        raise RuntimeError("list failed")
+
+    seen = []
+    with pytest.raises(RuntimeError, match="list failed"):
+        for page in fe.prefetch(pages()):
+            seen.append(page)
+    assert seen == [1, 2]
+
+def test_first_page_is_processed_before_the_last_is_listed(mailbox):
+    service = FakeGmail([make_message(i) for i in range(60)], page_size=10)
+    mailbox.run(service, query="after:2026/01/01", batch_size=10)
+
+    # prefetch runs at most a page or two ahead of the fetch
+    kinds = [call[0] for call in service.calls if call[0] in ("list", "batch")]
+    assert kinds.index("batch") < len(kinds) - 1 - kinds[::-1].index("list")
+
+# Checkpoint and resume
+
+def test_resume_continues_the_saved_list_query(mailbox):
+    service = FakeGmail([make_message(i) for i in range(30)], page_size=10, failures={"m12": [403]})
+    with pytest.raises(fe.HttpError):
+        mailbox.run(service, query="after:2026/01/01", server_filter=True, spam=["noreply@spam.nl"])
+    state = fe.load_state()
+    assert state["page_number"] == 1 and state["page_token"] == "10"
+    assert mailbox.saved() == sorted(message_ids(12))  # m12 failed halfway through page two
+
+    service.calls.clear()
+    # organize_emails learned a new unrelated sender in the meantime
+    mailbox.run(service, resume=True, spam=["noreply@spam.nl", "news@shop.nl"])
+
+    queries = [call[1] for call in service.calls if call[0] == "list"]
+    assert queries == [state["list_query"]] * 2  # Pages 2 and 3 only, with the query the token came from
+    assert "news@shop.nl" not in state["list_query"]
+    assert mailbox.saved() == sorted(message_ids(30))
+    assert not fe.STATE_FILE.exists()
+    assert fe.load_config()["cutoff_date"] == datetime.fromisoformat(state["started_at"]).strftime("%Y/%m/%d")
+
+def test_unfinished_run_is_not_resumed_without_resume(mailbox):
+    service = FakeGmail([make_message(i) for i in range(20)], page_size=10, failures={"m12": [403]})
+    with pytest.raises(fe.HttpError):
+        mailbox.run(service, query="after:2026/01/01")
+
+    service.calls.clear()
+    mailbox.run(service, query="after:2026/01/01")
+    assert service.count("list") == 2  # Started over from the first page
+    assert service.count("get:full") == 8  # m0-m11 were saved before the crash
@@ -0,0 +1,168 @@
+"""Concurrent job-page fetching against local stand-in hosts."""
+import time
+import asyncio
+from types import SimpleNamespace
+import pytest
+import fetch_job_pages
+from fetch_job_pages import HostThrottle, PageCache, change_flags, fetch_pages
+from local_server import PAGE, InFlight, LocalHost, html
+
+DELAY = 0.2
+TOLERANCE = 0.05  # Arrival is logged a moment after the throttle let the request go
+
+@pytest.fixture
+def hosts():
+    """Start LocalHosts with hosts(n, ...); all are shut down after the test."""
+    started = []
+
+    def start(n=1, **kwargs):
+        new = [LocalHost(**kwargs) for _ in range(n)]
+        started.extend(new)
+        return new
+    yield start
+    for host in started:
+        host.close()
+
+def fetch(targets, concurrency=4, delay=DELAY):
+    return asyncio.run(fetch_pages(targets, concurrency, delay, timeout=(5, 15)))
+
+def test_requests_to_one_host_keep_their_distance(hosts):
+    a, b = hosts(2, latency=0.01)
+    targets = [(f"{name}-{n}", host.url(f"/vacature/{n}")) for n in range(3) for name, host in (("a", a), ("b", b))]
+
+    start = time.perf_counter()
+    results = fetch(targets)
+    elapsed = time.perf_counter() - start
+
+    assert all(r.ok and r.status == 200 for r in results)
+    assert len(results) == 6 and "Data Engineer" in results[0].text
+    for host in (a, b):
+        assert len(host.arrivals) == 3
+        assert host.min_gap() >= DELAY - TOLERANCE
+    # Both hosts are polled side by side: two delays, not five
+    assert elapsed < 4 * DELAY
+    assert abs(a.arrivals[0] - b.arrivals[0]) < DELAY
+
+def test_concurrency_caps_requests_in_flight(hosts):
+    in_flight = InFlight()
+    many = hosts(6, latency=0.1, in_flight=in_flight)
+
+    results = fetch([(f"job{i}", host.url()) for i, host in enumerate(many)], concurrency=2)
+
+    assert all(r.ok for r in results)
+    assert in_flight.peak == 2
+
+def test_slow_hosts_holding_every_worker_do_not_bunch_a_fast_host(hosts):
+    """While slow hosts hold the workers, the fast host's requests all fall due;
+    they must still start DELAY apart once a worker frees up."""
+    pages, concurrency = 3, 2
+    slow = hosts(concurrency, latency=DELAY * (pages + 1))
+    [fast] = hosts(1, latency=0.01)
+    targets = [(f"slow{i}", host.url()) for i, host in enumerate(slow)]
+    targets += [(f"fast-{n}", fast.url(f"/vacature/{n}")) for n in range(pages)]
+
+    results = fetch(targets, concurrency=concurrency)
+
+    assert all(r.ok for r in results)
+    assert len(fast.arrivals) == pages
+    assert fast.min_gap() >= DELAY - TOLERANCE
+
+def test_errors_are_reported_per_page(hosts):
+    [missing] = hosts(1, respond=lambda request: html("<p>Niet gevonden</p>", status=404))
+    [gone] = hosts(1)
+    gone.close()
+
+    results = {r.job: r for r in fetch([("missing", missing.url()), ("gone", gone.url())])}
+
+    assert results["missing"].status == 404 and not results["missing"].ok
+    assert not results["gone"].ok and results["gone"].status is None
+
+def test_throttle_slot_is_only_taken_once():
+    throttle = HostThrottle(delay=60)
+    assert throttle.claim("acme.nl")
+    assert not throttle.claim("acme.nl")
+    assert throttle.claim("beta.nl")
+
+# Conditional re-polling (--refresh)
+
+SALARY = "<p>Salaris: schaal 9, maximaal 4.500 euro bruto per maand.</p>"
+
+class Site:
+    """A vacancy page with an ETag that answers If-None-Match with 304."""
+
+    def __init__(self, body):
+        self.body = body
+        self.version = 1
+
+    def change(self, body):
+        self.body = body
+        self.version += 1
+
+    def respond(self, request):
+        etag = f'"v{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return html(self.body, headers={"ETag": etag})
+
+@pytest.fixture
+def refresh(tmp_path, monkeypatch, hosts):
+    """One active job whose Link points at a local Site; run(refresh) fetches it."""
+    site = Site(PAGE.replace("</main>", SALARY + "</main>"))
+    [host] = hosts(1, respond=site.respond)
+    job = SimpleNamespace(name="Data_Engineer_—_Acme", path=tmp_path / "Data_Engineer_—_Acme",
+                          info={"Link": host.url()}, errors={})
+    job.path.mkdir()
+    monkeypatch.setattr(fetch_job_pages, "load_jobs", lambda include_archived: [job])
+    monkeypatch.setattr(fetch_job_pages, "PageCache", lambda: PageCache(tmp_path / "page_cache.json"))
+
+    def run(refresh=True):
+        fetch_job_pages.fetch_and_save_webpage(delay=0, refresh=refresh, render=False)
+        return host.requests[-1][1]
+
+    return SimpleNamespace(site=site, host=host, job=job, run=run, cache=lambda: PageCache(tmp_path / "page_cache.json"))
+
+def test_unchanged_posting_costs_a_304(refresh, capsys):
+    assert "If-None-Match" not in refresh.run()
+    saved = (refresh.job.path / "webpage.txt").read_text(encoding="utf-8")
+    assert refresh.cache().get(refresh.host.url())["etag"] == '"v1"'
+
+    assert refresh.run()["If-None-Match"] == '"v1"'
+    assert "Unchanged: 1 (1 via 304)" in capsys.readouterr().out
+    assert (refresh.job.path / "webpage.txt").read_text(encoding="utf-8") == saved
+    assert not (refresh.job.path / "webpage.diff").exists()
+
+def test_changed_posting_gets_a_diff_with_flags(refresh, capsys):
+    refresh.run()
+    refresh.site.change(refresh.site.body.replace("31 januari 2026", "15 februari 2026"))
+
+    refresh.run()
+    assert "15 februari" in (refresh.job.path / "webpage.txt").read_text(encoding="utf-8")
+    diff = (refresh.job.path / "webpage.diff").read_text(encoding="utf-8")
+    assert "touches deadline" in diff and "salary" not in diff.splitlines()[0]
+    assert "-Reageren kan tot 31 januari 2026." in diff and "+Reageren kan tot 15 februari 2026." in diff
+    assert "Changed: 1" in capsys.readouterr().out
+    assert refresh.cache().get(refresh.host.url())["etag"] == '"v2"'
+
+def test_javascript_shell_never_replaces_the_page_or_sends_validators(refresh):
+    refresh.run()
+    saved = (refresh.job.path / "webpage.txt").read_text(encoding="utf-8")
+    refresh.site.change('<html><body><div id="app"></div><script src="app.js"></script></body></html>')
+
+    refresh.run()
+    assert (refresh.job.path / "webpage.txt").read_text(encoding="utf-8") == saved
+    assert refresh.cache().get(refresh.host.url())["shell"]
+    assert "If-None-Match" not in refresh.run()  # Its 304 would say nothing about the rendered page
+
+def test_without_refresh_a_saved_page_is_not_fetched_again(refresh):
+    refresh.run(refresh=False)
+    refresh.run(refresh=False)
+    assert len(refresh.host.requests) == 1
+
+@pytest.mark.parametrize("old, new, flags", [
+    ("Reageren kan tot 31 januari.", "Reageren kan tot 15 februari.", ["deadline"]),
+    ("Het salaris is 3.000 euro bruto per maand.", "Het salaris is 3.500 euro bruto per maand.", ["salary"]),
+    ("Wij bieden een leuk team. " * 5 + "Deadline: 31 januari. Salaris: schaal 9.",
+     "Wij bieden een fijn team. " + "Wij bieden een leuk team. " * 4 + "Deadline: 31 januari. Salaris: schaal 9.", []),
+])
+def test_change_flags_only_look_near_the_edit(old, new, flags):
+    assert change_flags([f"-{old}", f"+{new}"]) == flags
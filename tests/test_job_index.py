@@ -0,0 +1,69 @@
+"""JobIndex scores emails exactly like the old per-folder matcher."""
+import pytest
+import job_index
+from bench_job_matching import legacy_best_match, legacy_calculate_match_score, make_workload
+from job_index import JobIndex
+
+NO_ALIASES = "/nonexistent/company_aliases.json"
+
+JOBS = ["Data_Engineer_—_Acme_Groep", "Data_Analist_—_Beta", "Proces_Engineer_12345_—_Acme_Groep", "Unparseable"]
+
+@pytest.fixture(params=["numpy", "dict"])
+def scoring(request, monkeypatch):
+    """Run each test with numpy.bincount and with the pure-Python totals."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(job_index, "np", None)
+    return request.param
+
+def test_weights_match_the_old_score(scoring):
+    index = JobIndex(JOBS, aliases_file=NO_ALIASES)
+    email = ("HR <jobs@acmegroep.nl>", "Uw sollicitatie Data Engineer", "Beste, bedankt namens Acme.")
+
+    # domain acme/groep +50 each, subject data/engineer +15 each, body acme +10
+    assert legacy_calculate_match_score(JOBS[0], email[0], email[1], email[2]) == 140
+    assert index.best_match(None, email[1], email[0], email[2]) == (JOBS[0], 140)
+
+def test_vacancy_number_outweighs_everything_else(scoring):
+    index = JobIndex(JOBS, aliases_file=NO_ALIASES)
+    assert index.best_match(None, "Data Engineer", "hr@acmegroep.nl", "Vacature 12345") == (JOBS[2], 220)
+
+def test_keywords_match_as_substrings(scoring):
+    index = JobIndex(JOBS, aliases_file=NO_ALIASES)
+    assert index.best_match(None, "Twee analisten gezocht", "x@y.nl") == (JOBS[1], 15)  # "analist" in "analisten"
+
+def test_ties_go_to_the_first_job(scoring):
+    index = JobIndex(["Tester_—_Gamma", "Tester_—_Delta"], aliases_file=NO_ALIASES)
+    assert index.best_match(None, "Tester gezocht", "x@y.nl") == ("Tester_—_Gamma", 15)
+
+def test_weak_matches_are_not_filed(scoring):
+    index = JobIndex(JOBS, aliases_file=NO_ALIASES)
+    assert index.best_match(None, "Nieuwsbrief", "x@y.nl", "Data engineer") == (JOBS[0], 10)
+    assert index.match(None, "Nieuwsbrief", "x@y.nl", "Data engineer") is None  # A match needs more than 10
+    assert index.match(None, "Nieuwsbrief", "x@y.nl") is None
+    assert JobIndex([], aliases_file=NO_ALIASES).match(None, "Data Engineer", "x@acme.nl") is None
+
+def test_index_agrees_with_the_legacy_loop_on_a_workload(scoring):
+    jobs, emails = make_workload(300, 300, seed=7)
+    index = JobIndex(jobs, aliases_file=NO_ALIASES)
+
+    for e in emails:
+        expected = legacy_best_match(jobs, e["subject"], e["from"], e["body"])
+        assert index.best_match(None, e["subject"], e["from"], e["body"]) == expected
+
+def test_both_scoring_strategies_agree_on_candidates(scoring):
+    jobs, emails = make_workload(300, 100, seed=11)
+    index = JobIndex(jobs, aliases_file=NO_ALIASES)
+    candidates = list(range(0, len(jobs), 3))
+    names = [jobs[i] for i in candidates]
+
+    for e in emails:
+        hits = index.hits(e["from"], e["subject"], e["body"])
+        if not hits:
+            continue
+        by_candidates = index._best_by_candidates(hits, candidates)
+        by_postings = index._best_by_postings(hits, candidates)
+        assert by_candidates[1] == by_postings[1]
+        if by_postings[1]:
+            assert (jobs[by_postings[0]], by_postings[1]) == legacy_best_match(names, e["subject"], e["from"], e["body"])
@@ -0,0 +1,144 @@
+"""The job catalog's manifest: what it reuses and when it re-reads."""
+import os
+import json
+import threading
+import pytest
+import jobs
+from jobs import load_jobs
+
+@pytest.fixture
+def catalog(tmp_path):
+    """A Solicitaties folder with one active and one archived job."""
+    root = tmp_path / "Solicitaties"
+    write_job(root / "Data_Engineer_—_Acme", {"Link": "https://acme.nl/1"}, {"Response": "Pending"})
+    write_job(root / "1.Archief" / "Analist_—_Beta", {"Link": "https://beta.nl/2"}, {"Response": "Rejected"})
+    return root
+
+def write_job(folder, info, stats):
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "relevant_info.json").write_text(json.dumps(info), encoding="utf-8")
+    (folder / "stats.json").write_text(json.dumps(stats), encoding="utf-8")
+
+def load(catalog, **kwargs):
+    return {job.name: job for job in load_jobs(solicitaties_dir=catalog,
+                                               manifest_file=catalog.parent / "data" / "jobs_manifest.json", **kwargs)}
+
+def manifest(catalog):
+    return json.loads((catalog.parent / "data" / "jobs_manifest.json").read_text(encoding="utf-8"))
+
+def count_reads(monkeypatch):
+    reads = []
+    read_json = jobs._read_json
+
+    def counting(path, st, cached):
+        entry, reparsed = read_json(path, st, cached)
+        if reparsed:
+            reads.append(os.path.basename(os.path.dirname(path)) + "/" + os.path.basename(path))
+        return entry, reparsed
+    monkeypatch.setattr(jobs, "_read_json", counting)
+    return reads
+
+def test_cold_load_reads_everything(catalog):
+    loaded = load(catalog)
+
+    assert loaded["Data_Engineer_—_Acme"].stats == {"Response": "Pending"}
+    assert loaded["Analist_—_Beta"].archived
+    assert loaded["Analist_—_Beta"].info == {"Link": "https://beta.nl/2"}
+    assert len(manifest(catalog)["files"]) == 4
+
+def test_warm_load_reads_nothing(catalog, monkeypatch):
+    load(catalog)
+    saved = (catalog.parent / "data" / "jobs_manifest.json").stat().st_mtime_ns
+    reads = count_reads(monkeypatch)
+
+    assert load(catalog)["Data_Engineer_—_Acme"].info == {"Link": "https://acme.nl/1"}
+    assert reads == []
+    assert (catalog.parent / "data" / "jobs_manifest.json").stat().st_mtime_ns == saved
+
+def test_changed_size_is_reread(catalog, monkeypatch):
+    load(catalog)
+    reads = count_reads(monkeypatch)
+    (catalog / "Data_Engineer_—_Acme" / "stats.json").write_text('{"Response": "Interview"}', encoding="utf-8")
+
+    assert load(catalog)["Data_Engineer_—_Acme"].stats == {"Response": "Interview"}
+    assert reads == ["Data_Engineer_—_Acme/stats.json"]
+
+def test_changed_mtime_with_the_same_size_is_reread(catalog, monkeypatch):
+    load(catalog)
+    reads = count_reads(monkeypatch)
+    stats_file = catalog / "Data_Engineer_—_Acme" / "stats.json"
+    st = stats_file.stat()
+    stats_file.write_text('{"Response": "Accepted"}', encoding="utf-8")  # As long as "Pending"
+    os.utime(stats_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert load(catalog)["Data_Engineer_—_Acme"].stats == {"Response": "Accepted"}
+    assert reads == ["Data_Engineer_—_Acme/stats.json"]
+
+def test_moved_and_deleted_folders_leave_the_manifest(catalog):
+    load(catalog)
+    (catalog / "Data_Engineer_—_Acme").rename(catalog / "1.Archief" / "Data_Engineer_—_Acme")
+    for path in (catalog / "1.Archief" / "Analist_—_Beta").iterdir():
+        path.unlink()
+    (catalog / "1.Archief" / "Analist_—_Beta").rmdir()
+
+    loaded = load(catalog)
+    assert loaded["Data_Engineer_—_Acme"].archived
+    assert "Analist_—_Beta" not in loaded
+    assert sorted(manifest(catalog)["files"]) == ["1.Archief/Data_Engineer_—_Acme/relevant_info.json",
+                                                  "1.Archief/Data_Engineer_—_Acme/stats.json"]
+
+def test_unreadable_file_is_reported_and_reread_once_fixed(catalog):
+    info_file = catalog / "Data_Engineer_—_Acme" / "relevant_info.json"
+    info_file.write_text('{"Link": ', encoding="utf-8")
+    job = load(catalog)["Data_Engineer_—_Acme"]
+    assert job.info is None and "relevant_info.json" in job.errors
+
+    info_file.write_text('{"Link": "https://acme.nl/1"}', encoding="utf-8")
+    job = load(catalog)["Data_Engineer_—_Acme"]
+    assert job.info == {"Link": "https://acme.nl/1"} and not job.errors
+
+def test_damaged_or_old_manifest_means_a_cold_load(catalog, monkeypatch):
+    load(catalog)
+    manifest_file = catalog.parent / "data" / "jobs_manifest.json"
+    reads = count_reads(monkeypatch)
+
+    manifest_file.write_text('{"version": 1, "files": {', encoding="utf-8")
+    assert load(catalog)["Analist_—_Beta"].stats == {"Response": "Rejected"}
+    assert len(reads) == 4
+
+    manifest_file.write_text(json.dumps(dict(manifest(catalog), version=0)), encoding="utf-8")
+    load(catalog)
+    assert len(reads) == 8
+
+def test_saved_stats_are_picked_up_by_the_next_load(catalog, monkeypatch):
+    job = load(catalog)["Data_Engineer_—_Acme"]
+    job.save_stats({"Response": "Interview", "Notes": "Second round"})
+    reads = count_reads(monkeypatch)
+
+    assert load(catalog)["Data_Engineer_—_Acme"].stats["Notes"] == "Second round"
+    assert reads == ["Data_Engineer_—_Acme/stats.json"]
+
+def test_active_only(catalog):
+    assert list(load(catalog, include_archived=False)) == ["Data_Engineer_—_Acme"]
+
+def test_concurrent_saves_never_collide(tmp_path):
+    """Scripts running side by side (tasks.py) all save the manifest."""
+    manifest_file = tmp_path / "data" / "jobs_manifest.json"
+    errors = []
+
+    def save(n):
+        try:
+            for i in range(50):
+                jobs._save_manifest(manifest_file, {f"{n}/{i}": {"size": i}})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert json.loads(manifest_file.read_text(encoding="utf-8"))["version"] == jobs.MANIFEST_VERSION
+    assert [path.name for path in manifest_file.parent.iterdir()] == ["jobs_manifest.json"]
@@ -0,0 +1,91 @@
+"""Replaying the plan-then-apply journal after a crash."""
+import json
+import pytest
+import journal
+from journal import Journal, apply_ops, replay
+from message_ledger import MessageLedger, STATUS_ARCHIVED, STATUS_DISCARDED
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "DATA_DIR", tmp_path / "data")
+    return tmp_path / "data"
+
+class FakeStore:
+    """Files emails by moving them, and counts saves."""
+
+    def __init__(self, root):
+        self.root = root
+        self.saves = 0
+
+    def file_email(self, src, location, job):
+        dst = self.root / location / job / src.name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        src.replace(dst)
+
+    def save(self):
+        self.saves += 1
+
+def email(folder, name):
+    path = folder / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"email_id": path.stem}), encoding="utf-8")
+    return path
+
+def plan(tmp_path):
+    processing = tmp_path / "Email" / "Processing"
+    return [
+        {"op": "file", "src": str(email(processing, "m1.json")), "location": "Archive", "job": "Job_A",
+         "ledger": {"id": "m1", "status": STATUS_ARCHIVED, "job": "Job_A"}},
+        {"op": "delete", "path": str(email(processing, "m2.json")),
+         "ledger": {"id": "m2", "status": STATUS_DISCARDED}},
+        {"op": "move", "src": str(email(tmp_path / "Solicitaties", "Job_B/stats.json")),
+         "dst": str(tmp_path / "Solicitaties" / "1.Archief" / "Job_B" / "stats.json")},
+        {"op": "write_json", "path": str(processing / "unrelated_email_senders.json"), "data": ["spam.nl"]},
+    ]
+
+def test_replay_finishes_a_half_applied_plan(tmp_path, data_dir):
+    ops = plan(tmp_path)
+    pending = Journal("organize_emails")
+    pending.write(ops)
+    apply_ops(ops[:2])  # The run died after filing m1 and deleting m2
+
+    store = FakeStore(tmp_path / "Email")
+    with MessageLedger(tmp_path / "Email" / "seen_messages.jsonl") as ledger:
+        assert replay(pending, store, ledger)
+
+        assert ledger.status("m1") == STATUS_ARCHIVED
+        assert ledger.status("m2") == STATUS_DISCARDED
+    assert (tmp_path / "Email" / "Archive" / "Job_A" / "m1.json").exists()
+    assert not (tmp_path / "Email" / "Processing" / "m2.json").exists()
+    assert (tmp_path / "Solicitaties" / "1.Archief" / "Job_B" / "stats.json").exists()
+    assert json.loads((tmp_path / "Email" / "Processing" / "unrelated_email_senders.json").read_text()) == ["spam.nl"]
+    assert store.saves == 1
+    assert pending.pending() is None
+
+def test_replay_counts_steps_that_already_happened(tmp_path, data_dir):
+    ops = plan(tmp_path)
+    store = FakeStore(tmp_path / "Email")
+    assert apply_ops(ops, store) == (4, 0, 0)
+    assert apply_ops(ops, store) == (1, 3, 0)  # Only write_json runs again
+
+def test_failed_operation_keeps_the_journal(tmp_path, data_dir):
+    ops = plan(tmp_path)
+    ops[2]["dst"] = str(email(tmp_path, "blocker") / "stats.json")  # Parent is a file
+    pending = Journal("archive_jobs")
+    pending.write(ops)
+
+    with pytest.raises(RuntimeError, match="1 journal operation"):
+        replay(pending, FakeStore(tmp_path / "Email"))
+    assert pending.pending()["ops"] == ops
+
+def test_torn_journal_is_dropped(data_dir):
+    pending = Journal("organize_emails")
+    data_dir.mkdir()
+    pending.path.write_text('{"created": "2026-01-05T10:00:00", "ops": [{"op": "mo', encoding="utf-8")
+
+    assert pending.pending() is None
+    assert not pending.path.exists()
+    assert not replay(pending)
+
+def test_unknown_operation_is_reported_as_failed(tmp_path):
+    assert apply_ops([{"op": "chmod", "path": str(tmp_path)}]) == (0, 0, 1)
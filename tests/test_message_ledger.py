@@ -0,0 +1,59 @@
+"""The seen-message ledger shared by fetch_emails and organize_emails."""
+import json
+import message_ledger
+from message_ledger import (MessageLedger, STATUS_ARCHIVED, STATUS_DISCARDED, STATUS_ONGOING,
+                            STATUS_PROCESSING, STATUS_SPAM)
+
+def lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+def test_records_survive_a_reload(tmp_path):
+    path = tmp_path / "Email" / "seen_messages.jsonl"
+    with MessageLedger(path) as ledger:
+        ledger.record("m1", STATUS_PROCESSING)
+        ledger.record("m2", STATUS_SPAM)
+        ledger.record("m1", STATUS_ARCHIVED, "Data_Engineer_—_Acme")
+
+    ledger = MessageLedger(path)
+    assert len(ledger) == 2 and "m1" in ledger and "m3" not in ledger
+    assert ledger.status("m1") == STATUS_ARCHIVED
+    assert ledger.entries["m1"]["job"] == "Data_Engineer_—_Acme"
+    assert ledger.status("m3") is None
+    assert len(lines(path)) == 3  # Append-only until compacted
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "seen_messages.jsonl"
+    path.write_text('{"id": "m1", "status": "spam"}\n{"id": "m2", "sta', encoding="utf-8")
+
+    ledger = MessageLedger(path)
+    assert ledger.status("m1") == STATUS_SPAM
+    assert "m2" not in ledger
+
+def test_first_ledger_is_seeded_from_the_email_folders(tmp_path):
+    email_dir = tmp_path / "Email"
+    for path in ("Processing/m1.json", "Processing/unrelated_email_senders.json",
+                 "Ongoing/Job_A/m2.json", "Archive/Job_B/m3.json"):
+        (email_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (email_dir / path).write_text("{}", encoding="utf-8")
+    (email_dir / "Segments").mkdir()
+    (email_dir / "Segments" / "index.json").write_text(
+        json.dumps({"postings": {"Archive": {"Job_C": ["m4"]}, "Ongoing": {"Job_A": ["m5"]}}}), encoding="utf-8")
+
+    ledger = MessageLedger(email_dir / "seen_messages.jsonl")
+    assert {email_id: ledger.status(email_id) for email_id in ledger.entries} == {
+        "m1": STATUS_PROCESSING, "m2": STATUS_ONGOING, "m3": STATUS_ARCHIVED,
+        "m4": STATUS_ARCHIVED, "m5": STATUS_ONGOING}
+    assert ledger.entries["m4"]["job"] == "Job_C"
+    assert len(lines(email_dir / "seen_messages.jsonl")) == 5  # Written right away
+
+def test_superseded_records_are_compacted_on_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(message_ledger, "COMPACT_THRESHOLD", 3)
+    path = tmp_path / "seen_messages.jsonl"
+    with MessageLedger(path) as ledger:
+        for status in (STATUS_PROCESSING, STATUS_ONGOING, STATUS_ARCHIVED, STATUS_DISCARDED, STATUS_SPAM):
+            ledger.record("m1", status)
+        ledger.record("m2", STATUS_SPAM)
+
+    ledger = MessageLedger(path)
+    assert ledger.status("m1") == STATUS_SPAM
+    assert [record["id"] for record in lines(path)] == ["m1", "m2"]
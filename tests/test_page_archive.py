@@ -0,0 +1,66 @@
+"""The raw page archive and re-extracting webpage.txt from it."""
+import gzip
+import pytest
+from extract_pages import extract_job
+from page_archive import latest_page, load_index, page_path, put_page, read_page
+from local_server import PAGE
+
+URL = "https://acme.nl/vacature/1"
+SHELL = b'<html><body><div id="app"></div><script src="app.js"></script></body></html>'
+
+@pytest.fixture
+def job_path(tmp_path):
+    path = tmp_path / "Data_Engineer_—_Acme"
+    path.mkdir()
+    return path
+
+def test_same_page_is_stored_once(job_path):
+    first = put_page(job_path, URL, PAGE.encode(), "text/html")
+    assert put_page(job_path, URL, PAGE.encode(), "text/html") == first
+
+    assert read_page(job_path, first) == PAGE.encode()
+    assert len(load_index(job_path)) == 1
+    assert [path.name for path in page_path(job_path, first).parent.glob("*.html.gz")] == [f"{first}.html.gz"]
+
+def test_compressed_file_is_identical_for_identical_content(job_path, tmp_path):
+    other = tmp_path / "Other_—_Job"
+    other.mkdir()
+    sha256 = put_page(job_path, URL, PAGE.encode())
+    put_page(other, URL, PAGE.encode())
+
+    assert page_path(job_path, sha256).read_bytes() == page_path(other, sha256).read_bytes()
+    assert gzip.decompress(page_path(job_path, sha256).read_bytes()) == PAGE.encode()
+
+def test_latest_version_comes_last(job_path):
+    old = put_page(job_path, URL, b"<p>old</p>")
+    new = put_page(job_path, URL, b"<p>new</p>")
+    rendered = put_page(job_path, URL, PAGE.encode(), rendered=True)
+
+    assert latest_page(job_path)["sha256"] == rendered
+    assert latest_page(job_path, rendered=False)["sha256"] == new
+    put_page(job_path, URL, b"<p>old</p>")  # Seen again: moves to the end, no new entry
+    assert [entry["sha256"] for entry in load_index(job_path)] == [new, rendered, old]
+    assert latest_page(job_path.parent / "Missing") is None
+
+def test_webpage_txt_is_regenerated_from_the_archive(job_path):
+    put_page(job_path, URL, PAGE.encode(), "text/html")
+
+    assert extract_job(job_path) == (str(job_path), "updated", None)
+    text = (job_path / "webpage.txt").read_text(encoding="utf-8")
+    assert text.startswith(f"Source: {URL}\n\n") and "Data Engineer" in text
+    assert extract_job(job_path) == (str(job_path), "unchanged", None)
+    assert extract_job(job_path.parent)[1] == "no archive"
+
+def test_empty_shell_falls_back_to_the_rendered_page(job_path):
+    put_page(job_path, URL, PAGE.encode(), rendered=True)
+    put_page(job_path, URL, SHELL)  # A later plain fetch only got the shell
+
+    assert extract_job(job_path)[1] == "updated"
+    assert "Reageren kan tot" in (job_path / "webpage.txt").read_text(encoding="utf-8")
+
+def test_damaged_index_counts_as_empty(job_path, capsys):
+    put_page(job_path, URL, PAGE.encode())
+    (job_path / "page_archive" / "index.json").write_text("[{", encoding="utf-8")
+
+    assert load_index(job_path) == []
+    assert "Unreadable" in capsys.readouterr().out
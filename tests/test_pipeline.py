@@ -0,0 +1,88 @@
+"""The single-process pipeline: stage order, dry runs, failures and shared state."""
+import pytest
+import pipeline
+from pipeline import PipelineState, parse_args, run_pipeline
+
+class Loads:
+    """Counts how often each shared object is loaded, and whether it was saved."""
+
+    def __init__(self, monkeypatch):
+        self.counts = {}
+        self.saved = self.closed = False
+        monkeypatch.setattr(pipeline, "load_jobs", lambda: self.load("jobs", ["Job_A"]))
+        monkeypatch.setattr(pipeline, "open_store", lambda: self.load("store", self))
+        monkeypatch.setattr(pipeline, "MessageLedger", lambda: self.load("ledger", self))
+        monkeypatch.setattr(pipeline, "load_classifier", lambda path: self.load("classifier", object()))
+        monkeypatch.setattr(pipeline, "RoutingCache", lambda: self.load("routing", object()))
+
+    def load(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        return value
+
+    def save(self):
+        self.saved = True
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def loads(monkeypatch):
+    return Loads(monkeypatch)
+
+@pytest.fixture
+def ran(monkeypatch):
+    """Replace every stage with one that records its name and touches the state it needs."""
+    ran = []
+    needs = {"fetch": ("classifier", "ledger", "routing"), "organize": ("store", "ledger", "jobs", "routing"),
+             "stats": ("jobs", "store"), "archive": ("jobs",), "letters": ("jobs",)}
+
+    def runner(stage):
+        def run(state, args):
+            ran.append(stage)
+            for name in needs[stage]:
+                getattr(state, name)
+            if stage == "archive":
+                state.invalidate_jobs()  # Job folders were moved
+        return run
+    monkeypatch.setattr(pipeline, "RUNNERS", {stage: runner(stage) for stage in pipeline.STAGES})
+    return ran
+
+def test_stages_run_in_workflow_order(loads, ran):
+    timings = run_pipeline(["letters", "organize", "fetch"], parse_args([]))
+
+    assert ran == ["fetch", "organize", "letters"]
+    assert [(stage, ok) for stage, _, ok in timings] == [("fetch", True), ("organize", True), ("letters", True)]
+
+def test_shared_state_is_loaded_once(loads, ran):
+    run_pipeline(list(pipeline.STAGES), parse_args([]))
+
+    # The catalog is reloaded once, after archive moved job folders
+    assert loads.counts == {"classifier": 1, "ledger": 1, "routing": 1, "store": 1, "jobs": 2}
+    assert loads.saved and loads.closed
+
+def test_dry_run_only_runs_the_stages_that_can_print_a_plan(loads, ran):
+    run_pipeline(list(pipeline.STAGES), parse_args(["--dry-run"]))
+    assert ran == ["organize", "archive"]
+
+def test_failed_stage_stops_the_pipeline(loads, ran, monkeypatch):
+    def broken(state, args):
+        state.ledger
+        raise RuntimeError("quota exceeded")
+    monkeypatch.setitem(pipeline.RUNNERS, "organize", broken)
+
+    timings = run_pipeline(list(pipeline.STAGES), parse_args([]))
+    assert ran == ["fetch"]
+    assert [(stage, ok) for stage, _, ok in timings] == [("fetch", True), ("organize", False)]
+    assert loads.closed  # The ledger is still flushed
+
+def test_unused_state_is_never_loaded(loads):
+    PipelineState().close()
+    assert loads.counts == {}
+
+def test_stage_arguments(capsys):
+    args = parse_args(["--stages", "organize, stats", "--skip", "stats", "--incremental"])
+    assert args.stages == ["organize", "stats"] and args.skip == ["stats"] and args.incremental
+
+    with pytest.raises(SystemExit):
+        parse_args(["--stages", "fetch,deploy"])
+    assert "unknown stage(s) deploy" in capsys.readouterr().err
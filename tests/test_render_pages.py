@@ -0,0 +1,157 @@
+"""The browser tab pool, and rendering a page that builds its vacancy in JavaScript."""
+import json
+import asyncio
+import pytest
+import render_pages
+from render_pages import BrowserPool, render_pages as render
+from fetch_job_pages import MIN_PAGE_SIZE, get_page, make_session
+from local_server import LocalHost, html
+
+class FakeTab:
+    def __init__(self, context, crashed=False):
+        self.context = context
+        self.crashed = crashed
+        self.closed = False
+
+    async def close(self):
+        if self.crashed:
+            raise RuntimeError("Target closed")
+        self.closed = True
+
+    async def goto(self, url, **kwargs):
+        raise RuntimeError("Timeout 30000ms exceeded.\nCall log: ...")
+
+class FakeContext:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.tabs = []
+
+    async def new_page(self):
+        if self.broken:
+            raise RuntimeError("Browser context has been closed")
+        self.tabs.append(FakeTab(self))
+        return self.tabs[-1]
+
+def pool_with(context, size=2, new_contexts=()):
+    """A BrowserPool of size fake tabs; _new_context hands out new_contexts, then fails."""
+    pool = BrowserPool(size)
+    pool.context = context
+    pool.live_tabs = size
+    spare = list(new_contexts)
+
+    async def new_context():
+        if not spare:
+            raise RuntimeError("Browser has been closed")
+        return spare.pop(0)
+    pool._new_context = new_context
+    return pool
+
+def test_failed_tab_is_replaced_from_the_same_context():
+    async def run():
+        context = FakeContext()
+        pool = pool_with(context)
+        old = FakeTab(context)
+        new = await pool._replace_tab(old)
+        return old, new, context, pool
+
+    old, new, context, pool = asyncio.run(run())
+    assert old.closed and new is context.tabs[-1]
+    assert pool.context is context and pool.live_tabs == 2
+
+def test_broken_context_is_swapped_for_a_new_one():
+    async def run():
+        broken, fresh = FakeContext(broken=True), FakeContext()
+        pool = pool_with(broken, new_contexts=[fresh])
+        new = await pool._replace_tab(FakeTab(broken, crashed=True))
+        return new, fresh, pool
+
+    new, fresh, pool = asyncio.run(run())
+    assert new is fresh.tabs[-1] and pool.context is fresh and pool.live_tabs == 2
+
+def test_pool_shrinks_and_finally_refuses_renders(capsys):
+    async def run():
+        pool = pool_with(FakeContext(broken=True), size=2)
+        first = await pool._replace_tab(FakeTab(pool.context))
+        assert first is None and pool.live_tabs == 1 and pool.tabs.empty()
+        assert await pool._replace_tab(FakeTab(pool.context)) is None
+        assert pool.live_tabs == 0
+        with pytest.raises(RuntimeError, match="No working browser tabs left"):
+            await pool.render("http://127.0.0.1/vacature")
+        with pytest.raises(RuntimeError, match="No working browser tabs left"):
+            await pool.render("http://127.0.0.1/vacature")  # Every later waiter is woken too
+
+    asyncio.run(run())
+    assert "1 tabs left" in capsys.readouterr().out
+
+def test_tab_that_fails_a_render_is_never_handed_out_again():
+    async def run():
+        context = FakeContext()
+        pool = pool_with(context, size=1)
+        failing = FakeTab(context)
+        pool.tabs.put_nowait(failing)
+        with pytest.raises(RuntimeError, match="Timeout"):
+            await pool.render("http://127.0.0.1/vacature")
+        return failing, pool.tabs.get_nowait(), context
+
+    failing, queued, context = asyncio.run(run())
+    assert failing.closed and queued is context.tabs[-1]
+
+# Real rendering in headless Chromium
+
+SHELL = """<!DOCTYPE html><html><head><title>Vacature</title></head>
+<body><div id="app">Loading...</div>
+<script>
+fetch('/api/vacancy').then(r => r.json()).then(v => {
+  const app = document.getElementById('app');
+  app.innerHTML = '<main><h1>' + v.title + '</h1>' + v.paragraphs.map(p => '<p>' + p + '</p>').join('') + '</main>';
+});
+</script></body></html>"""
+
+VACANCY = {
+    "title": "Data Engineer",
+    "paragraphs": ["Wij zoeken een Data Engineer die onze datapijplijnen in Python en SQL bouwt en onderhoudt.",
+                   "Salaris: EUR 3.500 tot 4.500 bruto per maand.",
+                   "Reageren kan tot en met 1 december."],
+}
+
+def respond(request):
+    if request.path.startswith("/api/vacancy"):
+        return 200, {"Content-Type": "application/json"}, json.dumps(VACANCY).encode("utf-8")
+    return html(SHELL)
+
+@pytest.fixture(scope="module")
+def chromium():
+    """Skip unless playwright and its Chromium can be launched here."""
+    pytest.importorskip("playwright")
+
+    async def launch():
+        async with BrowserPool(size=1):
+            pass
+    try:
+        asyncio.run(launch())
+    except Exception as e:
+        pytest.skip(f"Chromium is not available: {str(e).strip().splitlines()[0]}")
+
+@pytest.fixture
+def shell_host():
+    host = LocalHost(respond=respond)
+    yield host
+    host.close()
+
+def test_javascript_page_is_rendered_in_a_shared_browser(chromium, shell_host):
+    urls = [shell_host.url(f"/vacature/{i}") for i in range(6)]
+    _, _, plain_text, _ = get_page(make_session(1), urls[0], 5)
+    assert len(plain_text) < MIN_PAGE_SIZE  # requests only sees the shell
+
+    results = asyncio.run(render([(f"page{i}", url) for i, url in enumerate(urls)], concurrency=3))
+
+    assert all(r.ok and r.status == 200 for r in results)
+    assert sorted(r.job for r in results) == [f"page{i}" for i in range(6)]
+    for result in results:
+        assert VACANCY["paragraphs"][0] in result.text and len(result.text) >= MIN_PAGE_SIZE
+    assert sum(path.startswith("/api/vacancy") for path, _ in shell_host.requests) == 6
+
+def test_missing_playwright_is_reported(monkeypatch):
+    monkeypatch.setattr(render_pages, "async_playwright", None)
+    with pytest.raises(RuntimeError, match="playwright is not installed"):
+        asyncio.run(render([("page0", "http://127.0.0.1/vacature")]))
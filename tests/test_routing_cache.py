@@ -0,0 +1,114 @@
+"""The thread/sender/domain routing cache and how fetch and organize use it."""
+import json
+from datetime import datetime, timedelta
+import pytest
+import fetch_emails as fe
+import routing_cache
+from fake_gmail import FakeGmail, make_message
+from job_index import JobIndex
+from message_ledger import MessageLedger
+from organize_emails import plan_emails
+from routing_cache import RoutingCache, route_keys
+from sender_classifier import SenderClassifier
+
+JOB = "Data_Engineer_—_Acme"
+OTHER_JOB = "Analist_—_Acme"
+
+@pytest.fixture
+def cache(tmp_path):
+    return RoutingCache(tmp_path / "routing_cache.json")
+
+def test_route_keys_skip_shared_senders():
+    assert route_keys("t1", "HR <hr@acme.nl>") == [("thread", "t1"), ("sender", "hr@acme.nl"), ("domain", "acme.nl")]
+    assert route_keys(None, "recruiter@gmail.com") == [("sender", "recruiter@gmail.com")]
+    assert route_keys("t2", "noreply@myworkday.com") == [("thread", "t2")]
+
+def test_most_specific_key_wins(cache):
+    cache.learn("t1", "hr@acme.nl", JOB)
+
+    route = cache.route("t1", "hr@acme.nl")
+    assert (route.job, route.confidence, route.source) == (JOB, 0.95, "thread")
+    assert route.company == "Acme"
+    assert cache.route("t9", "hr@acme.nl").source == "sender"
+    assert cache.route("t9", "other@acme.nl").source == "domain"
+    assert cache.route("t9", "hr@beta.nl") is None
+
+def test_a_recruiter_for_two_jobs_stops_routing(cache):
+    cache.learn("t1", "hr@acme.nl", JOB)
+    cache.learn("t2", "hr@acme.nl", OTHER_JOB)
+
+    assert cache.route(None, "hr@acme.nl") is None   # 0.85 * 1/2 is below the threshold
+    cache.learn("t3", "hr@acme.nl", OTHER_JOB)       # More conflicts than hits: the key moves on
+    assert cache.route(None, "hr@acme.nl").job == OTHER_JOB
+
+def test_prune_evicts_stale_vanished_and_overflowing_entries(cache, monkeypatch):
+    now = datetime(2026, 6, 1)
+    cache.learn("t1", "a@old.nl", JOB, when=now - timedelta(days=200))
+    cache.learn("t2", "b@gone.nl", "Gone_—_Corp", when=now)
+    cache.learn("t3", "c@new.nl", JOB, when=now)
+    assert cache.prune([JOB], now=now) == 6
+    assert cache.route("t3", None).job == JOB
+
+    monkeypatch.setattr(routing_cache, "MAX_ROUTES", 1)
+    cache.learn("t4", None, JOB, when=now + timedelta(days=1))
+    cache.prune(now=now)
+    assert list(cache.tables["thread"]) == ["t4"]    # Least recently seen go first
+
+def test_cache_survives_a_reload(cache, tmp_path):
+    cache.learn("t1", "hr@acme.nl", JOB)
+    cache.save()
+
+    assert RoutingCache(cache.path).route("t1", None).job == JOB
+    cache.path.write_text(json.dumps({"version": 0, "thread": {}}), encoding="utf-8")
+    assert len(RoutingCache(cache.path)) == 0
+
+class FolderStub:
+    def jobs(self, location):
+        return [JOB] if location == "Ongoing" else []
+
+    def iter_emails(self, location, job):
+        yield {"thread_id": "t1", "from": "HR <hr@acme.nl>"}
+
+def test_seed_from_filed_emails(cache):
+    cache.seed(FolderStub())
+    assert cache.route("t1", None).job == JOB
+
+def test_fetch_adds_a_hint_but_leaves_company_empty(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(fe, "PROCESSING_DIR", tmp_path)
+    cache.learn("t0", "hr@acme.nl", JOB)
+    service = FakeGmail([make_message(0), make_message(1, sender="hr@beta.nl")])
+
+    with MessageLedger(tmp_path / "seen_messages.jsonl") as ledger:
+        processor = fe.MessageProcessor(lambda: service, None, SenderClassifier([]), ledger, routing=cache)
+        processor.process([{"id": "m0"}, {"id": "m1"}])
+
+    routed = json.loads((tmp_path / "m0.json").read_text(encoding="utf-8"))
+    assert routed["routing"] == {"job": JOB, "confidence": 0.95, "source": "thread"}
+    assert routed["company"] is None and routed["response"] is None
+    assert "routing" not in json.loads((tmp_path / "m1.json").read_text(encoding="utf-8"))
+    assert processor.routed == 1
+
+def plan(tmp_path, cache, email_data):
+    email_file = tmp_path / "m0.json"
+    email_file.write_text(json.dumps(email_data), encoding="utf-8")
+    index = JobIndex([JOB, OTHER_JOB], aliases_file=tmp_path / "company_aliases.json")
+    return plan_emails([email_file], {}, index, cache, SenderClassifier([]), [])
+
+def test_routed_email_waits_for_a_response(cache, tmp_path):
+    hinted = {"thread_id": "t1", "from": "hr@acme.nl", "subject": "Update", "company": None, "response": None,
+              "routing": {"job": JOB, "confidence": 0.95, "source": "thread"}}
+
+    ops, counts = plan(tmp_path, cache, hinted)
+    assert ops == [] and counts["skipped"] == 1     # Unread: stays in Processing
+
+    ops, counts = plan(tmp_path, cache, dict(hinted, response="Rejected"))
+    assert [(op["location"], op["job"]) for op in ops] == [("Archive", JOB)]
+    assert counts["routed"] == 1
+
+def test_company_overrides_a_wrong_route(cache, tmp_path):
+    wrong = {"thread_id": "t1", "from": "hr@acme.nl", "subject": "Uitnodiging Analist", "company": "Acme",
+             "response": "Interview", "routing": {"job": "Tester_—_Beta", "confidence": 0.95, "source": "thread"}}
+
+    ops, counts = plan(tmp_path, cache, wrong)
+    assert [(op["location"], op["job"]) for op in ops] == [("Ongoing", OTHER_JOB)]
+    assert counts["routed"] == 0
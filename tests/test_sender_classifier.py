@@ -0,0 +1,59 @@
+"""The compiled unrelated-sender matcher shared by fetch and organize."""
+import json
+import pytest
+from sender_classifier import SenderClassifier, extract_email, load_classifier, save_classifier
+
+@pytest.fixture
+def classifier():
+    return SenderClassifier(["news@shop.nl", "marketing.example.com", "@ads.nl", "*@mailchimp*", "noreply-?@bank.nl"])
+
+@pytest.mark.parametrize("address, expected", [
+    ("news@shop.nl", True),
+    ("NEWS@Shop.nl", True),
+    ("sales@shop.nl", False),                    # Only that address is listed
+    ("info@marketing.example.com", True),
+    ("info@eu.marketing.example.com", True),     # Subdomains of a listed domain
+    ("info@example.com", False),                 # But not its parent
+    ("x@ads.nl", True),
+    ("x@badads.nl", False),                      # Suffix match per label, not per character
+    ("campaign@mailchimp.com", True),
+    ("noreply-1@bank.nl", True),
+    ("noreply-12@bank.nl", False),
+    ("", False),
+    (None, False),
+])
+def test_matches_sender(classifier, address, expected):
+    assert classifier.matches_sender(address) is expected
+
+def test_job_mail_from_a_listed_sender_is_never_spam(classifier):
+    assert classifier.is_spam("Shop <news@shop.nl>", "Zomeractie: 20% korting")
+    assert not classifier.is_spam("Shop <news@shop.nl>", "Uitnodiging sollicitatiegesprek")
+    assert not classifier.is_spam("Shop <news@shop.nl>", "New JOB openings")
+    assert not classifier.is_spam("HR <hr@acme.nl>", "Zomeractie")
+
+def test_extract_email():
+    assert extract_email("Acme HR <HR@Acme.nl>") == "hr@acme.nl"
+    assert extract_email(" hr@acme.nl ") == "hr@acme.nl"
+    assert extract_email(None) is None
+
+def test_add_and_contains_normalize_entries(classifier):
+    assert not classifier.add("News@Shop.nl ")
+    assert not classifier.add("ads.nl")          # Same domain as @ads.nl
+    assert classifier.add("promo@shop.nl")
+    assert "@marketing.example.com" in classifier
+    assert "*@mailchimp*" in classifier
+    assert len(classifier) == 6
+
+def test_a_wildcard_added_later_is_compiled_in(classifier):
+    assert not classifier.matches_sender("x@sendgrid.net")
+    classifier.add("*@sendgrid*")
+    assert classifier.matches_sender("x@sendgrid.net")
+
+def test_save_and_load_round_trip(tmp_path, classifier):
+    path = tmp_path / "unrelated_email_senders.json"
+    save_classifier(classifier, path)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == ["*@mailchimp*", "@ads.nl", "@marketing.example.com",
+                                                            "news@shop.nl", "noreply-?@bank.nl"]
+    assert load_classifier(path).entries == classifier.entries
+    assert len(load_classifier(tmp_path / "missing.json")) == 0
@@ -0,0 +1,118 @@
+"""The make-style task graph: ordering checks and content-hash skipping."""
+import json
+import textwrap
+from datetime import date
+import pytest
+import tasks
+from tasks import Task, check_graph, ancestors, load_state, run_graph, with_deps
+
+def test_declared_graph_is_consistent():
+    check_graph()
+    assert {"update_stats", "calculate_potential"} <= ancestors("generate_deadlines")
+    assert with_deps(["archive_jobs"]) == ["fetch_emails", "fetch_job_pages", "organize_emails",
+                                           "update_stats", "archive_jobs"]
+
+def test_parallel_writers_of_shared_files_are_rejected(monkeypatch):
+    monkeypatch.setattr(tasks, "TASKS", {task.name: task for task in [
+        Task("stats", "a.py", outputs=["stats.json"]),
+        Task("potential", "b.py", inputs=["stats.json"], outputs=["stats.json"]),
+    ]})
+    with pytest.raises(RuntimeError, match="neither depends on the other"):
+        check_graph()
+
+    tasks.TASKS["potential"].deps = ["stats"]
+    check_graph()
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project with a two-step chain: build reads src/*.txt, report reads build's output."""
+    monkeypatch.setattr(tasks, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(tasks, "STATE_FILE", tmp_path / "data" / "tasks_state.json")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("alpha", encoding="utf-8")
+    # Each run appends its name to runs.log, then writes its output from its inputs
+    (tmp_path / "step.py").write_text(textwrap.dedent("""
+        import sys, glob
+        name, out, *inputs = sys.argv[1:]
+        if name == "fail":
+            sys.exit(3)
+        with open("runs.log", "a") as log:
+            log.write(name + "\\n")
+        text = "".join(open(path).read() for pattern in inputs for path in sorted(glob.glob(pattern)))
+        open(out, "w").write(text.upper())
+    """), encoding="utf-8")
+    monkeypatch.setattr(tasks, "TASKS", {task.name: task for task in [
+        Task("build", "step.py", inputs=["src/*.txt"], outputs=["build.txt"], args=["build", "build.txt", "src/*.txt"]),
+        Task("report", "step.py", inputs=["build.txt"], outputs=["report.txt"], deps=["build"],
+             args=["report", "report.txt", "build.txt"]),
+        Task("other", "step.py", inputs=["other.cfg"], outputs=["other.txt"], args=["other", "other.txt"]),
+    ]})
+
+    def run(names=("build", "report", "other"), **kwargs):
+        log = tmp_path / "runs.log"
+        log.unlink(missing_ok=True)
+        results = run_graph(list(names), load_state(), **kwargs)
+        return results, log.read_text().split() if log.exists() else []
+
+    return run
+
+def test_second_run_is_up_to_date(project, tmp_path):
+    results, ran = project()
+    assert results == {"build": "ran", "report": "ran", "other": "ran"}
+    assert sorted(ran) == ["build", "other", "report"] and ran.index("build") < ran.index("report")
+    assert (tmp_path / "report.txt").read_text() == "ALPHA"
+
+    results, ran = project()
+    assert ran == [] and set(results.values()) == {"up to date"}
+
+def test_changed_input_reruns_only_what_reads_it(project, tmp_path):
+    project()
+    (tmp_path / "src" / "b.txt").write_text("beta", encoding="utf-8")
+
+    results, ran = project()
+    assert ran == ["build", "report"] and results["other"] == "up to date"
+    assert (tmp_path / "report.txt").read_text() == "ALPHABETA"
+
+    # Rewriting a file with the same content changes nothing
+    (tmp_path / "src" / "b.txt").write_text("beta", encoding="utf-8")
+    assert project()[1] == []
+
+def test_missing_output_and_force_rerun_a_task(project, tmp_path):
+    project()
+    (tmp_path / "other.txt").unlink()
+    assert project()[1] == ["other"]
+    assert project(force={"report"})[1] == ["report"]
+
+def test_failed_task_blocks_its_dependents(project, tmp_path):
+    tasks.TASKS["build"].args[0] = "fail"
+
+    results, ran = project()
+    assert results == {"build": "failed", "report": "blocked", "other": "ran"}
+    assert "build" not in load_state()["tasks"]
+
+def test_file_hashes_are_cached_by_mtime_and_size(project, tmp_path, monkeypatch):
+    project()
+    state = json.loads((tmp_path / "data" / "tasks_state.json").read_text(encoding="utf-8"))
+    assert state["files"]["src/a.txt"][1] == len("alpha")
+
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+    monkeypatch.setattr("builtins.open", counting_open)
+    run_graph(["build", "report", "other"], load_state())
+    assert not [path for path in opened if path.endswith(".txt")]  # Only stat() calls
+
+def test_daily_task_reruns_on_a_new_day(project, monkeypatch):
+    tasks.TASKS["other"].daily = True
+    project()
+    assert project()[1] == []
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date(2999, 1, 1)
+    monkeypatch.setattr(tasks, "date", Tomorrow)
+    assert project()[1] == ["other"]
@@ -0,0 +1,93 @@
+"""update_stats.py, full and --incremental, against a temporary project."""
+import os
+import json
+from types import SimpleNamespace
+import pytest
+import update_stats
+from email_store import FolderStore
+from jobs import load_jobs
+
+JOB = "Data_Engineer_—_Acme"
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """One job with a filed email, and a run() that updates its stats."""
+    solicitaties = tmp_path / "Solicitaties"
+    job_dir = solicitaties / JOB
+    job_dir.mkdir(parents=True)
+    (job_dir / "relevant_info.json").write_text(json.dumps({"Deadline": "2999-01-01"}), encoding="utf-8")
+    (job_dir / "stats.json").write_text(json.dumps({"Response": "Pending"}), encoding="utf-8")
+    email_file = tmp_path / "Email" / "Ongoing" / JOB / "m1.json"
+    email_file.parent.mkdir(parents=True)
+    email_file.write_text(json.dumps({"email_id": "m1", "response": "Received"}), encoding="utf-8")
+
+    monkeypatch.setattr(update_stats, "SOLICITATIES_DIR", solicitaties)
+    monkeypatch.setattr(update_stats, "STATS_CACHE_FILE", tmp_path / "data" / "stats_cache.json")
+    updates = []
+    update_job = update_stats.update_job
+
+    def counting(job, store, current_date):
+        updates.append(job.name)
+        return update_job(job, store, current_date)
+    monkeypatch.setattr(update_stats, "update_job", counting)
+
+    def run(incremental=True):
+        updates.clear()
+        jobs = load_jobs(solicitaties_dir=solicitaties, manifest_file=tmp_path / "data" / "jobs_manifest.json")
+        update_stats.update_stats(incremental=incremental, jobs=jobs, store=FolderStore(tmp_path / "Email"))
+        return json.loads((job_dir / "stats.json").read_text(encoding="utf-8"))
+
+    def touch(path):
+        """Make sure a rewrite gets a newer mtime, even on coarse file system clocks."""
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+    return SimpleNamespace(dir=tmp_path, job_dir=job_dir, email_file=email_file, run=run, touch=touch,
+                           updates=updates)
+
+def test_unchanged_job_is_skipped(project):
+    assert project.run()["Response"] == "Received"
+    assert project.updates == [JOB]
+
+    assert project.run()["Response"] == "Received"
+    assert project.updates == []
+
+def test_response_edited_in_a_filed_email_is_picked_up(project):
+    project.run()
+    project.email_file.write_text(json.dumps({"email_id": "m1", "response": "Interview Scheduled"}), encoding="utf-8")
+    project.touch(project.email_file)
+
+    stats = project.run()
+    assert project.updates == [JOB]
+    assert stats["Response"] == "Interview Scheduled" and stats["Interviewed"]
+
+def test_new_email_and_edited_stats_are_picked_up(project):
+    project.run()
+    project.email_file.with_name("m2.json").write_text(
+        json.dumps({"email_id": "m2", "response": "Rejected"}), encoding="utf-8")
+
+    assert project.run()["Response"] == "Rejected"
+    assert project.updates == [JOB]
+    assert (project.dir / "Email" / "Archive" / JOB / "m2.json").exists()  # Auto-archived
+
+    project.run()
+    stats_file = project.job_dir / "stats.json"
+    stats_file.write_text(json.dumps({"Response": "Rejected", "Rejected": True, "Notes": "x"}), encoding="utf-8")
+    project.touch(stats_file)
+    project.run()
+    assert project.updates == [JOB]
+
+def test_passed_deadline_is_rechecked_without_changes(project):
+    info_file = project.job_dir / "relevant_info.json"
+    info_file.write_text(json.dumps({"Deadline": "2000-01-01"}), encoding="utf-8")
+    project.email_file.unlink()
+    (project.job_dir / "stats.json").write_text(json.dumps({"Response": "Unsent"}), encoding="utf-8")
+
+    assert project.run()["Response"] == "Expired"
+    assert project.run()["Response"] == "Expired"
+    assert project.updates == []  # Expired is no longer due
+
+def test_full_run_ignores_the_cache(project):
+    project.run()
+    project.run(incremental=False)
+    assert project.updates == [JOB]